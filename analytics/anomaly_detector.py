@@ -0,0 +1,249 @@
+import os
+import sys
+import threading
+from datetime import date, datetime, time, timedelta
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from analytics.sketches import KLLSketch, RunningMoments
+from core.attendance_events import subscribe, unsubscribe
+
+# Serving windows; a meal is evaluated as soon as its window closes
+MEAL_WINDOWS = {
+    'Breakfast': (time(7, 0), time(10, 0)),
+    'Lunch': (time(12, 0), time(15, 0)),
+    'Dinner': (time(19, 0), time(22, 0)),
+}
+MEAL_ORDER = ['Breakfast', 'Lunch', 'Dinner']
+
+# Alert rules
+Z_THRESHOLD = 3.0          # |count - mean| / std
+IQR_MULTIPLIER = 1.5       # same fences as the EDA outlier check
+MIN_HISTORY = 4            # meals of the same (meal_type, weekday) needed before alerting
+CHECK_INTERVAL_SECONDS = 5
+# After downtime, windows that closed longer ago than this are skipped unevaluated
+MAX_CATCH_UP = timedelta(hours=12)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _serving_order(window):
+    """
+    Sort key for (date, meal_type) windows in serving order, not alphabetical
+    """
+    day, meal = window
+    return day, MEAL_ORDER.index(meal)
+
+
+class MealAnomalyDetector:
+    """
+    Streaming anomaly detector for meal attendance.
+    Scans from the attendance write path are counted per open (date, meal)
+    window. When a window closes, its headcount is checked against running
+    statistics and a KLL quantile sketch for the same (meal_type, weekday),
+    then folded into them. Memory is constant: 21 keys of O(k) sketches plus
+    the currently open windows.
+    """
+
+    def __init__(self, on_alert=None, quantile_k=100, start=None):
+        self.on_alert = on_alert or print_alert
+        self.quantile_k = quantile_k
+        self.stats = {}
+        self.sketches = {}
+        self.open_counts = {}
+        self.alerts = []
+        self._lock = threading.Lock()
+        self._next_window = self._first_window_after(start or datetime.now())
+        self._timer = None
+        self._stop = threading.Event()
+
+    # ---------- history ----------
+
+    def _key(self, meal_type, day):
+        return meal_type, day.weekday()
+
+    def observe(self, day, meal_type, count):
+        """
+        Fold a finished meal's headcount into the running statistics
+        """
+        key = self._key(meal_type, day)
+        self.stats.setdefault(key, RunningMoments()).update(count)
+        self.sketches.setdefault(key, KLLSketch(k=self.quantile_k, seed=0)).update(count)
+
+    def warm_start(self, history):
+        """
+        Seed statistics from past meals (DataFrame with date, meal_type, actual_attended)
+        """
+        for row in history.itertuples(index=False):
+            self.observe(_as_date(row.date), row.meal_type, row.actual_attended)
+
+    # ---------- live stream ----------
+
+    def on_change(self, change):
+        """
+        Attendance write-path subscriber: count present scans per open window
+        """
+        if change.op != 'insert' or not change.is_present:
+            return
+        if change.meal_type not in MEAL_ORDER:
+            return
+        window = (_as_date(change.date), change.meal_type)
+        with self._lock:
+            if _serving_order(window) < _serving_order(self._next_window):
+                return  # late scan for a window that was already evaluated
+            self.open_counts[window] = self.open_counts.get(window, 0) + 1
+
+    def _first_window_after(self, moment):
+        day = moment.date()
+        for meal in MEAL_ORDER:
+            if datetime.combine(day, MEAL_WINDOWS[meal][1]) > moment:
+                return day, meal
+        return day + timedelta(days=1), MEAL_ORDER[0]
+
+    def _advance(self, window):
+        day, meal = window
+        i = MEAL_ORDER.index(meal)
+        if i + 1 < len(MEAL_ORDER):
+            return day, MEAL_ORDER[i + 1]
+        return day + timedelta(days=1), MEAL_ORDER[0]
+
+    def check(self, day, meal_type, count):
+        """
+        Score one closed meal against its (meal_type, weekday) history
+        Returns alert dict or None
+        """
+        key = self._key(meal_type, day)
+        stats = self.stats.get(key)
+        if stats is None or stats.n < MIN_HISTORY:
+            return None
+
+        q1, q3 = (float(v) for v in self.sketches[key].quantile([0.25, 0.75]))
+        iqr = q3 - q1
+        lower, upper = q1 - IQR_MULTIPLIER * iqr, q3 + IQR_MULTIPLIER * iqr
+        z = (count - stats.mean) / stats.std if stats.std > 0 else 0.0
+
+        reasons = []
+        if count < lower or count > upper:
+            reasons.append(f"outside IQR fence [{lower:.0f}, {upper:.0f}]")
+        if abs(z) > Z_THRESHOLD:
+            reasons.append(f"z-score {z:+.1f}")
+        if not reasons:
+            return None
+        return {
+            'date': day.isoformat(),
+            'meal_type': meal_type,
+            'count': count,
+            'expected': round(stats.mean, 1),
+            'z_score': round(z, 2),
+            'direction': 'drop' if count < stats.mean else 'spike',
+            'reasons': reasons,
+        }
+
+    def close_due_windows(self, now=None):
+        """
+        Evaluate every meal window that has closed by `now`, at most
+        MAX_CATCH_UP back. Windows with no scans at all (a dead scanner,
+        a holiday, downtime) are still checked but not folded into the
+        statistics, so they cannot drag the baseline toward zero
+        Returns list of alerts raised
+        """
+        now = now or datetime.now()
+        raised = []
+        with self._lock:
+            oldest = self._first_window_after(now - MAX_CATCH_UP)
+            if _serving_order(self._next_window) < _serving_order(oldest):
+                self._next_window = oldest
+        while True:
+            with self._lock:
+                day, meal = self._next_window
+                if datetime.combine(day, MEAL_WINDOWS[meal][1]) > now:
+                    break
+                count = self.open_counts.pop((day, meal), 0)
+                self._next_window = self._advance((day, meal))
+                # Nothing before the next window can be evaluated any more
+                next_order = _serving_order(self._next_window)
+                for window in [w for w in self.open_counts if _serving_order(w) < next_order]:
+                    del self.open_counts[window]
+
+            alert = self.check(day, meal, count)
+            if alert:
+                self.alerts.append(alert)
+                raised.append(alert)
+                self.on_alert(alert)
+            if count:
+                self.observe(day, meal, count)
+        return raised
+
+    # ---------- background operation ----------
+
+    def start(self, interval=CHECK_INTERVAL_SECONDS):
+        """
+        Subscribe to the write path and check windows every `interval` seconds
+        """
+        subscribe(self.on_change)
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.close_due_windows()
+
+        self._timer = threading.Thread(target=loop, name='meal-anomaly-detector', daemon=True)
+        self._timer.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the background checker and unsubscribe
+        """
+        unsubscribe(self.on_change)
+        self._stop.set()
+        if self._timer:
+            self._timer.join()
+
+
+def print_alert(alert):
+    """
+    Default alert handler
+    """
+    print(f"🚨 ANOMALY {alert['date']} {alert['meal_type']}: {alert['count']} students "
+          f"({alert['direction']}, expected ~{alert['expected']}) - {'; '.join(alert['reasons'])}")
+
+
+# Simulate a few weeks of meals, then a broken scanner at lunch
+if __name__ == "__main__":
+    import random
+    from core.attendance_events import AttendanceChange, publish
+
+    print("="*60)
+    print("      STREAMING MEAL ANOMALY DETECTION - SIMULATION")
+    print("="*60)
+
+    rng = random.Random(7)
+    start_day = date(2026, 1, 5)
+    detector = MealAnomalyDetector(start=datetime.combine(start_day, time(0, 0)))
+    subscribe(detector.on_change)
+
+    for offset in range(29):
+        day = start_day + timedelta(days=offset)
+        for meal in MEAL_ORDER:
+            expected = {'Breakfast': 80, 'Lunch': 120, 'Dinner': 100}[meal]
+            headcount = rng.randint(expected - 8, expected + 8)
+            if offset == 28 and meal == 'Lunch':
+                headcount = 15  # scanner fault
+            for student in range(headcount):
+                publish(AttendanceChange('insert', None, student, day, meal, 1))
+            # Checked seconds after the window closes
+            closed_at = datetime.combine(day, MEAL_WINDOWS[meal][1]) + timedelta(seconds=5)
+            detector.close_due_windows(closed_at)
+
+    print(f"\nAlerts raised: {len(detector.alerts)}")
+    print("="*60)
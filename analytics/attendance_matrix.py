@@ -0,0 +1,468 @@
+import os
+import sys
+import json
+import threading
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+matrix_dir = os.path.join(project_root, 'data', 'attendance_matrix')
+sys.path.insert(0, project_root)
+
+MEALS = ['Breakfast', 'Lunch', 'Dinner']
+MEAL_INDEX = {meal: i for i, meal in enumerate(MEALS)}
+SLOTS_PER_DAY = len(MEALS)
+
+# Population count per byte (np.bitwise_count needs NumPy >= 2.0)
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _POPCOUNT_TABLE[values]
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+class AttendanceMatrix:
+    """
+    Attendance as two packed bit planes of shape students x (days * 3 meals):
+      recorded - a daily_attendance row exists
+      present  - that row has is_present = 1
+    Bit j of a student's row is slot j = day * 3 + meal (MSB first, as in
+    np.unpackbits). 10,000 students x 5 years is ~7 MB per plane, and
+    every query is a handful of vectorized AND / popcount passes.
+    """
+
+    def __init__(self, origin, days, student_ids=()):
+        self.origin = _as_date(origin)
+        self.days = int(days)
+        self.student_ids = np.asarray(sorted(set(student_ids)), dtype=np.int64)
+        width = self._row_bytes(self.days)
+        self.present = np.zeros((len(self.student_ids), width), dtype=np.uint8)
+        self.recorded = np.zeros((len(self.student_ids), width), dtype=np.uint8)
+        # Highest attendance_id known to be folded in (None = unknown)
+        self.watermark = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row_bytes(days):
+        return (days * SLOTS_PER_DAY + 7) // 8
+
+    # ---------- indexing ----------
+
+    def _day_numbers(self, dates):
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+        return (dates - np.datetime64(self.origin, 'D')).astype(np.int64)
+
+    def _rows(self, student_ids):
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+        rows = np.searchsorted(self.student_ids, student_ids)
+        rows = np.minimum(rows, max(len(self.student_ids) - 1, 0))
+        if len(self.student_ids) == 0 or not np.array_equal(self.student_ids[rows], student_ids):
+            raise KeyError("Unknown student_id(s); call ensure() first")
+        return rows
+
+    def ensure(self, student_ids=(), last_date=None, first_date=None):
+        """
+        Grow the planes to cover new students and/or dates outside the current range
+        (dates before origin move it back by whole multiples of 8 days, so the
+        existing bytes shift without re-packing)
+        """
+        new_ids = np.setdiff1d(np.asarray(student_ids, dtype=np.int64), self.student_ids)
+        shift = 0
+        if first_date is not None and _as_date(first_date) < self.origin:
+            shift = -(-(self.origin - _as_date(first_date)).days // 8) * 8
+        days = self.days + shift
+        if last_date is not None:
+            days = max(days, (_as_date(last_date) - self.origin).days + shift + 1)
+        if len(new_ids) == 0 and days == self.days:
+            return self
+
+        ids = np.union1d(self.student_ids, new_ids)
+        old_rows = np.searchsorted(ids, self.student_ids)
+        offset = shift * SLOTS_PER_DAY // 8
+        old_width = self.present.shape[1]
+        planes = []
+        for plane in (self.present, self.recorded):
+            grown = np.zeros((len(ids), self._row_bytes(days)), dtype=np.uint8)
+            grown[old_rows, offset:offset + old_width] = plane
+            planes.append(grown)
+        self.present, self.recorded = planes
+        self.student_ids = ids
+        self.origin -= timedelta(days=shift)
+        self.days = days
+        return self
+
+    def _set_bits(self, plane, rows, slots, on=True):
+        byte = slots >> 3
+        mask = (np.uint8(0x80) >> (slots & 7).astype(np.uint8)).astype(np.uint8)
+        if on:
+            # OR together every mask that lands in the same byte, then apply once
+            flat = rows * plane.shape[1] + byte
+            order = np.argsort(flat, kind='stable')
+            flat, mask = flat[order], mask[order]
+            starts = np.flatnonzero(np.r_[True, flat[1:] != flat[:-1]])
+            plane.reshape(-1)[flat[starts]] |= np.bitwise_or.reduceat(mask, starts)
+        else:
+            np.bitwise_and.at(plane, (rows, byte), ~mask)
+
+    # ---------- loading and sync ----------
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build from rows with date, meal_type, student_id, is_present
+        """
+        day_numbers = pd.to_datetime(df['date']).to_numpy(dtype='datetime64[D]')
+        origin = day_numbers.min().astype(date)
+        days = int((day_numbers.max() - day_numbers.min()).astype(np.int64)) + 1
+        matrix = cls(origin, days, np.unique(df['student_id'].to_numpy(dtype=np.int64)))
+        matrix.add_rows(df)
+        return matrix
+
+    def add_rows(self, df):
+        """
+        Fold attendance rows into the planes (growing them as needed)
+        """
+        if len(df) == 0:
+            return self
+        with self._lock:
+            dates = pd.to_datetime(df['date'])
+            self.ensure(df['student_id'].unique(), dates.max(), dates.min())
+            rows = self._rows(df['student_id'].to_numpy(dtype=np.int64))
+            meals = df['meal_type'].map(MEAL_INDEX).to_numpy(dtype=np.int64)
+            slots = self._day_numbers(df['date']) * SLOTS_PER_DAY + meals
+            present = df['is_present'].to_numpy(dtype=np.int64) == 1
+            self._set_bits(self.recorded, rows, slots)
+            self._set_bits(self.present, rows[present], slots[present])
+            if (~present).any():
+                self._set_bits(self.present, rows[~present], slots[~present], on=False)
+        return self
+
+    def on_change(self, change):
+        """
+        Attendance write-path subscriber (see core/attendance_events.py)
+        """
+        day = _as_date(change.date)
+        if change.meal_type not in MEAL_INDEX:
+            return
+        with self._lock:
+            self.ensure([change.student_id], day, day)
+            rows = self._rows([change.student_id])
+            slots = np.array([(day - self.origin).days * SLOTS_PER_DAY + MEAL_INDEX[change.meal_type]])
+            if change.op == 'delete':
+                self._set_bits(self.recorded, rows, slots, on=False)
+                self._set_bits(self.present, rows, slots, on=False)
+            else:
+                self._set_bits(self.recorded, rows, slots)
+                self._set_bits(self.present, rows, slots, on=bool(change.is_present))
+
+    def catch_up(self, batch_size=5000):
+        """
+        Fold in rows inserted after the watermark (attendance_id), e.g. while
+        the matrix was on disk. Inserts only, like the change feed's poll source.
+        Returns number of rows added, None on failure
+        """
+        from mysql.connector import Error
+        from core.db_connection import create_connection, close_connection
+        from core.change_feed import CHANGES_AFTER
+
+        if self.watermark is None:
+            print("Attendance matrix has no watermark; rebuild it to catch up")
+            return None
+        connection = create_connection(read_only=True)
+        if not connection:
+            return None
+
+        added = 0
+        try:
+            cursor = connection.cursor()
+            while True:
+                cursor.execute(CHANGES_AFTER, (self.watermark, batch_size))
+                rows = cursor.fetchall()
+                if rows:
+                    self.add_rows(pd.DataFrame(rows, columns=['attendance_id', 'student_id', 'date',
+                                                              'meal_type', 'is_present']))
+                    self.watermark = int(rows[-1][0])
+                    added += len(rows)
+                if len(rows) < batch_size:
+                    return added
+        except Error as e:
+            print(f"Error catching up attendance matrix: {e}")
+            return None
+        finally:
+            cursor.close()
+            close_connection(connection)
+
+    # ---------- persistence ----------
+
+    def save(self, directory=matrix_dir):
+        """
+        Write planes as .npy files (memory-mappable) plus metadata
+        Files are replaced, not rewritten, so a matrix mapped from them stays valid
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            for name, array in (('present', self.present), ('recorded', self.recorded),
+                                ('student_ids', self.student_ids)):
+                path = os.path.join(directory, f'{name}.npy')
+                with open(path + '.tmp', 'wb') as file:
+                    np.save(file, array)
+                os.replace(path + '.tmp', path)
+            path = os.path.join(directory, 'meta.json')
+            with open(path + '.tmp', 'w') as file:
+                json.dump({'origin': self.origin.isoformat(), 'days': self.days, 'meals': MEALS,
+                           'watermark': self.watermark}, file)
+            os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, directory=matrix_dir, mmap_mode='c'):
+        """
+        Open a saved matrix; planes are memory-mapped, so restart costs
+        nothing until pages are touched ('c' = copy-on-write, 'r+' = write through)
+        """
+        with open(os.path.join(directory, 'meta.json')) as file:
+            meta = json.load(file)
+        if meta['meals'] != MEALS:
+            raise ValueError(f"Matrix meal layout {meta['meals']} does not match {MEALS}")
+        matrix = cls.__new__(cls)
+        matrix.origin = _as_date(meta['origin'])
+        matrix.days = meta['days']
+        matrix.watermark = meta.get('watermark')
+        matrix.student_ids = np.load(os.path.join(directory, 'student_ids.npy'))
+        matrix.present = np.load(os.path.join(directory, 'present.npy'), mmap_mode=mmap_mode)
+        matrix.recorded = np.load(os.path.join(directory, 'recorded.npy'), mmap_mode=mmap_mode)
+        matrix._lock = threading.Lock()
+        return matrix
+
+    # ---------- queries ----------
+
+    def _slot_mask(self, start_date=None, end_date=None, meal_type=None):
+        """
+        Packed byte mask selecting the slots of a date range (and meal)
+        """
+        first = 0 if start_date is None else max((_as_date(start_date) - self.origin).days, 0)
+        last = self.days - 1 if end_date is None else min((_as_date(end_date) - self.origin).days, self.days - 1)
+        bits = np.zeros(self.present.shape[1] * 8, dtype=bool)
+        if last >= first:
+            slots = np.arange(first * SLOTS_PER_DAY, (last + 1) * SLOTS_PER_DAY)
+            if meal_type is not None:
+                slots = slots[slots % SLOTS_PER_DAY == MEAL_INDEX[meal_type]]
+            bits[slots] = True
+        return np.packbits(bits)
+
+    def _count(self, plane, mask):
+        return _popcount(plane & mask).sum(axis=1, dtype=np.int64)
+
+    def student_rates(self, start_date=None, end_date=None, meal_type=None):
+        """
+        Per-student meals recorded, meals present and rate (%) for a range
+        """
+        mask = self._slot_mask(start_date, end_date, meal_type)
+        recorded = self._count(self.recorded, mask)
+        present = self._count(self.present, mask)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(recorded > 0, 100.0 * present / recorded, np.nan)
+        return pd.DataFrame({'student_id': self.student_ids, 'total_meals': recorded,
+                             'attended': present, 'attendance_rate': rate})
+
+    def slot_totals(self, plane=None):
+        """
+        Students per (day, meal) slot as a days x 3 array
+        (one shift-and-sum pass per bit position)
+        """
+        plane = self.present if plane is None else plane
+        counts = np.empty((plane.shape[1], 8), dtype=np.int64)
+        for bit in range(8):
+            counts[:, bit] = ((plane >> (7 - bit)) & 1).sum(axis=0, dtype=np.int64)
+        return counts.reshape(-1)[:self.days * SLOTS_PER_DAY].reshape(self.days, SLOTS_PER_DAY)
+
+    def meal_totals(self, start_date=None, end_date=None):
+        """
+        Present count per meal over a date range
+        """
+        return {meal: int(_popcount(self.present & self._slot_mask(start_date, end_date, meal)).sum(dtype=np.int64))
+                for meal in MEALS}
+
+    def daily_totals(self):
+        """
+        DataFrame of present students per date and meal
+        """
+        totals = self.slot_totals()
+        index = pd.date_range(self.origin, periods=self.days, freq='D')
+        return pd.DataFrame(totals, index=index, columns=MEALS)
+
+    def _day_bits(self, rows, meal_type=None):
+        """
+        Boolean (students x days) presence at the meal, or at any meal
+        """
+        bits = np.unpackbits(self.present[rows], axis=1, count=self.days * SLOTS_PER_DAY)
+        bits = bits.reshape(-1, self.days, SLOTS_PER_DAY)
+        if meal_type:
+            return bits[:, :, MEAL_INDEX[meal_type]].astype(bool)
+        # OR of the meal slices (much faster than any(axis=2) on a size-3 axis)
+        return (bits[:, :, 0] | bits[:, :, 1] | bits[:, :, 2]).astype(bool)
+
+    def streaks(self, meal_type=None, chunk_rows=1024):
+        """
+        Longest and current run of consecutive days present per student
+        """
+        longest = np.zeros(len(self.student_ids), dtype=np.int64)
+        current = np.zeros(len(self.student_ids), dtype=np.int64)
+        for start in range(0, len(self.student_ids), chunk_rows):
+            rows = slice(start, start + chunk_rows)
+            present = self._day_bits(rows, meal_type)
+            if present.shape[1] == 0:
+                continue
+            running = np.cumsum(present, axis=1, dtype=np.int32)
+            # Subtract the running total at the most recent absent day
+            reset = np.maximum.accumulate(np.where(present, 0, running), axis=1)
+            run = running - reset
+            longest[rows] = run.max(axis=1)
+            current[rows] = run[:, -1]
+        return pd.DataFrame({'student_id': self.student_ids,
+                             'longest_streak': longest, 'current_streak': current})
+
+    def co_absence(self, student_id, start_date=None, end_date=None, top=10):
+        """
+        Students most often absent at the same meals as student_id
+        """
+        mask = self._slot_mask(start_date, end_date)
+        absent = self.recorded & ~self.present & mask
+        row = self._rows([student_id])[0]
+        shared = _popcount(absent & absent[row]).sum(axis=1, dtype=np.int64)
+        shared[row] = -1
+        order = np.argsort(-shared, kind='stable')[:top]
+        return pd.DataFrame({'student_id': self.student_ids[order],
+                             'shared_absences': shared[order],
+                             'absences': _popcount(absent[order]).sum(axis=1, dtype=np.int64)})
+
+    def memory_bytes(self):
+        return self.present.nbytes + self.recorded.nbytes + self.student_ids.nbytes
+
+
+def _current_watermark():
+    from mysql.connector import Error
+    from core.db_connection import create_connection, close_connection
+    from core.change_feed import WATERMARK_START
+
+    connection = create_connection(read_only=True)
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor()
+        cursor.execute(WATERMARK_START)
+        return int(cursor.fetchone()[0])
+    except Error as e:
+        print(f"Error reading attendance watermark: {e}")
+        return None
+    finally:
+        cursor.close()
+        close_connection(connection)
+
+
+def load_attendance_matrix(directory=matrix_dir, catch_up=True):
+    """
+    Memory-mapped matrix from disk, or built from daily_attendance on first use
+    A loaded matrix first catches up on rows written since it was saved;
+    subscribe on_change (see core/change_feed.py) to keep it current after that
+    """
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        matrix = AttendanceMatrix.load(directory)
+        if catch_up and matrix.catch_up():
+            matrix.save(directory)
+        return matrix
+
+    from core.data_loader import fetch_attendance_records
+
+    # Read before the rows: anything inserted meanwhile is re-read by catch_up
+    watermark = _current_watermark()
+    df = fetch_attendance_records()
+    if df is None or len(df) == 0:
+        return None
+    matrix = AttendanceMatrix.from_frame(df)
+    matrix.watermark = watermark
+    matrix.save(directory)
+    return matrix
+
+
+def _synthetic_attendance(students, days, seed=0, first_student=1):
+    rng = np.random.default_rng(seed)
+    rate = rng.uniform(0.5, 0.98, students)
+    n = students * days * SLOTS_PER_DAY
+    student = np.repeat(np.arange(first_student, first_student + students), days * SLOTS_PER_DAY)
+    slot = np.tile(np.arange(days * SLOTS_PER_DAY), students)
+    return pd.DataFrame({
+        'date': np.datetime64('2021-01-01') + slot // SLOTS_PER_DAY,
+        'meal_type': pd.Categorical.from_codes(slot % SLOTS_PER_DAY, MEALS),
+        'student_id': student,
+        'is_present': (rng.random(n) < np.repeat(rate, days * SLOTS_PER_DAY)).astype(np.int8),
+    })
+
+
+# Benchmark: 10,000 students x 5 years
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 5 * 365
+
+    print("="*60)
+    print(f"  ATTENDANCE MATRIX BENCHMARK: {students:,} students x {days:,} days")
+    print("="*60)
+
+    # Rows dated before the origin grow the matrix backwards (no wrap into other students)
+    check = AttendanceMatrix('2024-01-10', 2)
+    check.add_rows(pd.DataFrame({'date': ['2024-01-10', '2024-01-11'], 'meal_type': ['Lunch', 'Lunch'],
+                                 'student_id': [1, 1], 'is_present': [1, 0]}))
+    check.add_rows(pd.DataFrame({'date': ['2024-01-06'], 'meal_type': ['Dinner'],
+                                 'student_id': [2], 'is_present': [1]}))
+    rates = check.student_rates().set_index('student_id')
+    assert (rates.loc[1, 'total_meals'], rates.loc[1, 'attended']) == (2, 1)
+    assert (rates.loc[2, 'total_meals'], rates.loc[2, 'attended']) == (1, 1)
+    assert check.daily_totals().loc['2024-01-06', 'Dinner'] == 1
+
+    # Loaded in blocks of students, as the database loader would page it
+    block = 500
+    matrix = AttendanceMatrix('2021-01-01', days)
+    elapsed = 0.0
+    for first in range(1, students + 1, block):
+        rows = _synthetic_attendance(min(block, students + 1 - first), days, seed=first, first_student=first)
+        start = time.perf_counter()
+        matrix.add_rows(rows)
+        elapsed += time.perf_counter() - start
+    print(f"Load {students * days * SLOTS_PER_DAY:,} rows: {elapsed:.2f} s, "
+          f"{matrix.memory_bytes() / 1e6:.1f} MB")
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        fn()
+        print(f"{label:<32} {1000 * (time.perf_counter() - start):8.1f} ms")
+
+    timed("Per-student rates (all time)", matrix.student_rates)
+    timed("Per-student rates (one term)", lambda: matrix.student_rates('2023-01-01', '2023-04-30'))
+    timed("Per-meal totals", matrix.meal_totals)
+    timed("Per-day x meal totals", matrix.daily_totals)
+    timed("Streaks (any meal)", matrix.streaks)
+    timed("Co-absence for one student", lambda: matrix.co_absence(1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        matrix.save(directory)
+        start = time.perf_counter()
+        reopened = AttendanceMatrix.load(directory)
+        print(f"{'Memory-mapped restart':<32} {1000 * (time.perf_counter() - start):8.1f} ms")
+        assert np.array_equal(reopened.student_rates()['attended'], matrix.student_rates()['attended'])
+        del reopened
+    print("="*60)
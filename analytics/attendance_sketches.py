@@ -0,0 +1,338 @@
+import os
+import sys
+import glob
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sketch_dir = os.path.join(project_root, 'data', 'sketches')
+sys.path.insert(0, project_root)
+
+from analytics.sketches import HyperLogLog, KLLSketch
+
+# 2**12 registers per meal and day: 4 KB, ~1.6% error on unique students
+SKETCH_PRECISION = 12
+# 2: HyperLogLogs count every recorded student (1 counted present ones only)
+SKETCH_VERSION = 2
+LOW_ATTENDANCE_THRESHOLD = 75
+
+
+def _day_key(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+class DayPartition:
+    """
+    Mergeable summary of one day of daily_attendance:
+      - per meal: HyperLogLog of recorded students (COUNT(DISTINCT student_id)
+        over all rows, as query_2), record and present counts
+      - per student: meals recorded and meals present that day
+    A day is a few KB no matter how many scans it holds, and any date
+    range is answered by merging its partitions.
+    """
+
+    def __init__(self, day, p=SKETCH_PRECISION):
+        self.day = _day_key(day)
+        self.p = p
+        self.meals = {}
+        self.student_ids = np.empty(0, dtype=np.int64)
+        self.student_meals = np.empty(0, dtype=np.int64)
+        self.student_present = np.empty(0, dtype=np.int64)
+        self.version = SKETCH_VERSION
+        self._pending = []
+
+    def _meal(self, meal_type):
+        if meal_type not in self.meals:
+            self.meals[meal_type] = {'unique': HyperLogLog(self.p), 'records': 0, 'present': 0}
+        return self.meals[meal_type]
+
+    @classmethod
+    def from_frame(cls, day, frame, p=SKETCH_PRECISION):
+        """
+        Build a partition from rows with meal_type, student_id, is_present
+        """
+        partition = cls(day, p)
+        present = frame['is_present'].to_numpy(dtype=np.int64)
+        for meal_type, rows in frame.groupby('meal_type', sort=False).indices.items():
+            meal = partition._meal(meal_type)
+            meal['records'] = len(rows)
+            meal['present'] = int(present[rows].sum())
+            meal['unique'].update(frame['student_id'].to_numpy()[rows])
+        partition._add_students(frame['student_id'].to_numpy(dtype=np.int64), present)
+        return partition
+
+    def _add_students(self, ids, present, meals=None):
+        ids = np.concatenate([self.student_ids, ids])
+        meals = np.concatenate([self.student_meals, np.ones(len(present), dtype=np.int64) if meals is None else meals])
+        present = np.concatenate([self.student_present, present])
+        self.student_ids, inverse = np.unique(ids, return_inverse=True)
+        self.student_meals = np.bincount(inverse, weights=meals).astype(np.int64)
+        self.student_present = np.bincount(inverse, weights=present).astype(np.int64)
+
+    def add(self, meal_type, student_id, is_present):
+        """
+        Fold one new attendance row into the partition
+        """
+        meal = self._meal(meal_type)
+        meal['records'] += 1
+        meal['unique'].update(student_id)
+        if is_present:
+            meal['present'] += 1
+        self._pending.append((student_id, 1 if is_present else 0))
+
+    def flush(self):
+        """
+        Apply per-student updates buffered by add()
+        """
+        if self._pending:
+            pending = np.asarray(self._pending, dtype=np.int64)
+            self._pending = []
+            self._add_students(pending[:, 0], pending[:, 1])
+        return self
+
+    def save(self, directory=sketch_dir):
+        """
+        Write the partition as data/sketches/attendance_<date>.npz
+        """
+        self.flush()
+        os.makedirs(directory, exist_ok=True)
+        meal_types = sorted(self.meals)
+        np.savez_compressed(
+            os.path.join(directory, f'attendance_{self.day}.npz'),
+            precision=np.int64(self.p),
+            version=np.int64(SKETCH_VERSION),
+            meal_types=np.array(meal_types, dtype=str),
+            registers=np.array([self.meals[m]['unique'].registers for m in meal_types],
+                               dtype=np.uint8).reshape(len(meal_types), 1 << self.p),
+            records=np.array([self.meals[m]['records'] for m in meal_types], dtype=np.int64),
+            present=np.array([self.meals[m]['present'] for m in meal_types], dtype=np.int64),
+            student_ids=self.student_ids,
+            student_meals=self.student_meals,
+            student_present=self.student_present,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a partition written by save()
+        """
+        with np.load(path, allow_pickle=False) as data:
+            day = os.path.basename(path)[len('attendance_'):-len('.npz')]
+            partition = cls(day, int(data['precision']))
+            partition.version = int(data['version']) if 'version' in data.files else 1
+            for i, meal_type in enumerate(data['meal_types']):
+                meal = partition._meal(str(meal_type))
+                meal['unique'].registers = data['registers'][i].copy()
+                meal['records'] = int(data['records'][i])
+                meal['present'] = int(data['present'][i])
+            partition.student_ids = data['student_ids']
+            partition.student_meals = data['student_meals']
+            partition.student_present = data['student_present']
+        return partition
+
+
+class RangeSummary:
+    """
+    Merged partitions for a date range, answering the per-student
+    analytics queries (meal-wise uniques, above-average, low attendance)
+    """
+
+    def __init__(self, partitions, p=SKETCH_PRECISION):
+        self.days = len(partitions)
+        self.meals = {}
+        for partition in partitions:
+            for meal_type, stats in partition.meals.items():
+                merged = self.meals.setdefault(meal_type, {'unique': HyperLogLog(p), 'records': 0, 'present': 0})
+                merged['unique'].merge(stats['unique'])
+                merged['records'] += stats['records']
+                merged['present'] += stats['present']
+
+        ids = np.concatenate([np.empty(0, dtype=np.int64)] + [part.flush().student_ids for part in partitions])
+        self.student_ids, inverse = np.unique(ids, return_inverse=True)
+        self.student_meals = np.bincount(inverse, weights=np.concatenate(
+            [np.empty(0)] + [part.student_meals for part in partitions]), minlength=len(self.student_ids)).astype(np.int64)
+        self.student_present = np.bincount(inverse, weights=np.concatenate(
+            [np.empty(0)] + [part.student_present for part in partitions]), minlength=len(self.student_ids)).astype(np.int64)
+
+    def meal_wise_attendance(self):
+        """
+        Same columns as query_2_meal_wise_attendance (unique_students is approximate)
+        """
+        rows = []
+        for meal_type, stats in self.meals.items():
+            rows.append({
+                'meal_type': meal_type,
+                'unique_students': stats['unique'].count(),
+                'total_records': stats['records'],
+                'total_present': stats['present'],
+                'attendance_percentage': 100.0 * stats['present'] / stats['records'] if stats['records'] else 0.0,
+            })
+        return sorted(rows, key=lambda row: row['total_present'], reverse=True)
+
+    def students_above_average(self):
+        """
+        Students whose present count exceeds the average over students
+        with at least one present meal (query_3 semantics)
+        """
+        attended = self.student_present > 0
+        if not attended.any():
+            return pd.DataFrame(columns=['student_id', 'total_attendance'])
+        average = self.student_present[attended].mean()
+        above = self.student_present > average
+        result = pd.DataFrame({'student_id': self.student_ids[above],
+                               'total_attendance': self.student_present[above]})
+        return result.sort_values('total_attendance', ascending=False, ignore_index=True)
+
+    def low_attendance_students(self, threshold=LOW_ATTENDANCE_THRESHOLD):
+        """
+        Students whose attendance rate is below threshold percent (query_6 semantics)
+        """
+        rate = 100.0 * self.student_present / np.maximum(self.student_meals, 1)
+        low = rate < threshold
+        result = pd.DataFrame({'student_id': self.student_ids[low],
+                               'total_meals': self.student_meals[low],
+                               'attended': self.student_present[low],
+                               'attendance_rate': rate[low]})
+        return result.sort_values('attendance_rate', ignore_index=True)
+
+    def attendance_rate_sketch(self, k=200):
+        """
+        KLL sketch of per-student attendance rates in this range;
+        small enough to ship and merge across halls or shards
+        """
+        sketch = KLLSketch(k=k, seed=0)
+        sketch.update(100.0 * self.student_present / np.maximum(self.student_meals, 1))
+        return sketch
+
+
+class AttendanceSketchStore:
+    """
+    Directory of per-day partitions with an in-memory cache.
+    Partitions are built in bulk from attendance rows and kept current
+    by subscribing on_change to the attendance write path.
+    """
+
+    def __init__(self, directory=sketch_dir, p=SKETCH_PRECISION):
+        self.directory = directory
+        self.p = p
+        self.partitions = {}
+        self.dirty = set()
+        # Days touched by updates/deletes; HyperLogLog cannot remove a
+        # student, so those days are rebuilt from the database
+        self.stale_days = set()
+
+    def build_from_frame(self, df):
+        """
+        (Re)build partitions from rows with date, meal_type, student_id, is_present
+        """
+        days = df['date'].map(_day_key) if df['date'].dtype == object else df['date'].dt.strftime('%Y-%m-%d')
+        for day, rows in df.groupby(days.to_numpy(), sort=True):
+            self.partitions[day] = DayPartition.from_frame(day, rows, self.p)
+            self.dirty.add(day)
+            self.stale_days.discard(day)
+        return self
+
+    def on_change(self, change):
+        """
+        Attendance write-path subscriber (see core/attendance_events.py)
+        """
+        day = _day_key(change.date)
+        if change.op != 'insert':
+            self.stale_days.add(day)
+            return
+        partition = self.partition(day) or self.partitions.setdefault(day, DayPartition(day, self.p))
+        partition.add(change.meal_type, change.student_id, change.is_present)
+        self.dirty.add(day)
+
+    def refresh_stale(self, fetch):
+        """
+        Rebuild stale days with fetch(start_date, end_date) -> attendance rows
+        """
+        for day in sorted(self.stale_days):
+            df = fetch(day, day)
+            if df is not None:
+                self.build_from_frame(df)
+        return self
+
+    def partition(self, day):
+        day = _day_key(day)
+        if day not in self.partitions:
+            path = os.path.join(self.directory, f'attendance_{day}.npz')
+            if os.path.exists(path):
+                self.partitions[day] = DayPartition.load(path)
+                if self.partitions[day].version < SKETCH_VERSION:
+                    # Older sketch layout: rebuilt by the next refresh_stale
+                    self.stale_days.add(day)
+        return self.partitions.get(day)
+
+    def days(self):
+        """
+        All partition dates, on disk or in memory
+        """
+        on_disk = {os.path.basename(path)[len('attendance_'):-len('.npz')]
+                   for path in glob.glob(os.path.join(self.directory, 'attendance_*.npz'))}
+        return sorted(on_disk | set(self.partitions))
+
+    def save(self):
+        """
+        Persist partitions changed since the last save
+        """
+        for day in sorted(self.dirty):
+            self.partitions[day].save(self.directory)
+        self.dirty.clear()
+
+    def summary(self, start_date=None, end_date=None):
+        """
+        Merge the partitions of [start_date, end_date] (inclusive, open-ended if None)
+        """
+        start = _day_key(start_date) if start_date else None
+        end = _day_key(end_date) if end_date else None
+        selected = [day for day in self.days()
+                    if (start is None or day >= start) and (end is None or day <= end)]
+        return RangeSummary([self.partition(day) for day in selected], self.p)
+
+
+def build_sketch_store(start_date=None, end_date=None, directory=sketch_dir):
+    """
+    Build and save partitions from daily_attendance
+    """
+    from core.data_loader import fetch_attendance_records
+
+    df = fetch_attendance_records(start_date, end_date)
+    if df is None:
+        return None
+    store = AttendanceSketchStore(directory).build_from_frame(df)
+    store.save()
+    print(f"Saved {len(store.partitions)} day partitions to {directory}")
+    return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-day attendance sketches")
+    parser.add_argument('--build', action='store_true', help="rebuild partitions from the database")
+    parser.add_argument('--start', help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    store = build_sketch_store(args.start, args.end) if args.build else AttendanceSketchStore()
+    if store is None:
+        sys.exit(1)
+
+    summary = store.summary(args.start, args.end)
+    print(f"\n📅 {summary.days} day partitions merged")
+    print("\n🍽️  Meal-wise attendance (approximate unique students):")
+    for row in summary.meal_wise_attendance():
+        print(f"   {row['meal_type']}: Students ~{row['unique_students']}, "
+              f"Total Present: {row['total_present']}, "
+              f"Attendance %: {row['attendance_percentage']:.2f}%")
+    print(f"\n📈 Students above average: {len(summary.students_above_average())}")
+    print(f"⚠️  Students below {LOW_ATTENDANCE_THRESHOLD}%: {len(summary.low_attendance_students())}")
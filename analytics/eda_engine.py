@@ -0,0 +1,333 @@
+import os
+import sys
+import json
+import html
+import numpy as np
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from analytics.sketches import HyperLogLog, KLLSketch
+
+TARGET_COLUMN = 'actual_attended'
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Partial (date, meal_type) aggregates are merged once this many are pending
+MAX_PENDING_PARTIALS = 8
+
+
+class EDAAccumulator:
+    """
+    Streaming EDA over attendance chunks with mergeable state.
+    Each chunk costs one factorize of date and meal_type (bincount sums per
+    (date, meal_type) cell; the uniques also feed the distinct-count
+    sketches), NaN-masked per-column sums for count/mean/std, one
+    Gram-matrix product over complete rows for the correlation, and bulk
+    sketch updates. Every other grouping (meal, day, weekend, date) is
+    rolled up from the small (date, meal_type) table at the end.
+    """
+
+    def __init__(self, target=TARGET_COLUMN, quantile_k=400):
+        self.target = target
+        self.rows = 0
+        self.dtypes = None
+        self.numeric_columns = None
+        # Per numeric column over its non-missing values
+        self.column_count = None
+        self.column_total = None
+        self.column_total_sq = None
+        # Over rows with every numeric column present (covariance only)
+        self.gram = None
+        self.numeric_min = None
+        self.numeric_max = None
+        self.missing = None
+        self.unique = {}
+        self.quantiles = KLLSketch(k=quantile_k, seed=0)
+        self._partials = []
+        self._cells = None
+
+    def update(self, chunk):
+        """
+        Fold one DataFrame chunk into the running statistics
+        """
+        if len(chunk) == 0:
+            return self
+        if self.dtypes is None:
+            self.dtypes = {col: str(dtype) for col, dtype in chunk.dtypes.items()}
+            self.numeric_columns = list(chunk.select_dtypes(include='number').columns)
+            self.missing = pd.Series(0, index=chunk.columns, dtype=np.int64)
+            self.unique = {col: HyperLogLog() for col in chunk.columns}
+        self.rows += len(chunk)
+
+        # Pass 1: missing values + distinct-count sketches (only each
+        # chunk's distinct values are hashed into the sketch; the grouping
+        # keys are factorized once, for the sketch and for pass 3)
+        self.missing = self.missing.add(chunk.isna().sum(), fill_value=0).astype(np.int64)
+        keys = {col: pd.factorize(chunk[col]) for col in ('date', 'meal_type')}
+        for col in chunk.columns:
+            self.unique[col].update(keys[col][1] if col in keys else pd.unique(chunk[col].dropna()))
+
+        # Pass 2: numeric block -> per-column sums, Gram matrix, min and max
+        values = chunk[self.numeric_columns].to_numpy(dtype=np.float64)
+        observed = ~np.isnan(values)
+        complete_rows = observed.all(axis=1)
+        complete = values if complete_rows.all() else values[complete_rows]
+        design = np.column_stack([np.ones(len(complete)), complete])
+        gram = design.T @ design
+        if len(complete) == len(values):
+            # No missing values: the column sums are in the Gram matrix already
+            count, total, total_sq = np.full(len(self.numeric_columns), len(values)), gram[0, 1:], np.diag(gram)[1:]
+        else:
+            filled = np.where(observed, values, 0.0)
+            count, total, total_sq = observed.sum(axis=0), filled.sum(axis=0), (filled * filled).sum(axis=0)
+        if self.gram is None:
+            self.gram, self.column_count, self.column_total, self.column_total_sq = gram, count, total, total_sq
+        else:
+            self.gram = self.gram + gram
+            self.column_count = self.column_count + count
+            self.column_total = self.column_total + total
+            self.column_total_sq = self.column_total_sq + total_sq
+        chunk_min = np.nanmin(values, axis=0)
+        chunk_max = np.nanmax(values, axis=0)
+        self.numeric_min = chunk_min if self.numeric_min is None else np.fmin(self.numeric_min, chunk_min)
+        self.numeric_max = chunk_max if self.numeric_max is None else np.fmax(self.numeric_max, chunk_max)
+
+        # Pass 3: bincount sums per (date, meal_type) cell for every grouped
+        # statistic; dates are parsed later on the small cell table, not per row
+        target = chunk[self.target].to_numpy(dtype=np.float64)
+        (date_codes, dates), (meal_codes, meals) = keys['date'], keys['meal_type']
+        keyed = (date_codes >= 0) & (meal_codes >= 0)
+        valid = keyed & ~np.isnan(target)
+        cell = date_codes * len(meals) + meal_codes
+        size = len(dates) * len(meals)
+        value = np.where(valid, target, 0.0)
+        cell_rows = np.bincount(cell[keyed], minlength=size)
+        used = np.flatnonzero(cell_rows)
+        cells = pd.DataFrame({
+            'count': np.bincount(cell, weights=valid, minlength=size)[used].astype(np.int64),
+            'total': np.bincount(cell, weights=value, minlength=size)[used],
+            'total_sq': np.bincount(cell, weights=value * value, minlength=size)[used],
+        }, index=pd.MultiIndex.from_arrays([np.asarray(dates)[used // len(meals)],
+                                            np.asarray(meals)[used % len(meals)]],
+                                           names=['date', 'meal_type']))
+        self._partials.append(cells)
+        if len(self._partials) >= MAX_PENDING_PARTIALS:
+            self._merge_partials()
+
+        self.quantiles.update(target)
+        return self
+
+    def _merge_partials(self):
+        pieces = self._partials + ([self._cells] if self._cells is not None else [])
+        self._partials = []
+        if not pieces:
+            return
+        self._cells = pd.concat(pieces).groupby(level=[0, 1], sort=False).agg(
+            {'count': 'sum', 'total': 'sum', 'total_sq': 'sum'}
+        )
+
+    def merge(self, other):
+        """
+        Merge another accumulator (e.g. from another process or partition)
+        """
+        if other.dtypes is None:
+            return self
+        if self.dtypes is None:
+            self.__dict__.update({k: v for k, v in other.__dict__.items()})
+            return self
+        self.rows += other.rows
+        self.gram = self.gram + other.gram
+        self.column_count = self.column_count + other.column_count
+        self.column_total = self.column_total + other.column_total
+        self.column_total_sq = self.column_total_sq + other.column_total_sq
+        self.numeric_min = np.fmin(self.numeric_min, other.numeric_min)
+        self.numeric_max = np.fmax(self.numeric_max, other.numeric_max)
+        self.missing = self.missing.add(other.missing, fill_value=0).astype(np.int64)
+        for col, sketch in other.unique.items():
+            self.unique.setdefault(col, HyperLogLog()).merge(sketch)
+        self.quantiles.merge(other.quantiles)
+        self._partials.extend(other._partials + ([other._cells] if other._cells is not None else []))
+        self._merge_partials()
+        return self
+
+    def report(self):
+        """
+        Finalize the statistics into an EDAReport
+        """
+        self._merge_partials()
+        return EDAReport(build_report_sections(self))
+
+
+def _rollup(cells, keys):
+    """
+    Mean/std/count per group from (count, total, total_sq) cell aggregates
+    """
+    grouped = cells.groupby(keys, sort=True)[['count', 'total', 'total_sq']].sum()
+    mean = grouped['total'] / grouped['count']
+    variance = (grouped['total_sq'] - grouped['total'] ** 2 / grouped['count']) / (grouped['count'] - 1)
+    return pd.DataFrame({
+        'count': grouped['count'].astype(np.int64),
+        'mean': mean,
+        'std': np.sqrt(variance.clip(lower=0))
+    })
+
+
+def _series_to_dict(series, digits=4):
+    # Plain lists: iterating a string index element by element is slow
+    values = np.round(series.to_numpy(dtype=np.float64), digits).tolist()
+    return dict(zip(series.index.astype(str).tolist(), (None if v != v else v for v in values)))
+
+
+def build_report_sections(acc):
+    """
+    Turn accumulator state into plain report sections (dicts and lists)
+    """
+    columns = acc.numeric_columns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Each column over its own non-missing values (as pandas describe)
+        n = acc.column_count
+        means = acc.column_total / n
+        std = np.sqrt(np.clip((acc.column_total_sq - acc.column_total ** 2 / n) / (n - 1), 0, None))
+        # Correlation over complete rows only
+        complete = acc.gram[0, 0]
+        sums = acc.gram[0, 1:]
+        covariance = (acc.gram[1:, 1:] - np.outer(sums, sums) / complete) / (complete - 1)
+        complete_std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        correlation = covariance / np.outer(complete_std, complete_std)
+
+    t = columns.index(acc.target)
+    q1, median, q3 = (float(v) for v in acc.quantiles.quantile([0.25, 0.5, 0.75]))
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    below = acc.quantiles.rank(lower, inclusive=False)
+    above = 1.0 - acc.quantiles.rank(upper, inclusive=True)
+
+    cells = acc._cells.reset_index()
+    cells['date'] = pd.to_datetime(cells['date'])
+    cells = cells.groupby(['date', 'meal_type'], sort=False, as_index=False).agg(
+        {'count': 'sum', 'total': 'sum', 'total_sq': 'sum'}
+    )
+    cells['day_of_week'] = cells['date'].dt.day_name()
+    cells['is_weekend'] = (cells['date'].dt.dayofweek >= 5).astype(int)
+    meal = _rollup(cells, 'meal_type')
+    day = _rollup(cells, 'day_of_week')
+    day = day.reindex([d for d in DAY_ORDER if d in day.index])
+    weekend = _rollup(cells, 'is_weekend')
+    daily = _rollup(cells, 'date')
+    daily.index = daily.index.strftime('%Y-%m-%d')
+
+    return {
+        'overview': {
+            'rows': int(acc.rows),
+            'columns': list(acc.dtypes),
+            'dtypes': acc.dtypes,
+        },
+        'key_statistics': {
+            'total_records': int(acc.rows),
+            'mean': round(float(means[t]), 4),
+            'max': float(acc.numeric_max[t]),
+            'min': float(acc.numeric_min[t]),
+            'std': round(float(std[t]), 4),
+        },
+        'meal_wise_average': _series_to_dict(meal['mean']),
+        'day_wise_average': _series_to_dict(day['mean']),
+        'weekend_vs_weekday': {
+            'weekday': _series_to_dict(weekend['mean']).get('0'),
+            'weekend': _series_to_dict(weekend['mean']).get('1'),
+        },
+        'daily_variability': {
+            'mean': _series_to_dict(daily['mean']),
+            'std': _series_to_dict(daily['std']),
+        },
+        'missing_values': {str(k): int(v) for k, v in acc.missing.items()},
+        'unique_values_approx': {col: sketch.count() for col, sketch in acc.unique.items()},
+        'distribution': {
+            'count': int(n[t]), 'mean': round(float(means[t]), 4), 'std': round(float(std[t]), 4),
+            'min': float(acc.numeric_min[t]), '25%': q1, '50%': median, '75%': q3,
+            'max': float(acc.numeric_max[t]),
+        },
+        'meal_type_distribution': {str(k): int(v) for k, v in meal['count'].sort_values(ascending=False).items()},
+        'outliers_iqr': {
+            'q1': q1, 'q3': q3, 'iqr': iqr, 'lower_bound': lower, 'upper_bound': upper,
+            'count_approx': int(round((below + above) * acc.quantiles.n)),
+        },
+        'correlation': {
+            col: {other: (None if np.isnan(correlation[i, j]) else round(float(correlation[i, j]), 4))
+                  for j, other in enumerate(columns)}
+            for i, col in enumerate(columns)
+        },
+    }
+
+
+class EDAReport:
+    """
+    Structured EDA result with JSON and HTML writers
+    """
+
+    def __init__(self, sections):
+        self.sections = sections
+
+    def __getitem__(self, name):
+        return self.sections[name]
+
+    def to_dict(self):
+        return self.sections
+
+    def to_json(self, path=None):
+        """
+        Serialize the report as JSON (written to path if given)
+        """
+        text = json.dumps(self.sections, indent=2)
+        if path:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
+
+    def to_html(self, path=None):
+        """
+        Render each section as an HTML table (written to path if given)
+        """
+        parts = ['<html><head><meta charset="utf-8"><title>Attendance EDA Report</title>',
+                 '<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1em}'
+                 'td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}</style></head><body>',
+                 '<h1>Attendance EDA Report</h1>']
+        for name, section in self.sections.items():
+            parts.append(f'<h2>{html.escape(name.replace("_", " ").title())}</h2>')
+            parts.append(_html_table(section))
+        parts.append('</body></html>')
+        text = '\n'.join(parts)
+        if path:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
+
+
+def _html_table(section):
+    if isinstance(section, dict) and section and all(isinstance(v, dict) for v in section.values()):
+        frame = pd.DataFrame(section)
+        return frame.to_html(na_rep='')
+    if isinstance(section, dict):
+        rows = ''.join(f'<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>'
+                       for k, v in section.items())
+        return f'<table>{rows}</table>'
+    return f'<p>{html.escape(str(section))}</p>'
+
+
+def build_report(df, target=TARGET_COLUMN):
+    """
+    EDA report for an in-memory DataFrame
+    """
+    return EDAAccumulator(target=target).update(df).report()
+
+
+def build_report_from_csv(path, chunksize=1_000_000, target=TARGET_COLUMN):
+    """
+    EDA report for a CSV too large for memory, streamed in chunks
+    """
+    acc = EDAAccumulator(target=target)
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        acc.update(chunk)
+    return acc.report()
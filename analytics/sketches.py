@@ -0,0 +1,226 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Mergeable, constant-memory summaries used by the analytics engines.
+# Every sketch supports update(values), merge(other) and a query method,
+# so partial results from chunks, days or processes can be combined.
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty).
+    Memory is O(k) items; rank error is roughly 1.65 / k.
+    Levels are NumPy arrays, so bulk updates are vectorized.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append(np.empty(0))
+                    items = np.sort(items)
+                    # Odd leftovers stay at this level; the rest is halved
+                    # by keeping every other item from a random offset
+                    keep = items[:1] if len(items) % 2 else items[:0]
+                    pairs = items[len(keep):]
+                    promoted = pairs[self._rng.integers(0, 2)::2]
+                    self.levels[h] = keep
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                    break
+
+    def update(self, values):
+        """
+        Add one value or an array of values
+        """
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other):
+        """
+        Merge another KLL sketch into this one
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.float64)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='mergesort')
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) for q in [0, 1]
+        """
+        if self.n == 0:
+            return np.nan
+        items, weights = self._weighted_items()
+        cumulative = np.cumsum(weights) / weights.sum()
+        q = np.asarray(q, dtype=np.float64)
+        positions = np.minimum(np.searchsorted(cumulative, q, side='left'), len(items) - 1)
+        return items[positions] if q.ndim else float(items[positions])
+
+    def rank(self, x, inclusive=True):
+        """
+        Approximate fraction of values <= x (or < x when inclusive=False)
+        """
+        if self.n == 0:
+            return np.nan
+        items, weights = self._weighted_items()
+        side = 'right' if inclusive else 'left'
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        positions = np.searchsorted(items, np.asarray(x, dtype=np.float64), side=side)
+        return cumulative[positions] / cumulative[-1]
+
+    def size(self):
+        """
+        Number of items currently retained
+        """
+        return sum(len(level) for level in self.levels)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with 2**p one-byte registers
+    (p=14: 16 KB, ~0.8% standard error). Values are hashed with
+    pandas' vectorized hash_array, so arrays are added in bulk.
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Add one value or an array of values (numbers or strings)
+        """
+        values = np.atleast_1d(np.asarray(values))
+        if len(values) == 0:
+            return
+        if values.dtype.kind in 'OUS':
+            values = values.astype(object)
+        hashes = pd.util.hash_array(values).astype(np.uint64)
+
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remaining = hashes << np.uint64(self.p)
+
+        # Leading zeros of the remaining bits, computed on 32-bit halves
+        # so the float log2 stays exact
+        hi = (remaining >> np.uint64(32)).astype(np.float64)
+        lo = (remaining & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide='ignore'):
+            lz_hi = 31 - np.floor(np.log2(hi))
+            lz_lo = 63 - np.floor(np.log2(lo))
+        leading_zeros = np.where(hi > 0, lz_hi, np.where(lo > 0, lz_lo, 64 - self.p))
+        rho = np.minimum(leading_zeros, 64 - self.p) + 1
+
+        np.maximum.at(self.registers, index, rho.astype(np.uint8))
+
+    def merge(self, other):
+        """
+        Merge another HyperLogLog (same precision) into this one
+        """
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """
+        Estimated number of distinct values
+        """
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Small-range correction (linear counting)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        """
+        Serialize registers (for storing per-partition sketches)
+        """
+        return bytes([self.p]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Rebuild a sketch from to_bytes() output
+        """
+        sketch = cls(p=data[0])
+        sketch.registers = np.frombuffer(data[1:], dtype=np.uint8).copy()
+        return sketch
+
+
+class RunningMoments:
+    """
+    Count, mean, variance, min and max in O(1) memory
+    (Welford updates; Chan et al. merge for partial results)
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, value):
+        """
+        Add one observation
+        """
+        value = float(value)
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        """
+        Merge another RunningMoments into this one
+        """
+        if other.n == 0:
+            return self
+        total = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / total
+        self.m2 += other.m2 + delta * delta * self.n * other.n / total
+        self.n = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
@@ -1,35 +1,61 @@
 from core.db_connection import create_connection, close_connection
+from core.profiling import instrument_module
 
 print("="*60)
 print("             ADVANCED SQL QUERIES - DATABASE COURSE")
 print("="*60)
 
+def _student_details(cursor):
+    """
+    student_id -> row with name and department (for sketch-mode results)
+    """
+    cursor.execute("SELECT student_id, name, department FROM students")
+    return {row['student_id']: row for row in cursor.fetchall()}
+
 # ==================== COMPLEX JOINS ====================
 
-def query_1_student_attendance_summary():
+QUERY_1_SQL = """
+SELECT 
+    s.student_id,
+    s.name,
+    s.department,
+    COUNT(da.attendance_id) as total_meals_attended,
+    SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) as meals_present,
+    SUM(CASE WHEN da.is_present = 0 THEN 1 ELSE 0 END) as meals_absent
+FROM students s
+INNER JOIN daily_attendance da ON s.student_id = da.student_id
+GROUP BY s.student_id, s.name, s.department
+ORDER BY total_meals_attended DESC
+"""
+
+QUERY_1_ROLLUP_SQL = """
+SELECT 
+    s.student_id,
+    s.name,
+    s.department,
+    r.meals_total as total_meals_attended,
+    r.meals_present as meals_present,
+    r.meals_total - r.meals_present as meals_absent
+FROM student_attendance_rollup r
+INNER JOIN students s ON s.student_id = r.student_id
+WHERE r.meals_total > 0
+ORDER BY r.meals_total DESC
+"""
+
+def query_1_student_attendance_summary(use_rollup=False):
     """
     INNER JOIN + GROUP BY + COUNT
     Purpose: Show each student's total attendance count
+    use_rollup reads student_attendance_rollup (one row per student) instead
+    of joining every attendance row
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     if not connection:
         return None
     
     try:
         cursor = connection.cursor(dictionary=True)
-        query = """
-        SELECT 
-            s.student_id,
-            s.name,
-            s.department,
-            COUNT(da.attendance_id) as total_meals_attended,
-            SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) as meals_present,
-            SUM(CASE WHEN da.is_present = 0 THEN 1 ELSE 0 END) as meals_absent
-        FROM students s
-        INNER JOIN daily_attendance da ON s.student_id = da.student_id
-        GROUP BY s.student_id, s.name, s.department
-        ORDER BY total_meals_attended DESC
-        """
+        query = QUERY_1_ROLLUP_SQL if use_rollup else QUERY_1_SQL
         cursor.execute(query)
         results = cursor.fetchall()
         
@@ -49,28 +75,43 @@ def query_1_student_attendance_summary():
         cursor.close()
         close_connection(connection)
 
-def query_2_meal_wise_attendance():
+QUERY_2_SQL = """
+SELECT 
+    da.meal_type,
+    COUNT(DISTINCT da.student_id) as unique_students,
+    COUNT(da.attendance_id) as total_records,
+    SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) as total_present,
+    AVG(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) * 100 as attendance_percentage
+FROM daily_attendance da
+GROUP BY da.meal_type
+ORDER BY total_present DESC
+"""
+
+def query_2_meal_wise_attendance(sketch_store=None, start_date=None, end_date=None):
     """
     LEFT JOIN + GROUP BY + AGGREGATION
     Purpose: Show meal-wise average attendance with student count
+    With sketch_store (analytics/attendance_sketches.py) the result is merged
+    from per-day sketches for [start_date, end_date] instead of scanning
+    daily_attendance; unique_students is then approximate (~1.6%)
     """
-    connection = create_connection()
+    if sketch_store is not None:
+        results = sketch_store.summary(start_date, end_date).meal_wise_attendance()
+        print("\n🔍 Query 2: Meal-wise Attendance Statistics (merged day sketches)")
+        print("-" * 80)
+        for row in results:
+            print(f"Meal: {row['meal_type']}, Students: ~{row['unique_students']}, "
+                  f"Total Present: {row['total_present']}, "
+                  f"Attendance %: {row['attendance_percentage']:.2f}%")
+        return results
+
+    connection = create_connection(read_only=True)
     if not connection:
         return None
     
     try:
         cursor = connection.cursor(dictionary=True)
-        query = """
-        SELECT 
-            da.meal_type,
-            COUNT(DISTINCT da.student_id) as unique_students,
-            COUNT(da.attendance_id) as total_records,
-            SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) as total_present,
-            AVG(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) * 100 as attendance_percentage
-        FROM daily_attendance da
-        GROUP BY da.meal_type
-        ORDER BY total_present DESC
-        """
+        query = QUERY_2_SQL
         cursor.execute(query)
         results = cursor.fetchall()
         
@@ -92,38 +133,55 @@ def query_2_meal_wise_attendance():
 
 # ==================== SUBQUERIES ====================
 
-def query_3_students_above_average_attendance():
+QUERY_3_SQL = """
+SELECT 
+    s.student_id,
+    s.name,
+    s.department,
+    COUNT(da.attendance_id) as total_attendance
+FROM students s
+INNER JOIN daily_attendance da ON s.student_id = da.student_id
+WHERE da.is_present = 1
+GROUP BY s.student_id, s.name, s.department
+HAVING COUNT(da.attendance_id) > (
+    SELECT AVG(attendance_count)
+    FROM (
+        SELECT COUNT(*) as attendance_count
+        FROM daily_attendance
+        WHERE is_present = 1
+        GROUP BY student_id
+    ) as avg_table
+)
+ORDER BY total_attendance DESC
+"""
+
+def query_3_students_above_average_attendance(sketch_store=None, start_date=None, end_date=None):
     """
     SUBQUERY in WHERE clause
     Purpose: Find students who attended more than average
+    With sketch_store the per-student counts come from merged day partitions
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     if not connection:
         return None
     
     try:
         cursor = connection.cursor(dictionary=True)
-        query = """
-        SELECT 
-            s.student_id,
-            s.name,
-            s.department,
-            COUNT(da.attendance_id) as total_attendance
-        FROM students s
-        INNER JOIN daily_attendance da ON s.student_id = da.student_id
-        WHERE da.is_present = 1
-        GROUP BY s.student_id, s.name, s.department
-        HAVING COUNT(da.attendance_id) > (
-            SELECT AVG(attendance_count)
-            FROM (
-                SELECT COUNT(*) as attendance_count
-                FROM daily_attendance
-                WHERE is_present = 1
-                GROUP BY student_id
-            ) as avg_table
-        )
-        ORDER BY total_attendance DESC
-        """
+        if sketch_store is not None:
+            above = sketch_store.summary(start_date, end_date).students_above_average()
+            students = _student_details(cursor)
+            results = [{'student_id': int(sid), 'name': students.get(sid, {}).get('name'),
+                        'department': students.get(sid, {}).get('department'),
+                        'total_attendance': int(total)}
+                       for sid, total in zip(above['student_id'], above['total_attendance'])]
+            print("\n🔍 Query 3: Students Above Average Attendance (merged day sketches)")
+            print("-" * 80)
+            for row in results:
+                print(f"ID: {row['student_id']}, Name: {row['name']}, "
+                      f"Dept: {row['department']}, Attendance: {row['total_attendance']}")
+            return results
+
+        query = QUERY_3_SQL
         cursor.execute(query)
         results = cursor.fetchall()
         
@@ -142,28 +200,42 @@ def query_3_students_above_average_attendance():
         cursor.close()
         close_connection(connection)
 
-def query_4_department_wise_ranking():
+QUERY_4_SQL = """
+SELECT 
+    s.department,
+    s.name,
+    COUNT(da.attendance_id) as total_attendance
+FROM students s
+INNER JOIN daily_attendance da ON s.student_id = da.student_id
+WHERE da.is_present = 1
+GROUP BY s.student_id, s.department, s.name
+ORDER BY s.department, total_attendance DESC
+"""
+
+QUERY_4_ROLLUP_SQL = """
+SELECT 
+    s.department,
+    s.name,
+    r.meals_present as total_attendance
+FROM student_attendance_rollup r
+INNER JOIN students s ON s.student_id = r.student_id
+WHERE r.meals_present > 0
+ORDER BY s.department, total_attendance DESC
+"""
+
+def query_4_department_wise_ranking(use_rollup=False):
     """
     Simple Department-wise Ranking (Simplified Version)
     Purpose: Rank students by attendance within their department
+    use_rollup ranks on student_attendance_rollup.meals_present
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     if not connection:
         return None
     
     try:
         cursor = connection.cursor(dictionary=True)
-        query = """
-        SELECT 
-            s.department,
-            s.name,
-            COUNT(da.attendance_id) as total_attendance
-        FROM students s
-        INNER JOIN daily_attendance da ON s.student_id = da.student_id
-        WHERE da.is_present = 1
-        GROUP BY s.student_id, s.department, s.name
-        ORDER BY s.department, total_attendance DESC
-        """
+        query = QUERY_4_ROLLUP_SQL if use_rollup else QUERY_4_SQL
         cursor.execute(query)
         results = cursor.fetchall()
         
@@ -195,39 +267,41 @@ def query_4_department_wise_ranking():
 
 # ==================== MULTI-TABLE JOINS ====================
 
+QUERY_5_SQL = """
+SELECT 
+    da.date,
+    DAYNAME(da.date) as day_name,
+    da.meal_type,
+    s.name as student_name,
+    s.department,
+    s.room_no,
+    CASE 
+        WHEN da.is_present = 1 THEN 'Present'
+        ELSE 'Absent'
+    END as status,
+    CASE 
+        WHEN DAYOFWEEK(da.date) IN (1, 7) THEN 'Weekend'
+        ELSE 'Weekday'
+    END as day_type
+FROM daily_attendance da
+INNER JOIN students s ON da.student_id = s.student_id
+WHERE da.date >= '2024-12-25'
+ORDER BY da.date DESC, da.meal_type, s.name
+LIMIT 20
+"""
+
 def query_5_complete_attendance_report():
     """
     3-TABLE JOIN + CASE WHEN + DATE FUNCTIONS
     Purpose: Comprehensive attendance report with all details
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     if not connection:
         return None
     
     try:
         cursor = connection.cursor(dictionary=True)
-        query = """
-        SELECT 
-            da.date,
-            DAYNAME(da.date) as day_name,
-            da.meal_type,
-            s.name as student_name,
-            s.department,
-            s.room_no,
-            CASE 
-                WHEN da.is_present = 1 THEN 'Present'
-                ELSE 'Absent'
-            END as status,
-            CASE 
-                WHEN DAYOFWEEK(da.date) IN (1, 7) THEN 'Weekend'
-                ELSE 'Weekday'
-            END as day_type
-        FROM daily_attendance da
-        INNER JOIN students s ON da.student_id = s.student_id
-        WHERE da.date >= '2024-12-25'
-        ORDER BY da.date DESC, da.meal_type, s.name
-        LIMIT 20
-        """
+        query = QUERY_5_SQL
         cursor.execute(query)
         results = cursor.fetchall()
         
@@ -249,31 +323,72 @@ def query_5_complete_attendance_report():
 
 # ==================== AGGREGATION WITH HAVING ====================
 
-def query_6_low_attendance_students():
+QUERY_6_SQL = """
+SELECT 
+    s.student_id,
+    s.name,
+    s.department,
+    COUNT(da.attendance_id) as total_meals,
+    SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) as attended,
+    (SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) / COUNT(da.attendance_id)) * 100 as attendance_rate
+FROM students s
+LEFT JOIN daily_attendance da ON s.student_id = da.student_id
+GROUP BY s.student_id, s.name, s.department
+HAVING attendance_rate < 75 OR attendance_rate IS NULL
+ORDER BY attendance_rate ASC
+"""
+
+QUERY_6_ROLLUP_SQL = """
+SELECT 
+    s.student_id,
+    s.name,
+    s.department,
+    r.meals_total as total_meals,
+    r.meals_present as attended,
+    r.attendance_rate,
+    r.last_seen
+FROM student_attendance_rollup r
+INNER JOIN students s ON s.student_id = r.student_id
+WHERE r.attendance_rate < 75 OR r.attendance_rate IS NULL
+ORDER BY r.attendance_rate ASC
+"""
+
+def query_6_low_attendance_students(sketch_store=None, start_date=None, end_date=None, use_rollup=False):
     """
     GROUP BY + HAVING + Comparison
     Purpose: Find students with attendance below threshold
+    With sketch_store the rates come from merged day partitions
+    use_rollup is an index range scan on student_attendance_rollup.attendance_rate
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     if not connection:
         return None
     
     try:
         cursor = connection.cursor(dictionary=True)
-        query = """
-        SELECT 
-            s.student_id,
-            s.name,
-            s.department,
-            COUNT(da.attendance_id) as total_meals,
-            SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) as attended,
-            (SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END) / COUNT(da.attendance_id)) * 100 as attendance_rate
-        FROM students s
-        LEFT JOIN daily_attendance da ON s.student_id = da.student_id
-        GROUP BY s.student_id, s.name, s.department
-        HAVING attendance_rate < 75 OR attendance_rate IS NULL
-        ORDER BY attendance_rate ASC
-        """
+        if sketch_store is not None:
+            summary = sketch_store.summary(start_date, end_date)
+            students = _student_details(cursor)
+            low = summary.low_attendance_students()
+            recorded = set(summary.student_ids.tolist())
+            # Students without any attendance row (LEFT JOIN ... IS NULL)
+            results = [{'student_id': sid, 'name': row['name'], 'department': row['department'],
+                        'total_meals': 0, 'attended': None, 'attendance_rate': None}
+                       for sid, row in students.items() if sid not in recorded]
+            results += [{'student_id': int(r.student_id), 'name': students.get(r.student_id, {}).get('name'),
+                         'department': students.get(r.student_id, {}).get('department'),
+                         'total_meals': int(r.total_meals), 'attended': int(r.attended),
+                         'attendance_rate': float(r.attendance_rate)}
+                        for r in low.itertuples(index=False)]
+            print("\n🔍 Query 6: Low Attendance Alert (merged day sketches)")
+            print("-" * 80)
+            for row in results:
+                rate = row['attendance_rate'] if row['attendance_rate'] else 0
+                print(f"{row['name']} ({row['department']}) - "
+                      f"Attendance: {rate:.2f}% ({row['attended']}/{row['total_meals']})")
+            return results
+
+        query = QUERY_6_ROLLUP_SQL if use_rollup else QUERY_6_SQL
         cursor.execute(query)
         results = cursor.fetchall()
         
@@ -295,6 +410,9 @@ def query_6_low_attendance_students():
 
 # ==================== RUN ALL QUERIES ====================
 
+instrument_module(__name__)
+
+
 if __name__ == "__main__":
     print("\nRunning all advanced SQL queries...\n")
     
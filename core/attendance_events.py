@@ -0,0 +1,44 @@
+from collections import namedtuple
+
+# In-process publish/subscribe for attendance writes.
+# The CRUD write path publishes one AttendanceChange per successful write;
+# downstream consumers (anomaly detector, rollups, caches) subscribe to it.
+# core/change_feed.py publishes writes made by other processes the same way.
+
+# was_present: value replaced by an update, when the publisher knows it
+AttendanceChange = namedtuple(
+    'AttendanceChange',
+    ['op', 'attendance_id', 'student_id', 'date', 'meal_type', 'is_present', 'was_present'],
+    defaults=(None,)
+)
+
+_subscribers = []
+
+
+def subscribe(callback):
+    """
+    Register callback(change) to receive every AttendanceChange
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback):
+    """
+    Stop delivering changes to callback
+    """
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def publish(change):
+    """
+    Deliver a change to every subscriber
+    A failing subscriber is reported but never breaks the write path
+    """
+    for callback in list(_subscribers):
+        try:
+            callback(change)
+        except Exception as e:
+            print(f"Attendance subscriber {getattr(callback, '__name__', callback)} failed: {e}")
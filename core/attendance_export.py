@@ -0,0 +1,382 @@
+"""
+Columnar export of attendance history for offline analysis.
+daily_attendance joined with students is written per day to
+data/warehouse/attendance/date=YYYY-MM-DD/part-0.parquet (hive layout).
+Rows are sorted by meal_type, department, student_id and each (meal,
+department) run gets its own row groups, so min/max statistics let readers
+skip most of a day when filtering by meal or department. meal_type, department and hall are
+dictionary-encoded (and come back as pandas categoricals).
+
+The export is incremental: each run writes the days after the last exported
+one (up to yesterday) plus days marked stale by attendance changes.
+Readers (read_attendance_history) never touch MySQL.
+"""
+
+import os
+import sys
+import json
+import shutil
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+warehouse_dir = os.path.join(project_root, 'data', 'warehouse', 'attendance')
+sys.path.insert(0, project_root)
+
+from core.halls import hall_from_room
+from core.schemas import ATTENDANCE_SUMMARY
+from core.profiling import instrument_module
+
+# Upper bound; a row group also ends at every meal and department boundary
+ROW_GROUP_SIZE = 2048
+MANIFEST = '_manifest.json'
+# Days fetched per database round trip during an export
+EXPORT_BATCH_DAYS = 31
+
+EXPORT_SCHEMA = pa.schema([
+    ('attendance_id', pa.int64()),
+    ('student_id', pa.int32()),
+    ('meal_type', pa.dictionary(pa.int8(), pa.string())),
+    ('is_present', pa.int8()),
+    ('recorded_at', pa.timestamp('s')),
+    ('name', pa.string()),
+    ('room_no', pa.string()),
+    ('department', pa.dictionary(pa.int16(), pa.string())),
+    ('hall', pa.dictionary(pa.int16(), pa.string())),
+])
+DICTIONARY_COLUMNS = ['meal_type', 'department', 'hall']
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+EXPORT_QUERY = """
+SELECT
+    da.attendance_id,
+    da.date,
+    da.meal_type,
+    da.student_id,
+    da.is_present,
+    da.recorded_at,
+    s.name,
+    s.room_no,
+    s.department
+FROM daily_attendance da
+INNER JOIN students s ON da.student_id = s.student_id
+WHERE da.date BETWEEN %s AND %s
+ORDER BY da.date, da.attendance_id
+"""
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _partition_dir(directory, day):
+    return os.path.join(directory, f'date={day.isoformat()}')
+
+
+def remove_day_partition(day, directory=warehouse_dir):
+    """
+    Drop a day's partition (its rows were all deleted); readers see either
+    the old partition or none, never a half-removed one
+    """
+    target = _partition_dir(directory, _as_date(day))
+    if not os.path.isdir(target):
+        return
+    # Dot prefix: open_history ignores it if the process dies before rmtree
+    trash = os.path.join(directory, '.' + os.path.basename(target) + '.old')
+    shutil.rmtree(trash, ignore_errors=True)
+    os.replace(target, trash)
+    shutil.rmtree(trash)
+
+
+def write_day_partition(day, frame, directory=warehouse_dir):
+    """
+    Write one day's rows (EXPORT_QUERY columns) as a Parquet partition
+    Replaces the day atomically; returns number of rows written
+    """
+    day = _as_date(day)
+    frame = frame.drop(columns=['date'], errors='ignore').assign(
+        hall=frame['room_no'].map(hall_from_room) if len(frame) else pd.Series(dtype=object))
+    frame = frame.sort_values(['meal_type', 'department', 'student_id'], kind='stable')
+    table = pa.Table.from_pandas(frame, schema=EXPORT_SCHEMA, preserve_index=False)
+
+    target = _partition_dir(directory, day)
+    staging = target + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    # Row groups never span two meals or two departments within a meal, so
+    # meal and department filters skip the other groups exactly.
+    # The columns are dictionary-encoded on disk, but the Arrow schema is not
+    # stored: readers then see plain strings, which pyarrow can prune on
+    # (it ignores statistics of dictionary-typed fields)
+    with pq.ParquetWriter(os.path.join(staging, 'part-0.parquet'), EXPORT_SCHEMA, compression='zstd',
+                          use_dictionary=DICTIONARY_COLUMNS, write_statistics=True,
+                          store_schema=False) as writer:
+        meals = frame['meal_type'].to_numpy()
+        departments = frame['department'].to_numpy()
+        bounds = [0] + [i for i in range(1, len(meals))
+                        if meals[i] != meals[i - 1] or departments[i] != departments[i - 1]] + [len(meals)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            if hi > lo:
+                writer.write_table(table.slice(lo, hi - lo), row_group_size=ROW_GROUP_SIZE)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    return table.num_rows
+
+
+class AttendanceExporter:
+    """
+    Incremental day-by-day export with a manifest of exported days.
+    Subscribe on_change to core/attendance_events.py (or run the change
+    feed) so edits to already exported days are re-exported on the next run.
+    """
+
+    def __init__(self, directory=warehouse_dir):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST)
+        self.manifest = {'days': {}, 'stale': []}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def on_change(self, change):
+        """
+        Attendance event subscriber: mark an exported day for re-export
+        """
+        day = _as_date(change.date).isoformat()
+        if day in self.manifest['days'] and day not in self.manifest['stale']:
+            self.manifest['stale'].append(day)
+
+    def pending_days(self, start_date=None, end_date=None):
+        """
+        Days to export: after the last exported day (or from start_date)
+        through end_date (default yesterday; today is still being written),
+        plus stale days
+        """
+        end = _as_date(end_date) if end_date else date.today() - timedelta(days=1)
+        exported = self.manifest['days']
+        if start_date:
+            start = _as_date(start_date)
+        elif exported:
+            start = _as_date(max(exported)) + timedelta(days=1)
+        else:
+            start = None
+        stale = sorted(_as_date(day) for day in self.manifest['stale'])
+        return start, end, stale
+
+    def _fetch(self, connection, start, end):
+        return pd.read_sql(EXPORT_QUERY, connection, params=(start, end))
+
+    def export_range(self, connection, start, end):
+        """
+        Export [start, end] a batch of days at a time; days without rows
+        are recorded as empty so they are not fetched again
+        """
+        written = 0
+        batch_start = start
+        while batch_start <= end:
+            batch_end = min(batch_start + timedelta(days=EXPORT_BATCH_DAYS - 1), end)
+            df = self._fetch(connection, batch_start, batch_end)
+            days = pd.to_datetime(df['date']).dt.date if len(df) else pd.Series(dtype=object)
+            groups = {day: rows for day, rows in df.groupby(days.to_numpy())} if len(df) else {}
+            day = batch_start
+            while day <= batch_end:
+                rows = groups.get(day)
+                if rows is not None:
+                    written += write_day_partition(day, rows, self.directory)
+                else:
+                    remove_day_partition(day, self.directory)
+                self.manifest['days'][day.isoformat()] = 0 if rows is None else len(rows)
+                day += timedelta(days=1)
+            self.save_manifest()
+            batch_start = batch_end + timedelta(days=1)
+        return written
+
+    def run(self, start_date=None, end_date=None):
+        """
+        Export new and stale days; returns number of rows written
+        """
+        from core.db_connection import create_connection, close_connection
+
+        start, end, stale = self.pending_days(start_date, end_date)
+        connection = create_connection(read_only=True)
+        if not connection:
+            return 0
+        try:
+            if start is None:
+                # First export: from the first attendance day
+                cursor = connection.cursor()
+                cursor.execute("SELECT MIN(date) FROM daily_attendance")
+                start = cursor.fetchone()[0]
+                cursor.close()
+            written = 0
+            if start is not None and start <= end:
+                written += self.export_range(connection, start, end)
+            for day in stale:
+                written += self.export_range(connection, day, day)
+                self.manifest['stale'].remove(day.isoformat())
+            self.save_manifest()
+            print(f"Exported {written} attendance rows to {self.directory}")
+            return written
+        except Exception as e:
+            print(f"Error exporting attendance: {e}")
+            return 0
+        finally:
+            close_connection(connection)
+
+
+# ==================== READING ====================
+
+def _filter_expression(start_date=None, end_date=None, meal_types=None, departments=None, halls=None):
+    conditions = []
+    if start_date:
+        conditions.append(ds.field('date') >= pa.scalar(_as_date(start_date), pa.date32()))
+    if end_date:
+        conditions.append(ds.field('date') <= pa.scalar(_as_date(end_date), pa.date32()))
+    for column, values in (('meal_type', meal_types), ('department', departments), ('hall', halls)):
+        if values:
+            values = [values] if isinstance(values, str) else list(values)
+            # Equality terms (not isin) so row-group min/max statistics prune
+            term = ds.field(column) == values[0]
+            for value in values[1:]:
+                term = term | (ds.field(column) == value)
+            conditions.append(term)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def open_history(directory=warehouse_dir):
+    """
+    pyarrow dataset over the exported partitions
+    """
+    return ds.dataset(directory, format='parquet', partitioning=PARTITIONING,
+                      exclude_invalid_files=True, ignore_prefixes=['_', '.'])
+
+
+def scan_plan(start_date=None, end_date=None, meal_types=None, departments=None, halls=None,
+              directory=warehouse_dir):
+    """
+    (partitions read, row groups read, row groups total) for a filter
+    """
+    dataset = open_history(directory)
+    expression = _filter_expression(start_date, end_date, meal_types, departments, halls)
+    total = sum(fragment.num_row_groups for fragment in dataset.get_fragments())
+    fragments = list(dataset.get_fragments(filter=expression))
+    row_groups = sum(len(fragment.split_by_row_group(expression, schema=dataset.schema)) for fragment in fragments)
+    return len(fragments), row_groups, total
+
+
+def read_attendance_history(start_date=None, end_date=None, meal_types=None, departments=None,
+                            halls=None, columns=None, directory=warehouse_dir):
+    """
+    Exported attendance rows as a DataFrame
+    Date filters skip whole partitions; meal/department filters skip
+    row groups by their statistics before any data is read (hall is
+    filtered row by row)
+    """
+    dataset = open_history(directory)
+    expression = _filter_expression(start_date, end_date, meal_types, departments, halls)
+    table = dataset.to_table(columns=columns, filter=expression)
+    for column in DICTIONARY_COLUMNS:
+        if column in table.column_names:
+            index = table.column_names.index(column)
+            table = table.set_column(index, column, pc.dictionary_encode(table[column]))
+    return table.to_pandas()
+
+
+def attendance_summary(start_date=None, end_date=None, directory=warehouse_dir):
+    """
+    Per (date, meal_type) counts from the export, same contract as
+    data_to_pandas.load_attendance_to_dataframe (core/schemas.ATTENDANCE_SUMMARY)
+    """
+    dataset = open_history(directory)
+    table = dataset.to_table(columns=['date', 'meal_type', 'is_present'],
+                             filter=_filter_expression(start_date, end_date))
+    summary = table.group_by(['date', 'meal_type']).aggregate([('is_present', 'count'), ('is_present', 'sum')])
+    df = summary.to_pandas().rename(columns={'is_present_count': 'students_present',
+                                             'is_present_sum': 'actual_attended'})
+    return ATTENDANCE_SUMMARY.conform(df.sort_values(['date', 'meal_type'], ignore_index=True))
+
+
+def _synthetic_day(day, students, first_id, rng):
+    import numpy as np
+
+    meals = np.repeat(['Breakfast', 'Lunch', 'Dinner'], students)
+    student_ids = np.tile(np.arange(1, students + 1), 3)
+    departments = np.array(['CSE', 'EEE', 'ME', 'CE', 'BBA', 'ARCH'])
+    return pd.DataFrame({
+        'attendance_id': np.arange(first_id, first_id + 3 * students),
+        'date': day,
+        'meal_type': meals,
+        'student_id': student_ids,
+        'is_present': (rng.random(3 * students) < 0.85).astype('int8'),
+        'recorded_at': pd.Timestamp(day),
+        'name': [f'Student {i}' for i in student_ids],
+        'room_no': [f'{1 + i % 4}{i % 300:03d}' for i in student_ids],
+        'department': departments[student_ids % len(departments)],
+    })
+
+
+instrument_module(__name__)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Columnar attendance history export")
+    parser.add_argument('--demo', action='store_true', help="synthetic export + pushdown benchmark (no database)")
+    parser.add_argument('--start', help="first date to (re)export (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last date to export (default yesterday)")
+    args = parser.parse_args()
+
+    if not args.demo:
+        AttendanceExporter().run(args.start, args.end)
+        sys.exit(0)
+
+    import numpy as np
+
+    print("="*60)
+    print("   COLUMNAR EXPORT - 2,000 students x 365 days (synthetic)")
+    print("="*60)
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp()
+    first_day = date(2025, 1, 1)
+    started = time.perf_counter()
+    rows = 0
+    for offset in range(365):
+        day = first_day + timedelta(days=offset)
+        rows += write_day_partition(day, _synthetic_day(day, 2000, rows + 1, rng), directory)
+    print(f"Exported {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    for label, kwargs in [("full history", {}),
+                          ("one month", {'start_date': '2025-03-01', 'end_date': '2025-03-31'}),
+                          ("one month, Lunch, CSE", {'start_date': '2025-03-01', 'end_date': '2025-03-31',
+                                                     'meal_types': ['Lunch'], 'departments': ['CSE']})]:
+        started = time.perf_counter()
+        df = read_attendance_history(directory=directory, **kwargs)
+        elapsed = time.perf_counter() - started
+        partitions, groups, total = scan_plan(directory=directory, **kwargs)
+        print(f"{label:<24} {len(df):>9,} rows  {elapsed * 1000:7.0f} ms  "
+              f"partitions {partitions:>3}  row groups {groups:>4}/{total}")
+    shutil.rmtree(directory)
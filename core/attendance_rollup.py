@@ -0,0 +1,201 @@
+from mysql.connector import Error
+from core.db_connection import create_connection, close_connection
+from core.profiling import instrument_module
+
+# Per-student attendance rollup (one row per student).
+# The CRUD write paths apply deltas in the same transaction as the
+# attendance write; refresh_rollup() rebuilds it idempotently from
+# daily_attendance, so the two can never drift for long.
+
+ROLLUP_TABLE = 'student_attendance_rollup'
+LOW_ATTENDANCE_THRESHOLD = 75
+
+CREATE_ROLLUP_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    student_id INT PRIMARY KEY,
+    meals_total INT NOT NULL DEFAULT 0,
+    meals_present INT NOT NULL DEFAULT 0,
+    last_seen DATE NULL,
+    attendance_rate DECIMAL(6,2) AS (meals_present * 100 / NULLIF(meals_total, 0)) STORED,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_rollup_rate (attendance_rate),
+    INDEX idx_rollup_total (meals_total),
+    INDEX idx_rollup_present (meals_present)
+)
+"""
+
+
+def ensure_rollup_table(cursor):
+    """
+    Create the rollup table if it does not exist
+    """
+    cursor.execute(CREATE_ROLLUP_TABLE)
+
+
+# Built once: the hot write path runs these as cached prepared statements,
+# which are only reused when the very same string object is passed again
+DELTA_UPSERT = f"""
+    INSERT INTO {ROLLUP_TABLE} (student_id, meals_total, meals_present, last_seen)
+    VALUES (%s, %s, %s, IF(%s > 0, %s, NULL))
+    ON DUPLICATE KEY UPDATE
+        meals_total = meals_total + VALUES(meals_total),
+        meals_present = meals_present + VALUES(meals_present),
+        last_seen = IF(VALUES(last_seen) IS NULL, last_seen,
+                       GREATEST(COALESCE(last_seen, VALUES(last_seen)), VALUES(last_seen)))
+    """
+LAST_SEEN_REFRESH = f"""
+    UPDATE {ROLLUP_TABLE}
+    SET last_seen = (SELECT MAX(date) FROM daily_attendance
+                     WHERE student_id = %s AND is_present = 1)
+    WHERE student_id = %s
+    """
+
+
+# MySQL "Table doesn't exist"
+ER_NO_SUCH_TABLE = 1146
+_missing_reported = False
+
+
+def _skip_if_missing(error):
+    """
+    Swallow the error when the rollup table has not been created yet, so
+    attendance writes never depend on it; refresh_rollup() creates the
+    table and rebuilds it from daily_attendance, so skipped deltas are not lost
+    """
+    global _missing_reported
+    if getattr(error, 'errno', None) != ER_NO_SUCH_TABLE:
+        raise error
+    if not _missing_reported:
+        _missing_reported = True
+        print(f"{ROLLUP_TABLE} not found; skipping rollup deltas "
+              "(create it with: python -m core.attendance_rollup)")
+
+
+def apply_attendance_delta(cursor, Student_ID, Date, meals_delta, present_delta):
+    """
+    Add a change to one student's rollup row (call inside the write transaction)
+    meals_delta: +1 insert, -1 delete, 0 update
+    present_delta: change in is_present (-1, 0, +1)
+    No-op if the rollup table does not exist
+    """
+    try:
+        cursor.execute(DELTA_UPSERT, (Student_ID, meals_delta, present_delta, present_delta, Date))
+
+        # A present meal was removed: last_seen may have been that meal
+        if present_delta < 0:
+            cursor.execute(LAST_SEEN_REFRESH, (Student_ID, Student_ID))
+    except Error as e:
+        _skip_if_missing(e)
+
+
+def apply_attendance_deltas(cursor, deltas):
+    """
+    Batch form of apply_attendance_delta
+    deltas: iterable of (Student_ID, Date, meals_delta, present_delta)
+    Deltas are summed per student first: one multi-row upsert, plus one
+    last_seen recomputation for students that lost a present meal
+    """
+    per_student = {}
+    for Student_ID, Date, meals_delta, present_delta in deltas:
+        meals, present, last_seen, removed = per_student.get(Student_ID, (0, 0, None, False))
+        if present_delta > 0 and (last_seen is None or Date > last_seen):
+            last_seen = Date
+        per_student[Student_ID] = (meals + meals_delta, present + present_delta, last_seen,
+                                   removed or present_delta < 0)
+    if not per_student:
+        return
+    try:
+        _apply_student_deltas(cursor, per_student)
+    except Error as e:
+        _skip_if_missing(e)
+
+
+def _apply_student_deltas(cursor, per_student):
+    """
+    per_student: Student_ID -> (meals, present, last_seen, lost a present meal)
+    """
+    cursor.executemany(f"""
+        INSERT INTO {ROLLUP_TABLE} (student_id, meals_total, meals_present, last_seen)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            meals_total = meals_total + VALUES(meals_total),
+            meals_present = meals_present + VALUES(meals_present),
+            last_seen = IF(VALUES(last_seen) IS NULL, last_seen,
+                           GREATEST(COALESCE(last_seen, VALUES(last_seen)), VALUES(last_seen)))
+        """, [(sid, meals, present, last_seen) for sid, (meals, present, last_seen, _) in per_student.items()])
+
+    removed = [sid for sid, (_, _, _, was_removed) in per_student.items() if was_removed]
+    if removed:
+        placeholders = ', '.join(['%s'] * len(removed))
+        cursor.execute(f"""
+            UPDATE {ROLLUP_TABLE} r
+            LEFT JOIN (
+                SELECT student_id, MAX(date) AS last_present
+                FROM daily_attendance
+                WHERE is_present = 1 AND student_id IN ({placeholders})
+                GROUP BY student_id
+            ) m ON m.student_id = r.student_id
+            SET r.last_seen = m.last_present
+            WHERE r.student_id IN ({placeholders})
+            """, removed + removed)
+
+
+def refresh_rollup(cursor=None):
+    """
+    Rebuild every rollup row from daily_attendance (idempotent batch job)
+    Students without attendance get a zero row; rows for deleted students are removed
+    Returns number of students refreshed
+    """
+    connection = None
+    if cursor is None:
+        connection = create_connection()
+        if not connection:
+            return 0
+        cursor = connection.cursor()
+
+    try:
+        ensure_rollup_table(cursor)
+        cursor.execute(f"""
+            INSERT INTO {ROLLUP_TABLE} (student_id, meals_total, meals_present, last_seen)
+            SELECT
+                s.student_id,
+                COUNT(da.attendance_id),
+                COALESCE(SUM(CASE WHEN da.is_present = 1 THEN 1 ELSE 0 END), 0),
+                MAX(CASE WHEN da.is_present = 1 THEN da.date END)
+            FROM students s
+            LEFT JOIN daily_attendance da ON s.student_id = da.student_id
+            GROUP BY s.student_id
+            ON DUPLICATE KEY UPDATE
+                meals_total = VALUES(meals_total),
+                meals_present = VALUES(meals_present),
+                last_seen = VALUES(last_seen)
+            """)
+        cursor.execute(f"""
+            DELETE r FROM {ROLLUP_TABLE} r
+            LEFT JOIN students s ON s.student_id = r.student_id
+            WHERE s.student_id IS NULL
+            """)
+        cursor.execute(f"SELECT COUNT(*) FROM {ROLLUP_TABLE}")
+        refreshed = cursor.fetchone()[0]
+        if connection:
+            connection.commit()
+        print(f"Attendance rollup refreshed for {refreshed} students")
+        return refreshed
+
+    except Error as e:
+        if connection:
+            connection.rollback()
+        print(f"Error refreshing attendance rollup: {e}")
+        return 0
+    finally:
+        if connection:
+            cursor.close()
+            close_connection(connection)
+
+
+instrument_module(__name__)
+
+
+# Run as the batch job (e.g. nightly cron)
+if __name__ == "__main__":
+    refresh_rollup()
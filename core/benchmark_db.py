@@ -0,0 +1,125 @@
+import os
+import io
+import sys
+import time
+import statistics
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+import mysql.connector
+from core import db_connection
+from core.db_connection import _connection_config
+from core.crud_operations import get_student_by_id, insert_attendance, delete_attendance_range
+from core.attendance_rollup import apply_attendance_delta
+
+CALLS = 300
+# Benchmark rows go far in the future and are deleted afterwards
+BENCH_START = date(2099, 1, 1)
+MEALS = ['Breakfast', 'Lunch', 'Dinner']
+
+
+def _per_call_us(fn, calls=CALLS):
+    """
+    Median wall time of one call in microseconds (CRUD prints are silenced)
+    """
+    timings = []
+    with redirect_stdout(io.StringIO()):
+        for i in range(calls):
+            start = time.perf_counter()
+            fn(i)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def _slot(i, offset):
+    return BENCH_START + timedelta(days=offset + i // len(MEALS)), MEALS[i % len(MEALS)]
+
+
+# ---------- previous code path: new connection + text protocol + dict rows ----------
+
+def _legacy_connect():
+    """
+    New connection per call with DB_CONFIG as the baseline passed it
+    (no client flags or use_pure added)
+    """
+    from core.config import DB_CONFIG
+
+    return mysql.connector.connect(**{key: value for key, value in DB_CONFIG.items() if key != 'read_replica'})
+
+
+def legacy_get_student_by_id(Student_ID):
+    connection = _legacy_connect()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM students WHERE Student_ID = %s", (Student_ID,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def legacy_insert_attendance(Student_ID, Date, Meal_Type, Is_Present=1):
+    """
+    Same statements as insert_attendance (row + rollup upsert), text protocol
+    """
+    connection = _legacy_connect()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+        INSERT INTO daily_attendance (Student_ID, Date, Meal_Type, Is_Present)
+        VALUES (%s, %s, %s, %s)
+        """, (Student_ID, Date, Meal_Type, Is_Present))
+        apply_attendance_delta(cursor, Student_ID, Date, 1, 1 if Is_Present else 0)
+        connection.commit()
+        return True
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def run_benchmark(student_id=None, calls=CALLS):
+    with redirect_stdout(io.StringIO()):
+        connection = db_connection.create_connection()
+    if connection is None:
+        print("Database not reachable; configure core/config.py first")
+        return None
+    cursor = connection.cursor()
+    if student_id is None:
+        cursor.execute("SELECT MIN(Student_ID) FROM students")
+        student_id = cursor.fetchone()[0]
+    cursor.close()
+    db_connection.close_connection(connection)
+
+    results = {}
+    try:
+        results['get_student_by_id (before)'] = _per_call_us(lambda i: legacy_get_student_by_id(student_id), calls)
+        results['get_student_by_id (pooled+prepared)'] = _per_call_us(lambda i: get_student_by_id(student_id), calls)
+        results['get_student_by_id (…+raw tuple)'] = _per_call_us(lambda i: get_student_by_id(student_id, raw=True), calls)
+
+        days = calls // len(MEALS) + 1
+        results['insert_attendance (before)'] = _per_call_us(
+            lambda i: legacy_insert_attendance(student_id, *_slot(i, 0)), calls)
+        results['insert_attendance (pooled+prepared)'] = _per_call_us(
+            lambda i: insert_attendance(student_id, *_slot(i, days)), calls)
+    finally:
+        with redirect_stdout(io.StringIO()):
+            delete_attendance_range(BENCH_START, BENCH_START + timedelta(days=3 * days))
+    return results
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("        DB LAYER PER-CALL OVERHEAD (median, µs)")
+    print("="*60)
+    config, pool_size = _connection_config()
+    print(f"use_pure={config.get('use_pure', 'default')}  pool_size={pool_size}  calls={CALLS}")
+    results = run_benchmark()
+    if results:
+        for label, micros in results.items():
+            print(f"{label:<40} {micros:10.1f}")
+    print("="*60)
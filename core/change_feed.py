@@ -0,0 +1,378 @@
+"""
+Change-data-capture feed for daily_attendance.
+Tails new rows and publishes them as AttendanceChange events on
+core/attendance_events.py, so consumers (anomaly detector, sketch store,
+summary caches, ...) do work proportional to the changes instead of
+re-querying the whole table.
+
+Two sources:
+  - 'poll' (default): watermark on attendance_id. Sees inserts only
+    (recorded_at is not touched by updates); ids skipped because their
+    transaction had not committed yet are re-checked for GAP_TIMEOUT_SECONDS.
+  - 'binlog': row events via python-mysql-replication (optional package;
+    needs binlog_format=ROW and the REPLICATION SLAVE privilege). Sees
+    inserts, updates and deletes.
+The position is saved in data/cdc/ so a restart resumes where it stopped.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+state_dir = os.path.join(project_root, 'data', 'cdc')
+sys.path.insert(0, project_root)
+
+from mysql.connector import Error
+from core.db_connection import create_connection, close_connection, PreparedStatements, _connection_config
+from core.attendance_events import AttendanceChange, subscribe, unsubscribe, publish
+from core.schemas import ATTENDANCE_SUMMARY
+from core.profiling import instrument_module
+
+POLL_INTERVAL_SECONDS = 2
+POLL_BATCH = 5000
+# Ids missing below the watermark may belong to transactions still in flight
+GAP_TIMEOUT_SECONDS = 60
+MAX_TRACKED_GAPS = 10000
+# Write-path changes remembered for de-duplication (same process)
+MAX_LOCAL_CHANGES = 100000
+BINLOG_SERVER_ID = 4101
+
+CHANGES_AFTER = """
+    SELECT attendance_id, student_id, date, meal_type, is_present
+    FROM daily_attendance
+    WHERE attendance_id > %s
+    ORDER BY attendance_id
+    LIMIT %s
+    """
+WATERMARK_START = "SELECT COALESCE(MAX(attendance_id), 0) FROM daily_attendance"
+
+
+class AttendanceChangeFeed:
+    """
+    Tail daily_attendance and publish each new change once.
+    Changes this process already published from the CRUD write path are
+    recognised and skipped, so the feed can run next to the writers.
+    """
+
+    def __init__(self, source='poll', name='attendance', batch_size=POLL_BATCH,
+                 directory=state_dir, from_start=False, shard=None):
+        if source not in ('poll', 'binlog'):
+            raise ValueError(f"Unknown change feed source: {source}")
+        self.source = source
+        self.batch_size = batch_size
+        self.shard = shard
+        self.state_path = os.path.join(directory, f'{name}_feed.json')
+        self.state = self._load_state()
+        if from_start and 'attendance_id' not in self.state:
+            self.state['attendance_id'] = 0
+        self.gaps = {}
+        self.local_changes = OrderedDict()
+        self.published = 0
+        # Set only on the thread that is re-publishing feed changes, so
+        # writes on other threads are still recorded meanwhile
+        self._publishing = threading.local()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # ---------- state ----------
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    # ---------- de-duplication with the local write path ----------
+
+    def on_local_change(self, change):
+        """
+        Bus subscriber: remember changes published by this process's writers
+        """
+        if getattr(self._publishing, 'active', False) or change.attendance_id is None:
+            return
+        if self.source == 'poll' and change.op != 'insert':
+            return  # polling never sees updates/deletes
+        key = (change.op, change.attendance_id)
+        with self._lock:
+            self.local_changes[key] = True
+            if len(self.local_changes) > MAX_LOCAL_CHANGES:
+                self.local_changes.popitem(last=False)
+
+    def _emit(self, changes):
+        emitted = 0
+        self._publishing.active = True
+        try:
+            for change in changes:
+                with self._lock:
+                    seen = self.local_changes.pop((change.op, change.attendance_id), None)
+                if seen:
+                    continue
+                publish(change)
+                emitted += 1
+        finally:
+            self._publishing.active = False
+        self.published += emitted
+        return emitted
+
+    def safe_watermark(self):
+        """
+        attendance_id up to which every inserted row has been published
+        (below any id still awaited as a gap); None for the binlog source
+        """
+        if self.source != 'poll' or 'attendance_id' not in self.state:
+            return None
+        watermark = self.state['attendance_id']
+        if self.gaps:
+            watermark = min(watermark, min(self.gaps) - 1)
+        return watermark
+
+    # ---------- polling source ----------
+
+    def _track_gaps(self, watermark, ids, now):
+        expected = watermark + 1
+        for attendance_id in ids:
+            if attendance_id > expected and len(self.gaps) < MAX_TRACKED_GAPS:
+                # Rolled-back inserts and deleted rows leave gaps too; they expire
+                for missing in range(expected, min(attendance_id, expected + MAX_TRACKED_GAPS - len(self.gaps))):
+                    self.gaps[missing] = now
+            expected = attendance_id + 1
+        for missing in [gap for gap, since in self.gaps.items() if now - since > GAP_TIMEOUT_SECONDS]:
+            del self.gaps[missing]
+
+    def _poll(self, connection):
+        cursor = PreparedStatements(connection)
+        try:
+            if 'attendance_id' not in self.state:
+                # First run: start at the current end (consumers bootstrap from a full load)
+                cursor.execute(WATERMARK_START)
+                self.state['attendance_id'] = int(cursor.fetchall()[0][0])
+                return []
+            watermark = self.state['attendance_id']
+            cursor.execute(CHANGES_AFTER, (watermark, self.batch_size))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        late = []
+        if self.gaps:
+            gap_ids = list(self.gaps)
+            plain = connection.cursor()
+            try:
+                plain.execute(
+                    "SELECT attendance_id, student_id, date, meal_type, is_present FROM daily_attendance "
+                    f"WHERE attendance_id IN ({', '.join(['%s'] * len(gap_ids))})", gap_ids)
+                late = plain.fetchall()
+            finally:
+                plain.close()
+            for row in late:
+                self.gaps.pop(row[0], None)
+
+        if rows:
+            self._track_gaps(watermark, [row[0] for row in rows], time.monotonic())
+            self.state['attendance_id'] = int(rows[-1][0])
+        elif self.gaps:
+            self._track_gaps(watermark, [], time.monotonic())
+        return [AttendanceChange('insert', *row) for row in late + rows]
+
+    # ---------- binlog source ----------
+
+    def _binlog_changes(self):
+        try:
+            from pymysqlreplication import BinLogStreamReader
+            from pymysqlreplication.row_event import WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent
+        except ImportError:
+            print("python-mysql-replication is not installed; falling back to polling")
+            self.source = 'poll'
+            return None
+
+        config, _ = _connection_config('primary', self.shard)
+        position = self.state.get('binlog') or [None, None]
+        stream = BinLogStreamReader(
+            connection_settings={'host': config.get('host', 'localhost'), 'port': config.get('port', 3306),
+                                 'user': config['user'], 'passwd': config.get('password', '')},
+            server_id=BINLOG_SERVER_ID,
+            only_schemas=[config['database']],
+            only_tables=['daily_attendance'],
+            only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent],
+            resume_stream=True, log_file=position[0], log_pos=position[1],
+            blocking=False,
+        )
+        changes = []
+        try:
+            for event in stream:
+                for row in event.rows:
+                    if isinstance(event, WriteRowsEvent):
+                        op, values, before = 'insert', row['values'], None
+                    elif isinstance(event, UpdateRowsEvent):
+                        op, values, before = 'update', row['after_values'], row['before_values']['is_present']
+                    else:
+                        op, values, before = 'delete', row['values'], None
+                    changes.append(AttendanceChange(op, values['attendance_id'], values['student_id'],
+                                                    values['date'], values['meal_type'],
+                                                    values['is_present'], before))
+                if len(changes) >= self.batch_size:
+                    break
+            self.state['binlog'] = [stream.log_file, stream.log_pos]
+        finally:
+            stream.close()
+        return changes
+
+    # ---------- driving ----------
+
+    def poll_once(self):
+        """
+        Fetch and publish the next batch of changes
+        Returns number of events published
+        """
+        changes = self._binlog_changes() if self.source == 'binlog' else None
+        if changes is None:
+            connection = create_connection(read_only=True, shard=self.shard)
+            if not connection:
+                return 0
+            try:
+                changes = self._poll(connection)
+            except Error as e:
+                print(f"Change feed poll failed: {e}")
+                return 0
+            finally:
+                close_connection(connection)
+        emitted = self._emit(changes)
+        self.save_state()
+        return emitted
+
+    def catch_up(self):
+        """
+        Poll until no full batch is left
+        """
+        total = 0
+        while True:
+            emitted = self.poll_once()
+            total += emitted
+            if emitted < self.batch_size:
+                return total
+
+    def start(self, interval=POLL_INTERVAL_SECONDS):
+        """
+        Publish changes every `interval` seconds in a background thread
+        """
+        subscribe(self.on_local_change)
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                self.catch_up()
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name='attendance-change-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the background thread and stop watching the local write path
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        unsubscribe(self.on_local_change)
+
+
+class AttendanceSummaryCache:
+    """
+    (date, meal_type) -> students_present, actual_attended, the frame
+    data_to_pandas / the EDA load, kept current from change events.
+    Bootstrap once with the aggregate query, then O(1) per change.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def bootstrap(self, df):
+        """
+        Seed from rows with date, meal_type, students_present, actual_attended
+        """
+        self.counts = {(pd.Timestamp(d).date(), meal): [int(total), int(present)]
+                       for d, meal, total, present in df[['date', 'meal_type', 'students_present',
+                                                          'actual_attended']].itertuples(index=False)}
+        return self
+
+    def on_change(self, change):
+        key = (pd.Timestamp(change.date).date(), change.meal_type)
+        counts = self.counts.setdefault(key, [0, 0])
+        present = 1 if change.is_present else 0
+        if change.op == 'insert':
+            counts[0] += 1
+            counts[1] += present
+        elif change.op == 'delete':
+            counts[0] -= 1
+            counts[1] -= present
+        elif change.was_present is not None:
+            counts[1] += present - (1 if change.was_present else 0)
+
+    def frame(self):
+        rows = [(day, meal, total, present) for (day, meal), (total, present) in sorted(self.counts.items()) if total]
+        return ATTENDANCE_SUMMARY.conform(pd.DataFrame(rows, columns=ATTENDANCE_SUMMARY.names))
+
+
+instrument_module(__name__)
+
+
+# Run the feed with the streaming consumers attached
+if __name__ == "__main__":
+    import argparse
+    from analytics.anomaly_detector import MealAnomalyDetector
+    from analytics.attendance_sketches import AttendanceSketchStore
+    from analytics.attendance_matrix import load_attendance_matrix
+
+    parser = argparse.ArgumentParser(description="Attendance change-data-capture feed")
+    parser.add_argument('--source', choices=['poll', 'binlog'], default='poll')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("        ATTENDANCE CHANGE FEED")
+    print("="*60)
+
+    detector = MealAnomalyDetector()
+    sketches = AttendanceSketchStore()
+    summary = AttendanceSummaryCache()
+    # Caught up to its saved watermark on load, then kept current by the feed
+    matrix = load_attendance_matrix()
+    consumers = [detector.on_change, sketches.on_change, summary.on_change]
+    if matrix is not None:
+        consumers.append(matrix.on_change)
+    for consumer in consumers:
+        subscribe(consumer)
+
+    feed = AttendanceChangeFeed(source=args.source).start(args.interval)
+    print(f"Tailing daily_attendance ({feed.source}); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(10)
+            detector.close_due_windows()
+            sketches.save()
+            if matrix is not None:
+                watermark = feed.safe_watermark()
+                if watermark is not None:
+                    matrix.watermark = max(matrix.watermark or 0, watermark)
+                matrix.save()
+            print(f"   {feed.published} changes published, position {feed.state}")
+    except KeyboardInterrupt:
+        feed.stop()
+        print("\nChange feed stopped")
@@ -1,19 +1,139 @@
 import mysql.connector
 from mysql.connector import Error
-from core.db_connection import create_connection, close_connection
+from core.db_connection import create_connection, close_connection, PreparedStatements, current_shard
+from core.attendance_events import AttendanceChange, publish
+from core.attendance_rollup import apply_attendance_delta, apply_attendance_deltas
+from core.profiling import instrument_module
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from collections import namedtuple
 
 print("="*60)
 print("CRUD OPERATIONS - DATABASE MANAGEMENT")
 print("="*60)
 
+# ==================== UNIT OF WORK ====================
+
+_local = threading.local()
+
+
+class UnitOfWork:
+    """
+    State shared by the CRUD calls inside one unit_of_work() block
+    """
+
+    def __init__(self, connection, shard=None):
+        self.connection = connection
+        self.shard = shard
+        self.failed = False
+        self.errors = []
+        self.changes = []
+
+
+class UnitOfWorkFailed(Error):
+    """
+    Raised when a unit_of_work() block was rolled back because a CRUD call
+    inside it failed; .errors holds the database errors reported
+    """
+
+    def __init__(self, errors):
+        self.errors = [e for e in errors if e is not None]
+        first = self.errors[0] if self.errors else None
+        super().__init__(msg=f"Unit of work rolled back: {getattr(first, 'msg', 'an operation failed')}",
+                         errno=getattr(first, 'errno', None))
+
+
+@contextmanager
+def unit_of_work(shard=None):
+    """
+    Group any CRUD calls on this thread into one transaction:
+
+        with unit_of_work() as uow:
+            update_students([...])
+            set_attendance_presence([...], 0)
+
+    Calls share one connection and nothing is committed until the block
+    ends. If any call hits a database error or raises, the whole unit is
+    rolled back, and a CRUD call that failed inside it makes the block
+    raise UnitOfWorkFailed. Attendance events are published only after
+    the commit. Nested blocks join the outer unit.
+    shard binds the unit to one SHARDS database (default: the thread's
+    use_shard() shard); a unit never spans shards.
+    """
+    shard = shard if shard is not None else current_shard()
+    outer = getattr(_local, 'unit', None)
+    if outer is not None:
+        if outer.shard != shard:
+            raise Error(f"Unit of work on shard {outer.shard} cannot join shard {shard}")
+        yield outer
+        return
+
+    connection = create_connection(shard=shard)
+    if not connection:
+        raise Error("Could not open a database connection for the unit of work")
+    unit = UnitOfWork(connection, shard)
+    _local.unit = unit
+    try:
+        try:
+            yield unit
+        except Exception:
+            connection.rollback()
+            raise
+        if unit.failed:
+            connection.rollback()
+            print("Unit of work rolled back (an operation failed)")
+            raise UnitOfWorkFailed(unit.errors)
+        connection.commit()
+        for change in unit.changes:
+            publish(change)
+    finally:
+        _local.unit = None
+        close_connection(connection)
+
+
+def _current_unit():
+    return getattr(_local, 'unit', None)
+
+
+def _get_connection():
+    unit = _current_unit()
+    return unit.connection if unit is not None else create_connection()
+
+
+def _commit(connection):
+    if _current_unit() is None:
+        connection.commit()
+
+
+def _rollback(connection, error=None):
+    unit = _current_unit()
+    if unit is not None:
+        unit.failed = True
+        unit.errors.append(error)
+    else:
+        connection.rollback()
+
+
+def _release(connection):
+    if _current_unit() is None:
+        close_connection(connection)
+
+
+def _publish(change):
+    unit = _current_unit()
+    if unit is not None:
+        unit.changes.append(change)
+    else:
+        publish(change)
+
 # ==================== CREATE OPERATIONS ====================
 
 def insert_student(Name, Room_NO, Department, Join_Date):
     """
     INSERT - Add new student to database
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return False
     
@@ -25,46 +145,58 @@ def insert_student(Name, Room_NO, Department, Join_Date):
         """
         values = (Name, Room_NO, Department, Join_Date)
         cursor.execute(query, values)
-        connection.commit()
-        
         Student_ID = cursor.lastrowid
+        apply_attendance_delta(cursor, Student_ID, None, 0, 0)
+        _commit(connection)
+        
         print(f"Student added successfully! ID: {Student_ID}")
         return True
         
     except Error as e:
+        _rollback(connection, e)
         print(f"Error inserting student: {e}")
         return False
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
+
+# Shared by the per-scan and batched scanner paths (one cached prepared statement)
+INSERT_ATTENDANCE = """
+        INSERT INTO daily_attendance (Student_ID, Date, Meal_Type, Is_Present)
+        VALUES (%s, %s, %s, %s)
+        """
+# MySQL duplicate key on UNIQUE(student_id, date, meal_type)
+ER_DUP_ENTRY = 1062
+
 
 def insert_attendance(Student_ID, Date, Meal_Type, Is_Present=1):
     """
     INSERT - Record student attendance
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return False
     
     try:
-        cursor = connection.cursor()
-        query = """
-        INSERT INTO daily_attendance (Student_ID, Date, Meal_Type, Is_Present)
-        VALUES (%s, %s, %s, %s)
-        """
+        # Scanner hot path: cached server-side prepared statements
+        cursor = PreparedStatements(connection)
         values = (Student_ID, Date, Meal_Type, Is_Present)
-        cursor.execute(query, values)
-        connection.commit()
+        cursor.execute(INSERT_ATTENDANCE, values)
+        Attendance_ID = cursor.lastrowid
+        apply_attendance_delta(cursor, Student_ID, Date, 1, 1 if Is_Present else 0)
+        _commit(connection)
         
         print(f"Attendance recorded for Student ID: {Student_ID}")
+        _publish(AttendanceChange('insert', Attendance_ID, Student_ID, Date, Meal_Type, Is_Present))
         return True
         
     except Error as e:
+        _rollback(connection, e)
         print(f"Error recording attendance: {e}")
         return False
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
 
 # ==================== READ OPERATIONS ====================
 
@@ -72,7 +204,7 @@ def get_all_students():
     """
     SELECT - Get all students
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return None
     
@@ -90,28 +222,33 @@ def get_all_students():
         return None
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
 
-def get_student_by_id(Student_ID):
+def get_student_by_id(Student_ID, raw=False):
     """
     SELECT - Get specific student by ID
+    Lookup hot path: cached prepared statement; raw=True returns the plain
+    tuple (Student_ID, Name, Room_NO, Department, Join_Date) instead of a dict
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return None
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = PreparedStatements(connection)
         # Table column name is Student_ID
-        query = "SELECT * FROM students WHERE Student_ID = %s"
+        query = "SELECT Student_ID, Name, Room_NO, Department, Join_Date FROM students WHERE Student_ID = %s"
         cursor.execute(query, (Student_ID,))
-        result = cursor.fetchone()
+        # fetchall drains the result so the cached statement is ready for reuse
+        rows = cursor.fetchall()
+        row = rows[0] if rows else None
         
-        if result:
-            print(f"Student found: {result['Name']}")
-        else:
+        if row is None:
             print(f"No student found with ID: {Student_ID}")
+            return None
         
+        result = row if raw else dict(zip(cursor.column_names, row))
+        print(f"Student found: {row[1]}")
         return result
         
     except Error as e:
@@ -119,13 +256,13 @@ def get_student_by_id(Student_ID):
         return None
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
 
 def get_attendance_by_date(date):
     """
     SELECT - Get attendance for specific date
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return None
     
@@ -150,6 +287,165 @@ def get_attendance_by_date(date):
         return None
     finally:
         cursor.close()
+        _release(connection)
+
+# ==================== PAGINATED READS ====================
+
+# Selectable columns (whitelist -> SQL expression); anything else is rejected
+STUDENT_COLUMNS = {
+    'Student_ID': 's.Student_ID',
+    'Name': 's.Name',
+    'Room_NO': 's.Room_NO',
+    'Department': 's.Department',
+    'Join_Date': 's.Join_Date',
+}
+ATTENDANCE_COLUMNS = {
+    'Attendance_ID': 'da.Attendance_ID',
+    'Student_ID': 'da.Student_ID',
+    'Date': 'da.Date',
+    'Meal_Type': 'da.Meal_Type',
+    'Is_Present': 'da.Is_Present',
+    'Recorded_At': 'da.Recorded_At',
+    'Name': 's.Name',
+    'Room_NO': 's.Room_NO',
+}
+DEFAULT_PAGE_SIZE = 100
+_row_types = {}
+
+
+def _select_list(columns, allowed, key):
+    """
+    Validate requested columns; the keyset column is always included
+    """
+    columns = list(columns or allowed)
+    unknown = [col for col in columns if col not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    if key not in columns:
+        columns.insert(0, key)
+    return columns, ', '.join(f"{allowed[col]} AS {col}" for col in columns)
+
+
+def _format_rows(rows, columns, row_format):
+    if row_format == 'tuple':
+        return rows
+    if row_format == 'dict':
+        return [dict(zip(columns, row)) for row in rows]
+    if row_format == 'namedtuple':
+        row_type = _row_types.get(tuple(columns))
+        if row_type is None:
+            row_type = _row_types.setdefault(tuple(columns), namedtuple('Row', columns))
+        return [row_type._make(row) for row in rows]
+    raise ValueError(f"Unknown row_format: {row_format}")
+
+
+def _fetch_page(connection, query, params, columns, key, row_format):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    next_cursor = rows[-1][columns.index(key)] if rows else None
+    return _format_rows(rows, columns, row_format), next_cursor
+
+
+def get_students_page(after_id=0, limit=DEFAULT_PAGE_SIZE, columns=None, row_format='dict', connection=None):
+    """
+    SELECT - One keyset page of students (WHERE Student_ID > after_id)
+    Returns (rows, next_cursor); next_cursor is None after the last page
+    """
+    columns, select = _select_list(columns, STUDENT_COLUMNS, 'Student_ID')
+    query = f"""
+    SELECT {select}
+    FROM students s
+    WHERE s.Student_ID > %s
+    ORDER BY s.Student_ID
+    LIMIT %s
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = create_connection()
+        if not connection:
+            return [], None
+    
+    try:
+        rows, next_cursor = _fetch_page(connection, query, (after_id, limit), columns, 'Student_ID', row_format)
+        return rows, (next_cursor if len(rows) == limit else None)
+        
+    except Error as e:
+        print(f"Error fetching students page: {e}")
+        return [], None
+    finally:
+        if own_connection:
+            close_connection(connection)
+
+
+def iter_students(batch_size=500, columns=None, row_format='namedtuple'):
+    """
+    Generator over all students, fetched in keyset pages on one connection
+    """
+    connection = create_connection()
+    if not connection:
+        return
+    
+    try:
+        after_id = 0
+        while after_id is not None:
+            rows, after_id = get_students_page(after_id, batch_size, columns, row_format, connection)
+            yield from rows
+    finally:
+        close_connection(connection)
+
+
+def get_attendance_page(date, after_id=0, limit=DEFAULT_PAGE_SIZE, columns=None, row_format='dict', connection=None):
+    """
+    SELECT - One keyset page of a day's attendance (WHERE Attendance_ID > after_id)
+    Uses idx_attendance_date (Date, Attendance_ID), so every page is an index range
+    Returns (rows, next_cursor); next_cursor is None after the last page
+    """
+    columns, select = _select_list(columns, ATTENDANCE_COLUMNS, 'Attendance_ID')
+    join = "JOIN students s ON da.Student_ID = s.Student_ID" if {'Name', 'Room_NO'} & set(columns) else ""
+    query = f"""
+    SELECT {select}
+    FROM daily_attendance da
+    {join}
+    WHERE da.Date = %s AND da.Attendance_ID > %s
+    ORDER BY da.Attendance_ID
+    LIMIT %s
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = create_connection()
+        if not connection:
+            return [], None
+    
+    try:
+        rows, next_cursor = _fetch_page(connection, query, (date, after_id, limit), columns, 'Attendance_ID', row_format)
+        return rows, (next_cursor if len(rows) == limit else None)
+        
+    except Error as e:
+        print(f"Error fetching attendance page: {e}")
+        return [], None
+    finally:
+        if own_connection:
+            close_connection(connection)
+
+
+def iter_attendance_by_date(date, batch_size=1000, columns=None, row_format='namedtuple'):
+    """
+    Generator over a day's attendance in keyset pages on one connection
+    """
+    connection = create_connection()
+    if not connection:
+        return
+    
+    try:
+        after_id = 0
+        while after_id is not None:
+            rows, after_id = get_attendance_page(date, after_id, batch_size, columns, row_format, connection)
+            yield from rows
+    finally:
         close_connection(connection)
 
 # ==================== UPDATE OPERATIONS ====================
@@ -158,7 +454,7 @@ def update_student(Student_ID, Name=None, Room_NO=None, Department=None):
     """
     UPDATE - Modify student information
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return False
     
@@ -187,57 +483,262 @@ def update_student(Student_ID, Name=None, Room_NO=None, Department=None):
         query = f"UPDATE students SET {', '.join(updates)} WHERE Student_ID = %s"
         
         cursor.execute(query, tuple(values))
-        connection.commit()
+        _commit(connection)
         
+        # rowcount counts matched rows (FOUND_ROWS), so identical data still counts
         if cursor.rowcount > 0:
             print(f"Student ID {Student_ID} updated successfully")
             return True
         else:
-            # Check if student exists but data was identical
-            check_cursor = connection.cursor()
-            check_cursor.execute("SELECT Student_ID FROM students WHERE Student_ID = %s", (Student_ID,))
-            if check_cursor.fetchone():
-                print(f"Student ID {Student_ID} exists, but no changes were made (Same data).")
-                return True
-            else:
-                print(f"No student found with ID: {Student_ID}")
-                return False
+            print(f"No student found with ID: {Student_ID}")
+            return False
         
     except Error as e:
+        _rollback(connection, e)
         print(f"Error updating student: {e}")
         return False
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
 
 def update_attendance(Attendance_ID, Is_Present):
     """
     UPDATE - Modify attendance status
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return False
     
     try:
         cursor = connection.cursor()
+        # Lock the row so the rollup delta uses the value being replaced
+        cursor.execute(
+            "SELECT Student_ID, Date, Meal_Type, Is_Present FROM daily_attendance "
+            "WHERE Attendance_ID = %s FOR UPDATE", (Attendance_ID,))
+        current = cursor.fetchone()
+        
         # Table column is Attendance_ID and Is_Present
         query = "UPDATE daily_attendance SET Is_Present = %s WHERE Attendance_ID = %s"
         cursor.execute(query, (Is_Present, Attendance_ID))
-        connection.commit()
         
         if cursor.rowcount > 0:
+            Student_ID, Date, Meal_Type, Was_Present = current
+            apply_attendance_delta(cursor, Student_ID, Date, 0, (1 if Is_Present else 0) - Was_Present)
+            _commit(connection)
             print(f"Attendance ID {Attendance_ID} updated")
+            _publish(AttendanceChange('update', Attendance_ID, Student_ID, Date, Meal_Type, Is_Present, Was_Present))
             return True
         else:
+            _commit(connection)
             print(f"No attendance found or no changes made for ID: {Attendance_ID}")
             return False
         
     except Error as e:
+        _rollback(connection, e)
         print(f"Error updating attendance: {e}")
         return False
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
+
+# ==================== BATCH OPERATIONS ====================
+
+BATCH_CHUNK_SIZE = 1000
+
+
+def _chunks(items, size=BATCH_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_attendance_batch(records):
+    """
+    INSERT (batch) - Record many scans in one transaction (group commit)
+    records: list of (Student_ID, Date, Meal_Type, Is_Present)
+    A scan that is already recorded (duplicate key) is skipped on its own;
+    the rest of the batch still commits, with one rollup upsert for all
+    Returns list of Attendance_IDs (None for duplicates), or None on failure
+    """
+    records = list(records)
+    if not records:
+        return []
+    
+    connection = _get_connection()
+    if not connection:
+        return None
+    
+    try:
+        cursor = PreparedStatements(connection)
+        attendance_ids = []
+        inserted = []
+        for Student_ID, Date, Meal_Type, Is_Present in records:
+            try:
+                cursor.execute(INSERT_ATTENDANCE, (Student_ID, Date, Meal_Type, Is_Present))
+            except Error as e:
+                # InnoDB undoes only the failed statement; the transaction goes on
+                if e.errno != ER_DUP_ENTRY:
+                    raise
+                attendance_ids.append(None)
+                continue
+            attendance_ids.append(cursor.lastrowid)
+            inserted.append((cursor.lastrowid, Student_ID, Date, Meal_Type, Is_Present))
+        # Multi-row rollup upsert runs on a plain cursor (same transaction)
+        rollup_cursor = connection.cursor()
+        try:
+            apply_attendance_deltas(rollup_cursor, [(Student_ID, Date, 1, 1 if Is_Present else 0)
+                                                    for _, Student_ID, Date, _, Is_Present in inserted])
+        finally:
+            rollup_cursor.close()
+        _commit(connection)
+        
+        print(f"Recorded {len(inserted)} of {len(records)} scans "
+              f"({len(records) - len(inserted)} already recorded)")
+        for Attendance_ID, Student_ID, Date, Meal_Type, Is_Present in inserted:
+            _publish(AttendanceChange('insert', Attendance_ID, Student_ID, Date, Meal_Type, Is_Present))
+        return attendance_ids
+        
+    except Error as e:
+        _rollback(connection, e)
+        print(f"Error recording attendance batch: {e}")
+        return None
+    finally:
+        cursor.close()
+        _release(connection)
+
+def update_students(updates):
+    """
+    UPDATE (batch) - Modify many students in one transaction
+    updates: iterable of dicts with Student_ID and any of Name, Room_NO, Department
+    Each chunk is one set-based UPDATE joined to a derived table of new values
+    Returns number of students matched
+    """
+    rows = [(u['Student_ID'], u.get('Name'), u.get('Room_NO'), u.get('Department')) for u in updates]
+    if not rows:
+        return 0
+    
+    connection = _get_connection()
+    if not connection:
+        return 0
+    
+    try:
+        cursor = connection.cursor()
+        matched = 0
+        for chunk in _chunks(rows):
+            new_values = " UNION ALL ".join(
+                ["SELECT %s AS Student_ID, %s AS Name, %s AS Room_NO, %s AS Department"]
+                + ["SELECT %s, %s, %s, %s"] * (len(chunk) - 1)
+            )
+            query = f"""
+            UPDATE students s
+            JOIN ({new_values}) v ON v.Student_ID = s.Student_ID
+            SET s.Name = COALESCE(v.Name, s.Name),
+                s.Room_NO = COALESCE(v.Room_NO, s.Room_NO),
+                s.Department = COALESCE(v.Department, s.Department)
+            """
+            cursor.execute(query, [value for row in chunk for value in row])
+            matched += cursor.rowcount
+        _commit(connection)
+        
+        print(f"Updated {matched} of {len(rows)} students")
+        return matched
+        
+    except Error as e:
+        _rollback(connection, e)
+        print(f"Error updating students: {e}")
+        return 0
+    finally:
+        cursor.close()
+        _release(connection)
+
+def set_attendance_presence(Attendance_IDs, Is_Present):
+    """
+    UPDATE (batch) - Set Is_Present for many attendance records in one transaction
+    Only rows whose value actually changes are written; the rollup and
+    attendance events follow those rows
+    Returns number of records changed
+    """
+    ids = list(dict.fromkeys(Attendance_IDs))
+    if not ids:
+        return 0
+    Is_Present = 1 if Is_Present else 0
+    
+    connection = _get_connection()
+    if not connection:
+        return 0
+    
+    try:
+        cursor = connection.cursor()
+        changed = []
+        for chunk in _chunks(ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                "SELECT Attendance_ID, Student_ID, Date, Meal_Type, Is_Present FROM daily_attendance "
+                f"WHERE Attendance_ID IN ({placeholders}) AND Is_Present <> %s FOR UPDATE",
+                chunk + [Is_Present])
+            rows = cursor.fetchall()
+            if rows:
+                cursor.execute(
+                    f"UPDATE daily_attendance SET Is_Present = %s WHERE Attendance_ID IN ({', '.join(['%s'] * len(rows))})",
+                    [Is_Present] + [row[0] for row in rows])
+                changed.extend(rows)
+        
+        apply_attendance_deltas(cursor, [(Student_ID, Date, 0, Is_Present - Was_Present)
+                                         for _, Student_ID, Date, _, Was_Present in changed])
+        _commit(connection)
+        
+        for Attendance_ID, Student_ID, Date, Meal_Type, Was_Present in changed:
+            _publish(AttendanceChange('update', Attendance_ID, Student_ID, Date, Meal_Type, Is_Present, Was_Present))
+        print(f"Set Is_Present={Is_Present} on {len(changed)} attendance records")
+        return len(changed)
+        
+    except Error as e:
+        _rollback(connection, e)
+        print(f"Error updating attendance records: {e}")
+        return 0
+    finally:
+        cursor.close()
+        _release(connection)
+
+def delete_attendance_range(start_date, end_date, Meal_Type=None):
+    """
+    DELETE (batch) - Remove attendance for a date range (optionally one meal)
+    in one transaction
+    Returns number of records deleted
+    """
+    connection = _get_connection()
+    if not connection:
+        return 0
+    
+    try:
+        cursor = connection.cursor()
+        condition = "Date BETWEEN %s AND %s"
+        params = [start_date, end_date]
+        if Meal_Type:
+            condition += " AND Meal_Type = %s"
+            params.append(Meal_Type)
+        
+        cursor.execute(
+            "SELECT Attendance_ID, Student_ID, Date, Meal_Type, Is_Present FROM daily_attendance "
+            f"WHERE {condition} FOR UPDATE", params)
+        removed = cursor.fetchall()
+        cursor.execute(f"DELETE FROM daily_attendance WHERE {condition}", params)
+        
+        apply_attendance_deltas(cursor, [(Student_ID, Date, -1, -Was_Present)
+                                         for _, Student_ID, Date, _, Was_Present in removed])
+        _commit(connection)
+        
+        for Attendance_ID, Student_ID, Date, Meal_Type_, Was_Present in removed:
+            _publish(AttendanceChange('delete', Attendance_ID, Student_ID, Date, Meal_Type_, Was_Present))
+        print(f"Deleted {len(removed)} attendance records from {start_date} to {end_date}")
+        return len(removed)
+        
+    except Error as e:
+        _rollback(connection, e)
+        print(f"Error deleting attendance range: {e}")
+        return 0
+    finally:
+        cursor.close()
+        _release(connection)
 
 # ==================== DELETE OPERATIONS ====================
 
@@ -245,15 +746,16 @@ def delete_student(Student_ID):
     """
     DELETE - Remove student from database
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return False
     
     try:
         cursor = connection.cursor()
+        cursor.execute("DELETE FROM student_attendance_rollup WHERE student_id = %s", (Student_ID,))
         query = "DELETE FROM students WHERE Student_ID = %s"
         cursor.execute(query, (Student_ID,))
-        connection.commit()
+        _commit(connection)
         
         if cursor.rowcount > 0:
             print(f"Student ID {Student_ID} deleted successfully")
@@ -263,43 +765,57 @@ def delete_student(Student_ID):
             return False
         
     except Error as e:
+        _rollback(connection, e)
         print(f"Error deleting student: {e}")
         print("    (Student may have attendance records - delete those first)")
         return False
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
 
 def delete_attendance(Attendance_ID):
     """
     DELETE - Remove attendance record
     """
-    connection = create_connection()
+    connection = _get_connection()
     if not connection:
         return False
     
     try:
         cursor = connection.cursor()
+        cursor.execute(
+            "SELECT Student_ID, Date, Meal_Type, Is_Present FROM daily_attendance "
+            "WHERE Attendance_ID = %s FOR UPDATE", (Attendance_ID,))
+        current = cursor.fetchone()
+        
         query = "DELETE FROM daily_attendance WHERE Attendance_ID = %s"
         cursor.execute(query, (Attendance_ID,))
-        connection.commit()
         
         if cursor.rowcount > 0:
+            Student_ID, Date, Meal_Type, Was_Present = current
+            apply_attendance_delta(cursor, Student_ID, Date, -1, -Was_Present)
+            _commit(connection)
             print(f"Attendance ID {Attendance_ID} deleted")
+            _publish(AttendanceChange('delete', Attendance_ID, Student_ID, Date, Meal_Type, Was_Present))
             return True
         else:
+            _commit(connection)
             print(f"No attendance found with ID: {Attendance_ID}")
             return False
         
     except Error as e:
+        _rollback(connection, e)
         print(f"Error deleting attendance: {e}")
         return False
     finally:
         cursor.close()
-        close_connection(connection)
+        _release(connection)
 
 # ==================== DEMO / TESTING ====================
 
+instrument_module(__name__)
+
+
 if __name__ == "__main__":
     print("\n" + "="*60)
     print("TESTING CRUD OPERATIONS")
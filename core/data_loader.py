@@ -1,12 +1,16 @@
 import pandas as pd
 from core.db_connection import create_connection, close_connection
+from core.halls import hall_sql_expression
+from core.schemas import ATTENDANCE_SUMMARY, HALL_ATTENDANCE_SUMMARY, ATTENDANCE_RECORDS
+from core.profiling import instrument_module
 
-def fetch_attendance_data():
+def fetch_attendance_data(start_date=None, end_date=None):
     """
-    Fetch daily attendance data from database
-    Returns pandas DataFrame with attendance records
+    Fetch daily attendance data from database, optionally limited to a date range
+    Returns pandas DataFrame matching core/schemas.ATTENDANCE_SUMMARY
+    (same columns and meaning as data_to_pandas / attendance_summary.csv)
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     
     if connection is None:
         print("Failed to connect to database")
@@ -17,18 +21,17 @@ def fetch_attendance_data():
         SELECT 
             da.date,
             da.meal_type,
-            COUNT(CASE WHEN da.is_present = 1 THEN 1 END) as students_present,
-            DAYNAME(da.date) as day_of_week,
-            CASE 
-                WHEN DAYOFWEEK(da.date) IN (1, 7) THEN 1 
-                ELSE 0 
-            END as is_weekend
+            COUNT(da.student_id) as students_present,
+            COUNT(CASE WHEN da.is_present = 1 THEN 1 END) as actual_attended
         FROM daily_attendance da
+        WHERE (%s IS NULL OR da.date >= %s)
+          AND (%s IS NULL OR da.date <= %s)
         GROUP BY da.date, da.meal_type
         ORDER BY da.date, da.meal_type
         """
         
-        df = pd.read_sql(query, connection)
+        df = ATTENDANCE_SUMMARY.conform(
+            pd.read_sql(query, connection, params=(start_date, start_date, end_date, end_date)))
         print(f"Successfully fetched {len(df)} records from database")
         print(f"\nData preview:")
         print(df.head())
@@ -42,20 +45,134 @@ def fetch_attendance_data():
     finally:
         close_connection(connection)
 
-def fetch_special_events():
+def fetch_hall_attendance_data():
+    """
+    Fetch attendance aggregated per hall, date and meal type
+    Returns pandas DataFrame used for per-hall model sharding (HALL_ATTENDANCE_SUMMARY)
+    """
+    connection = create_connection(read_only=True)
+    
+    if connection is None:
+        print("Failed to connect to database")
+        return None
+    
+    try:
+        query = f"""
+        SELECT 
+            {hall_sql_expression('s.room_no')} as hall,
+            da.date,
+            da.meal_type,
+            COUNT(da.student_id) as students_present,
+            COUNT(CASE WHEN da.is_present = 1 THEN 1 END) as actual_attended
+        FROM daily_attendance da
+        INNER JOIN students s ON da.student_id = s.student_id
+        GROUP BY hall, da.date, da.meal_type
+        ORDER BY hall, da.date, da.meal_type
+        """
+        
+        df = HALL_ATTENDANCE_SUMMARY.conform(pd.read_sql(query, connection))
+        print(f"Successfully fetched {len(df)} hall records from database")
+        return df
+        
+    except Exception as e:
+        print(f"Error fetching hall data: {e}")
+        return None
+        
+    finally:
+        close_connection(connection)
+
+def fetch_attendance_records(start_date=None, end_date=None):
+    """
+    Fetch student-level attendance rows, optionally limited to a date range
+    Returns pandas DataFrame used to build per-day analytics sketches (ATTENDANCE_RECORDS)
+    """
+    connection = create_connection(read_only=True)
+    
+    if connection is None:
+        return None
+    
+    try:
+        query = """
+        SELECT 
+            da.date,
+            da.meal_type,
+            da.student_id,
+            da.is_present
+        FROM daily_attendance da
+        WHERE (%s IS NULL OR da.date >= %s)
+          AND (%s IS NULL OR da.date <= %s)
+        ORDER BY da.date
+        """
+        df = ATTENDANCE_RECORDS.conform(
+            pd.read_sql(query, connection, params=(start_date, start_date, end_date, end_date)))
+        print(f"Fetched {len(df)} attendance records")
+        return df
+        
+    except Exception as e:
+        print(f"Error fetching attendance records: {e}")
+        return None
+        
+    finally:
+        close_connection(connection)
+
+def fetch_meal_summary_history():
+    """
+    Fetch food quantity history from daily_meal_summary
+    Returns pandas DataFrame used to calibrate per-student portions
+    """
+    connection = create_connection(read_only=True)
+    
+    if connection is None:
+        return None
+    
+    try:
+        query = """
+        SELECT 
+            date,
+            meal_type,
+            total_present,
+            food_prepared_kg,
+            food_consumed_kg,
+            wastage_kg
+        FROM daily_meal_summary
+        WHERE total_present > 0
+          AND food_consumed_kg IS NOT NULL
+        ORDER BY date, meal_type
+        """
+        df = pd.read_sql(query, connection)
+        print(f"Fetched {len(df)} meal summary records")
+        return df
+        
+    except Exception as e:
+        print(f"Error fetching meal summary: {e}")
+        return None
+        
+    finally:
+        close_connection(connection)
+
+def fetch_special_events(output_path=None):
     """
     Fetch special events data
-    Returns pandas DataFrame with events
+    Returns pandas DataFrame with events (end_date is NULL for one-day events)
+    Optionally saves it as CSV for the ML event index (data/special_events.csv)
     """
-    connection = create_connection()
+    connection = create_connection(read_only=True)
     
     if connection is None:
         return None
     
     try:
-        query = "SELECT * FROM special_events"
+        query = """
+        SELECT event_id, event_date, end_date, event_name, impact_factor
+        FROM special_events
+        ORDER BY event_date
+        """
         df = pd.read_sql(query, connection)
         print(f"Fetched {len(df)} special events")
+        
+        if output_path:
+            df.to_csv(output_path, index=False)
+            print(f"Events saved to {output_path}")
         return df
         
     except Exception as e:
@@ -65,6 +182,9 @@ def fetch_special_events():
     finally:
         close_connection(connection)
 
+instrument_module(__name__)
+
+
 # Test the data loader
 if __name__ == "__main__":
     print("Testing data loader...\n")
@@ -75,7 +195,7 @@ if __name__ == "__main__":
     print("\n" + "="*50 + "\n")
     
     # Fetch events data
-    events_df = fetch_special_events()
+    events_df = fetch_special_events(output_path="data/special_events.csv")
     
     if attendance_df is not None:
         print(f"\nTotal records: {len(attendance_df)}")
@@ -1,22 +1,23 @@
+import os
+import sys
 import pandas as pd
-import mysql.connector
 from mysql.connector import Error
-import os
+
+# Path setup
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db_connection import create_connection, close_connection
+from core.schemas import ATTENDANCE_SUMMARY, SchemaError
+from core.profiling import instrument_module
 
 def get_db_connection():
-    try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            database='smart_hostel_db',
-            user='root',
-            password='Shovon@21'
-        )
-        if connection.is_connected():
-            print("Connected to MySQL")
-            return connection
-    except Error as e:
-        print(f"Error: {e}")
-        return None
+    """
+    Read-only analytics connection (read replica when configured, see core/config.py)
+    """
+    connection = create_connection(read_only=True)
+    if connection is None:
+        print("Error: could not connect to MySQL")
+    return connection
 
 def load_attendance_to_dataframe():
     connection = get_db_connection()
@@ -35,7 +36,8 @@ def load_attendance_to_dataframe():
     """
     
     try:
-        df = pd.read_sql(query, connection)
+        # Typed contract for every downstream stage (int16 counts, categorical meals)
+        df = ATTENDANCE_SUMMARY.conform(pd.read_sql(query, connection))
         print("\nAttendance Summary DataFrame:")
         print(df.head(10)) 
         print(f"\nTotal rows: {len(df)}")
@@ -45,7 +47,7 @@ def load_attendance_to_dataframe():
         os.makedirs(output_dir, exist_ok=True)   # auto-create folder if missing
         output_path = os.path.join(output_dir, "attendance_summary.csv")
         
-        df.to_csv(output_path, index=False)
+        df.to_csv(output_path, index=False, date_format='%Y-%m-%d')
         print(f"Data saved to {output_path}")
         
         return df
@@ -53,11 +55,36 @@ def load_attendance_to_dataframe():
     except Error as e:
         print(f"Query error: {e}")
         return None
+
+    except SchemaError as e:
+        print(f"Attendance summary rejected: {e}")
+        return None
     
     finally:
-        if connection.is_connected():
-            connection.close()
-            print("Connection closed")
+        close_connection(connection)
+
+def load_hall_attendance_to_dataframe():
+    """
+    Per-hall summary (HALL_ATTENDANCE_SUMMARY) saved to data/hall_attendance_summary.csv,
+    which ml/shard_training.py trains on when present
+    """
+    from core.data_loader import fetch_hall_attendance_data
+
+    df = fetch_hall_attendance_data()
+    if df is None:
+        return None
+
+    output_dir = "data"
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, "hall_attendance_summary.csv")
+
+    df.to_csv(output_path, index=False, date_format='%Y-%m-%d')
+    print(f"Per-hall data saved to {output_path}")
+    return df
+
+instrument_module(__name__)
+
 
 if __name__ == "__main__":
-    df = load_attendance_to_dataframe()
\ No newline at end of file
+    df = load_attendance_to_dataframe()
+    hall_df = load_hall_attendance_to_dataframe()
\ No newline at end of file
@@ -1,40 +1,315 @@
+import time
+import weakref
+import threading
+from contextlib import contextmanager
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+from mysql.connector.constants import ClientFlag
 
-def create_connection():
+POOL_NAME = 'smart_hostel_pool'
+DEFAULT_POOL_SIZE = 5
+# Replica lag tolerance (seconds) and how often it is re-checked
+DEFAULT_REPLICA_MAX_LAG = 30
+REPLICA_CHECK_INTERVAL = 2.0
+
+_pools = {}
+# Prepared cursors per physical connection (kept across pool check-outs)
+_prepared_cursors = weakref.WeakKeyDictionary()
+# Physical replica connections already switched to READ ONLY
+_read_only_sessions = weakref.WeakSet()
+# Last replica lag check per shard (None = the single/default database)
+_replica_health = {}
+# Shard selected for connections opened on this thread (see core/sharding.py)
+_local = threading.local()
+
+# Keys of a SHARDS entry that are not connection options
+SHARD_META_KEYS = ('name', 'halls', 'read_replica')
+
+
+def _settings():
+    import core.config as settings
+    return settings
+
+
+def current_shard():
+    return getattr(_local, 'shard', None)
+
+
+@contextmanager
+def use_shard(shard):
+    """
+    Route every create_connection() on this thread to shard (a SHARDS name)
+    """
+    previous = current_shard()
+    _local.shard = shard
+    try:
+        yield shard
+    finally:
+        _local.shard = previous
+
+
+def _shard_entry(shard):
+    for entry in getattr(_settings(), 'SHARDS', None) or []:
+        if entry['name'] == shard:
+            return entry
+    raise KeyError(f"Unknown shard: {shard}")
+
+
+def _endpoint_settings(shard=None):
+    """
+    (primary options, replica overrides) for the default database or a shard
+    """
+    from core.config import DB_CONFIG
+
+    config = {key: value for key, value in DB_CONFIG.items() if key != 'read_replica'}
+    if shard is None:
+        return config, DB_CONFIG.get('read_replica')
+    entry = _shard_entry(shard)
+    config.update({key: value for key, value in entry.items() if key not in SHARD_META_KEYS})
+    return config, entry.get('read_replica')
+
+
+def _connection_config(role='primary', shard=None):
+    """
+    Connection options for the primary or the read replica of the default
+    database or a shard. DB_CONFIG['read_replica'] (or a shard's
+    'read_replica') holds the replica's overrides (host, port, ...)
+    Raises ImportError if config.py is missing
+    """
+    settings = _settings()
+    config, replica = _endpoint_settings(shard)
+    if role == 'replica':
+        config.update(replica or {})
+    # FOUND_ROWS: UPDATE rowcount = rows matched, not rows changed,
+    # so "exists but unchanged" needs no follow-up SELECT
+    config['client_flags'] = list(config.get('client_flags', [])) + [ClientFlag.FOUND_ROWS]
+    # use_pure=False selects the C extension when it is installed
+    if getattr(settings, 'DB_USE_PURE', None) is not None:
+        config.setdefault('use_pure', settings.DB_USE_PURE)
+    return config, getattr(settings, 'DB_POOL_SIZE', DEFAULT_POOL_SIZE)
+
+
+def replica_configured(shard=None):
+    try:
+        return bool(_endpoint_settings(shard)[1])
+    except ImportError:
+        return False
+
+
+def get_pool(role='primary', shard=None):
+    """
+    Process-wide connection pool per endpoint (created on first use)
+    Sessions are not reset on check-in, so server-side prepared
+    statements stay valid for the next borrower
+    """
+    key = (role, shard)
+    if key not in _pools:
+        config, pool_size = _connection_config(role, shard)
+        name = f'{POOL_NAME}_{role}' if shard is None else f'{POOL_NAME}_{shard}_{role}'
+        _pools[key] = pooling.MySQLConnectionPool(
+            pool_name=name, pool_size=pool_size, pool_reset_session=False, **config
+        )
+    return _pools[key]
+
+
+def _open(role, pooled, shard=None):
+    config, pool_size = _connection_config(role, shard)
+    if pooled and pool_size:
+        try:
+            return get_pool(role, shard).get_connection()
+        except PoolError:
+            pass
+    return mysql.connector.connect(**config)
+
+
+def replica_lag(connection):
+    """
+    Seconds the replica is behind its source
+    0 for a standalone server (no replication configured, e.g. local testing),
+    None when replication is stopped or broken
+    """
+    cursor = connection.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Error:
+            cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+        channels = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not channels:
+        return 0
+    lags = [status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master')) for status in channels]
+    return None if any(lag is None for lag in lags) else max(int(lag) for lag in lags)
+
+
+def _replica_fresh(connection, max_lag, shard=None):
+    """
+    Lag check, cached for REPLICA_CHECK_INTERVAL seconds per process and shard
+    """
+    if max_lag is None:
+        return True
+    health = _replica_health.setdefault(shard, {'checked_at': float('-inf'), 'lag': None})
+    now = time.monotonic()
+    if now - health['checked_at'] > REPLICA_CHECK_INTERVAL:
+        try:
+            health['lag'] = replica_lag(connection)
+        except Error as e:
+            print(f"Replica lag check failed: {e}")
+            health['lag'] = None
+        health['checked_at'] = now
+    return health['lag'] is not None and health['lag'] <= max_lag
+
+
+def _read_replica_connection(max_lag, shard=None):
+    """
+    Replica connection if it is reachable and within max_lag, else None
+    """
+    try:
+        connection = _open('replica', True, shard)
+    except Error as e:
+        print(f"Read replica unavailable, using primary: {e}")
+        return None
+    if not _replica_fresh(connection, max_lag, shard):
+        print(f"Read replica lag {_replica_health[shard]['lag']}s exceeds {max_lag}s, using primary")
+        connection.close()
+        return None
+    physical = getattr(connection, '_cnx', connection)
+    if physical not in _read_only_sessions:
+        cursor = connection.cursor()
+        cursor.execute("SET SESSION TRANSACTION READ ONLY")
+        cursor.close()
+        _read_only_sessions.add(physical)
+    return connection
+
+
+def create_connection(pooled=True, read_only=False, max_lag=..., shard=None):
     """
     Create a database connection to MySQL
-    Returns connection object if successful, None otherwise
+    read_only=True routes to the read replica when configured and no
+    more than max_lag seconds behind (default DB_REPLICA_MAX_LAG_SECONDS;
+    None = no lag check), otherwise to the primary
+    shard selects a SHARDS entry (default: the use_shard() shard of this
+    thread, else the single DB_CONFIG database)
+    Returns a pooled connection (falls back to a new one when the pool is
+    exhausted or DB_POOL_SIZE = 0), or None on failure
     """
     try:
         try:
-            from core.config import DB_CONFIG
-            connection = mysql.connector.connect(**DB_CONFIG)
+            shard = shard if shard is not None else current_shard()
+            connection = None
+            if read_only and replica_configured(shard):
+                if max_lag is ...:
+                    max_lag = getattr(_settings(), 'DB_REPLICA_MAX_LAG_SECONDS', DEFAULT_REPLICA_MAX_LAG)
+                connection = _read_replica_connection(max_lag, shard)
+            if connection is None:
+                connection = _open('primary', pooled, shard)
         except ImportError:
             # If config.py doesn't exist, use manual input
             print("config.py not found!")
             print("Please create core/config.py with your database credentials")
             print("See README.md for instructions")
             return None
-        
+
         if connection.is_connected():
             print("Successfully connected to MySQL database")
             return connection
-            
+
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
 def close_connection(connection):
     """
-    Close database connection
+    Close database connection (pooled connections go back to the pool)
     """
     if connection and connection.is_connected():
+        # Never hand an open transaction/snapshot to the next borrower
+        if connection.in_transaction:
+            connection.rollback()
         connection.close()
         print("Database connection closed")
 
-# Test the connection
+
+def _physical(connection):
+    return getattr(connection, '_cnx', connection)
+
+
+def prepared_cursor(connection, query):
+    """
+    Server-side prepared cursor for query, cached on the physical connection
+    The cursor only skips re-preparing when it is given the same string
+    object again, so pass module/function constants, not f-strings
+    """
+    cursors = _prepared_cursors.setdefault(_physical(connection), {})
+    cursor = cursors.get(query)
+    if cursor is None:
+        cursor = cursors[query] = _physical(connection).cursor(prepared=True)
+    return cursor
+
+
+class PreparedStatements:
+    """
+    Cursor-like facade for hot paths: every execute() runs its SQL as a
+    cached server-side prepared statement on this connection and rows come
+    back as plain tuples. close() leaves the statements cached.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = None
+
+    def execute(self, query, params=()):
+        self._cursor = prepared_cursor(self.connection, query)
+        try:
+            self._cursor.execute(query, params)
+        except Error:
+            # Statement may be gone (reconnect, schema change): prepare again next time
+            _prepared_cursors.get(_physical(self.connection), {}).pop(query, None)
+            raise
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def column_names(self):
+        return self._cursor.column_names
+
+    def close(self):
+        self._cursor = None
+
+def describe_endpoint(connection):
+    """
+    (host, port, read_only) of the server a connection is talking to
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT @@hostname, @@port, @@transaction_read_only")
+    host, port, read_only = cursor.fetchone()
+    cursor.close()
+    return host, port, bool(read_only)
+
+# Test the connections (with a replica configured, e.g. two local
+# MySQL instances on different ports, the read-only line shows the replica)
 if __name__ == "__main__":
     conn = create_connection()
     if conn:
-        close_connection(conn)
\ No newline at end of file
+        print("Primary:  ", describe_endpoint(conn))
+        close_connection(conn)
+    conn = create_connection(read_only=True)
+    if conn:
+        print("Read-only:", describe_endpoint(conn))
+        if replica_configured():
+            print("Replica lag (s):", _replica_health.get(None, {}).get('lag'))
+        close_connection(conn)
@@ -0,0 +1,33 @@
+"""
+Hall helpers shared by the data layer and the ML pipeline.
+A student's hall is identified by the prefix of students.room_no
+(e.g. room '101B' with a 1-character prefix belongs to hall '1').
+"""
+
+try:
+    from core.config import HALL_PREFIX_LENGTH
+except ImportError:
+    HALL_PREFIX_LENGTH = 1
+
+DEFAULT_HALL = 'ALL'
+
+
+def hall_from_room(room_no):
+    """
+    Map a room number to its hall code
+    Returns DEFAULT_HALL when the room number is empty
+    """
+    if room_no is None:
+        return DEFAULT_HALL
+    room_no = str(room_no).strip()
+    if not room_no:
+        return DEFAULT_HALL
+    return room_no[:HALL_PREFIX_LENGTH].upper()
+
+
+def hall_sql_expression(column='s.room_no'):
+    """
+    SQL expression computing the hall code for a room column,
+    kept in sync with hall_from_room()
+    """
+    return f"UPPER(LEFT({column}, {int(HALL_PREFIX_LENGTH)}))"
@@ -0,0 +1,552 @@
+"""
+Load test for the attendance write path: N scanner terminals at mess opening.
+
+Each meal's scans arrive as a rush: arrival times follow Beta(1, 3) over the
+rush window, so about 60% of students arrive in the first quarter. A few
+students scan twice (double tap, or a second terminal), which must be
+rejected by UNIQUE(student_id, date, meal_type). Every terminal is one
+thread that replays its queue on schedule (open loop: a slow write delays
+the students behind it, as at a real counter).
+
+Write paths:
+  per_call  one insert_attendance() per scan (its own transaction)
+  batched   terminals hand scans to a group-commit writer that commits up
+            to --batch scans per transaction (insert_attendance_batch);
+            on both backends a duplicate scan fails on its own statement
+            and the rest of the batch commits
+Backends:
+  mysql     the configured database (core/config.py), through
+            crud_operations; rows go to far-future dates and are deleted
+  sqlite    embedded database in a temp file (WAL, same table shapes and
+            statements translated); no server needed, shows the shape of
+            contention rather than MySQL numbers
+
+Reports throughput, latency percentiles (arrival to commit, and time in the
+write call), duplicate-key rejections, other failures, and lock waits:
+InnoDB row-lock waits/time, deadlocks and lock wait timeouts on MySQL,
+write-lock waits and busy timeouts on sqlite.
+"""
+
+import os
+import io
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+import numpy as np
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from core.schemas import MEAL_TYPES
+
+# Load-test rows go far in the future (after benchmark_db's) and are deleted afterwards
+LOAD_START = date(2099, 6, 1)
+DEFAULT_STUDENTS = 300
+DEFAULT_TERMINALS = 4
+DEFAULT_RUSH_SECONDS = 20.0
+DEFAULT_DUPLICATE_RATE = 0.03
+DEFAULT_BATCH = 32
+# Extra time the group-commit writer waits to fill a batch; 0 = take whatever
+# queued during the previous commit (batches grow with load, no added latency)
+BATCH_WAIT_SECONDS = 0.0
+# sqlite: waiting this long for the write lock counts as a lock wait
+SQLITE_LOCK_WAIT_SECONDS = 0.001
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+OK, DUPLICATE, LOCKED, ERROR, FAILED = 'ok', 'duplicate', 'lock_timeout', 'error', 'failed'
+
+Scan = namedtuple('Scan', ['terminal', 'student_id', 'date', 'meal_type', 'due'])
+
+
+# ==================== WORKLOAD ====================
+
+def rush_schedule(student_ids, terminals, rush_seconds, duplicate_rate, day, meal_type, seed=0):
+    """
+    One meal's scans, split into per-terminal queues sorted by arrival time
+    due: seconds after the mess opens
+    """
+    rng = np.random.default_rng(seed)
+    students = rng.permutation(np.asarray(student_ids))
+    due = rush_seconds * rng.beta(1, 3, len(students))
+    terminal = rng.integers(0, terminals, len(students))
+
+    # Double scans: same student again 0.2-3 s later, maybe at another terminal
+    repeat = rng.random(len(students)) < duplicate_rate
+    students = np.concatenate([students, students[repeat]])
+    due = np.concatenate([due, due[repeat] + rng.uniform(0.2, 3.0, int(repeat.sum()))])
+    terminal = np.concatenate([terminal, rng.integers(0, terminals, int(repeat.sum()))])
+
+    queues = [[] for _ in range(terminals)]
+    for index in np.argsort(due, kind='stable'):
+        queues[terminal[index]].append(
+            Scan(int(terminal[index]), int(students[index]), day, meal_type, float(due[index])))
+    return queues
+
+
+# ==================== BACKENDS ====================
+
+class MySQLBackend:
+    """
+    The configured MySQL database through the real CRUD functions
+    """
+
+    name = 'mysql'
+
+    def __init__(self):
+        # Imported here so the sqlite backend runs without a MySQL setup
+        with redirect_stdout(io.StringIO()):
+            from core import crud_operations
+        self.crud = crud_operations
+
+    def student_ids(self, count):
+        from core.db_connection import create_connection, close_connection
+        connection = create_connection()
+        if connection is None:
+            return None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT Student_ID FROM students ORDER BY Student_ID LIMIT %s", (count,))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            close_connection(connection)
+
+    def write_one(self, scan):
+        ok = self.crud.insert_attendance(scan.student_id, scan.date, scan.meal_type, 1)
+        # insert_attendance reports failure as False; the cause is worked out
+        # afterwards from the other scans of the same key (see classify)
+        return OK if ok else FAILED
+
+    def write_batch(self, scans):
+        attendance_ids = self.crud.insert_attendance_batch(
+            [(scan.student_id, scan.date, scan.meal_type, 1) for scan in scans])
+        if attendance_ids is None:
+            return [ERROR] * len(scans)
+        return [OK if attendance_id is not None else DUPLICATE for attendance_id in attendance_ids]
+
+    def lock_counters(self):
+        """
+        InnoDB row-lock status and deadlock/timeout metrics (server-wide)
+        """
+        from core.db_connection import create_connection, close_connection
+        connection = create_connection()
+        if connection is None:
+            return {}
+        counters = {}
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%'")
+            counters.update({name: int(value) for name, value in cursor.fetchall()})
+            try:
+                cursor.execute("SELECT NAME, COUNT FROM information_schema.INNODB_METRICS "
+                               "WHERE NAME IN ('lock_deadlocks', 'lock_timeouts')")
+                counters.update({name: int(value) for name, value in cursor.fetchall()})
+            except self.crud.Error:
+                pass
+            return counters
+        finally:
+            cursor.close()
+            close_connection(connection)
+
+    def lock_report(self, before, after):
+        delta = {name: after[name] - before.get(name, 0) for name in after}
+        report = {
+            'row_lock_waits': delta.get('Innodb_row_lock_waits'),
+            'row_lock_time_ms': delta.get('Innodb_row_lock_time'),
+            'row_lock_time_max_ms': after.get('Innodb_row_lock_time_max'),
+        }
+        if 'lock_deadlocks' in delta:
+            report['deadlocks'] = delta['lock_deadlocks']
+            report['lock_wait_timeouts'] = delta['lock_timeouts']
+        return report
+
+    def cleanup(self, start, end):
+        self.crud.delete_attendance_range(start, end)
+
+    def close(self):
+        pass
+
+
+class SqliteBackend:
+    """
+    Embedded stand-in: daily_attendance + rollup in a temp sqlite file (WAL),
+    one connection per thread, insert_attendance's statements translated
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = """
+    CREATE TABLE students (student_id INTEGER PRIMARY KEY);
+    CREATE TABLE daily_attendance (
+        attendance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL REFERENCES students(student_id),
+        date TEXT NOT NULL,
+        meal_type TEXT NOT NULL,
+        is_present INTEGER DEFAULT 1,
+        recorded_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (student_id, date, meal_type)
+    );
+    CREATE INDEX idx_attendance_date ON daily_attendance (date, attendance_id);
+    CREATE TABLE student_attendance_rollup (
+        student_id INTEGER PRIMARY KEY,
+        meals_total INTEGER NOT NULL DEFAULT 0,
+        meals_present INTEGER NOT NULL DEFAULT 0,
+        last_seen TEXT
+    );
+    """
+    INSERT = "INSERT INTO daily_attendance (student_id, date, meal_type, is_present) VALUES (?, ?, ?, ?)"
+    ROLLUP = """
+    INSERT INTO student_attendance_rollup (student_id, meals_total, meals_present, last_seen)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (student_id) DO UPDATE SET
+        meals_total = meals_total + excluded.meals_total,
+        meals_present = meals_present + excluded.meals_present,
+        last_seen = MAX(COALESCE(last_seen, excluded.last_seen), excluded.last_seen)
+    """
+
+    def __init__(self, students):
+        self.directory = tempfile.mkdtemp(prefix='hostel_load_')
+        self.path = os.path.join(self.directory, 'attendance.db')
+        self.students = students
+        self._local = threading.local()
+        self._connections = []
+        self._stats_lock = threading.Lock()
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        self.lock_wait_max = 0.0
+        self.busy_timeouts = 0
+
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        connection.executemany("INSERT INTO students VALUES (?)", [(i,) for i in range(1, students + 1)])
+        connection.commit()
+        connection.close()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                         timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            with self._stats_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _begin(self, connection):
+        """
+        BEGIN IMMEDIATE takes the write lock; time spent here is lock wait
+        """
+        started = time.perf_counter()
+        connection.execute("BEGIN IMMEDIATE")
+        waited = time.perf_counter() - started
+        if waited >= SQLITE_LOCK_WAIT_SECONDS:
+            with self._stats_lock:
+                self.lock_waits += 1
+                self.lock_wait_seconds += waited
+                self.lock_wait_max = max(self.lock_wait_max, waited)
+
+    def _busy(self):
+        with self._stats_lock:
+            self.busy_timeouts += 1
+
+    def student_ids(self, count):
+        return list(range(1, min(count, self.students) + 1))
+
+    def write_one(self, scan):
+        return self.write_batch([scan])[0]
+
+    def write_batch(self, scans):
+        connection = self._connection()
+        try:
+            self._begin(connection)
+        except sqlite3.OperationalError:
+            self._busy()
+            return [LOCKED] * len(scans)
+        outcomes = []
+        try:
+            for scan in scans:
+                day = str(scan.date)
+                try:
+                    # A failed statement is undone on its own; the transaction stays open
+                    connection.execute(self.INSERT, (scan.student_id, day, scan.meal_type, 1))
+                    connection.execute(self.ROLLUP, (scan.student_id, 1, 1, day))
+                    outcomes.append(OK)
+                except sqlite3.IntegrityError:
+                    outcomes.append(DUPLICATE)
+            connection.execute("COMMIT")
+            return outcomes
+        except sqlite3.OperationalError:
+            connection.execute("ROLLBACK")
+            self._busy()
+            return [LOCKED] * len(scans)
+
+    def lock_counters(self):
+        return {}
+
+    def lock_report(self, before, after):
+        return {
+            'write_lock_waits': self.lock_waits,
+            'write_lock_wait_ms': round(self.lock_wait_seconds * 1000, 1),
+            'write_lock_wait_max_ms': round(self.lock_wait_max * 1000, 1),
+            'busy_timeouts': self.busy_timeouts,
+        }
+
+    def cleanup(self, start, end):
+        pass
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# ==================== WRITE PATHS ====================
+
+class GroupCommitWriter:
+    """
+    Batched write path: terminals submit scans and wait; one writer thread
+    commits whatever has queued up (up to batch_size) in one transaction
+    """
+
+    def __init__(self, backend, batch_size=DEFAULT_BATCH, max_wait=BATCH_WAIT_SECONDS):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, scan):
+        future = Future()
+        with self._condition:
+            self._pending.append((scan, future))
+            self._condition.notify()
+        return future.result()
+
+    def _take(self):
+        with self._condition:
+            while not self._pending and not self._stopping:
+                self._condition.wait()
+            # Optionally give terminals a moment to add to a small batch
+            deadline = time.perf_counter() + self.max_wait
+            while len(self._pending) < self.batch_size and not self._stopping:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                outcomes = self.backend.write_batch([scan for scan, _ in batch])
+            except Exception:
+                outcomes = [ERROR] * len(batch)
+            self.batches += 1
+            for (_, future), outcome in zip(batch, outcomes):
+                future.set_result(outcome)
+
+    def close(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
+
+
+# ==================== RUN ====================
+
+def _terminal(queue, submit, start, records):
+    for scan in queue:
+        delay = start + scan.due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        called = time.perf_counter()
+        try:
+            outcome = submit(scan)
+        except Exception:
+            outcome = ERROR
+        finished = time.perf_counter()
+        records.append((scan, outcome, called - start, finished - start))
+
+
+def classify(records):
+    """
+    Resolve FAILED outcomes (mysql per-call returns only False): a failed
+    scan of a key that another scan committed is a duplicate-key rejection
+    """
+    committed = {(scan.student_id, scan.date, scan.meal_type)
+                 for scan, outcome, _, _ in records if outcome == OK}
+    resolved = []
+    for scan, outcome, called, finished in records:
+        if outcome == FAILED:
+            key = (scan.student_id, scan.date, scan.meal_type)
+            outcome = DUPLICATE if key in committed else ERROR
+        resolved.append((scan, outcome, called, finished))
+    return resolved
+
+
+def run_load(backend, terminals=DEFAULT_TERMINALS, students=DEFAULT_STUDENTS, mode='per_call',
+             rush_seconds=DEFAULT_RUSH_SECONDS, duplicate_rate=DEFAULT_DUPLICATE_RATE,
+             batch_size=DEFAULT_BATCH, meals=1, day_offset=0, seed=0):
+    """
+    Replay `meals` mess openings (one after another) on `terminals` threads
+    Returns the report dict, None if no students are available
+    """
+    student_ids = backend.student_ids(students)
+    if not student_ids:
+        return None
+    day = LOAD_START + timedelta(days=day_offset)
+    records = []
+    before = backend.lock_counters()
+    writer = GroupCommitWriter(backend, batch_size) if mode == 'batched' else None
+    submit = writer.submit if writer else backend.write_one
+
+    wall_started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for meal in range(meals):
+            meal_type = MEAL_TYPES[meal % len(MEAL_TYPES)]
+            meal_day = day + timedelta(days=meal // len(MEAL_TYPES))
+            queues = rush_schedule(student_ids, terminals, rush_seconds, duplicate_rate,
+                                   meal_day, meal_type, seed + meal)
+            start = time.perf_counter()
+            per_terminal = [[] for _ in queues]
+            threads = [threading.Thread(target=_terminal, args=(queue, submit, start, out),
+                                        name=f'terminal-{i}')
+                       for i, (queue, out) in enumerate(zip(queues, per_terminal))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # Shift each meal onto one timeline
+            offset = start - wall_started
+            records.extend((scan._replace(due=scan.due + offset), outcome, called + offset, finished + offset)
+                           for out in per_terminal for scan, outcome, called, finished in out)
+        if writer:
+            writer.close()
+    wall = time.perf_counter() - wall_started
+
+    report = summarize(classify(records), wall)
+    report.update({
+        'backend': backend.name,
+        'mode': mode,
+        'terminals': terminals,
+        'students': len(student_ids),
+        'meals': meals,
+        'rush_seconds': rush_seconds,
+        'batches': writer.batches if writer else None,
+        'locks': backend.lock_report(before, backend.lock_counters()),
+    })
+    with redirect_stdout(io.StringIO()):
+        backend.cleanup(day, day + timedelta(days=meals // len(MEAL_TYPES) + 1))
+    return report
+
+
+def summarize(records, wall):
+    """
+    Throughput and latency percentiles from (scan, outcome, called, finished) records
+    """
+    outcomes = np.array([outcome for _, outcome, _, _ in records])
+    due = np.array([scan.due for scan, _, _, _ in records])
+    called = np.array([record[2] for record in records])
+    finished = np.array([record[3] for record in records])
+    latency = (finished - due) * 1000
+    service = (finished - called) * 1000
+    committed = outcomes == OK
+    per_second = np.bincount(finished[committed].astype(int)) if committed.any() else np.array([0])
+
+    def percentiles(values):
+        if len(values) == 0:
+            return {}
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {'p50': round(p50, 2), 'p90': round(p90, 2), 'p99': round(p99, 2), 'max': round(values.max(), 2)}
+
+    return {
+        'scans': len(records),
+        'committed': int(committed.sum()),
+        'duplicates_rejected': int((outcomes == DUPLICATE).sum()),
+        'lock_timeouts': int((outcomes == LOCKED).sum()),
+        'errors': int((outcomes == ERROR).sum()),
+        'wall_seconds': round(wall, 3),
+        'throughput_per_sec': round(committed.sum() / wall, 1) if wall > 0 else None,
+        'peak_second_commits': int(per_second.max()),
+        # Arrival to commit: what the student at the counter waits
+        'latency_ms': percentiles(latency),
+        # Time inside the write call only
+        'service_ms': percentiles(service[committed]),
+    }
+
+
+def print_report(report):
+    print(f"\n▶ {report['backend']} / {report['mode']} / {report['terminals']} terminal(s), "
+          f"{report['students']} students x {report['meals']} meal(s), rush {report['rush_seconds']}s")
+    print(f"   Scans {report['scans']}: committed {report['committed']}, "
+          f"duplicate-key rejected {report['duplicates_rejected']}, "
+          f"lock timeouts {report['lock_timeouts']}, other errors {report['errors']}")
+    print(f"   Throughput {report['throughput_per_sec']}/s over {report['wall_seconds']}s "
+          f"(peak {report['peak_second_commits']} commits in one second)"
+          + (f", {report['batches']} batches" if report['batches'] else ""))
+    for label in ('latency_ms', 'service_ms'):
+        values = report[label]
+        if values:
+            print(f"   {label:<11} p50 {values['p50']:8.2f}  p90 {values['p90']:8.2f}  "
+                  f"p99 {values['p99']:8.2f}  max {values['max']:8.2f}")
+    print("   Locks: " + ", ".join(f"{name} {value}" for name, value in report['locks'].items()))
+
+
+# Run: python core/load_test.py --backend sqlite --terminals 8 [--mode batched] [--sweep 1 2 4 8 16]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Concurrent scanner-terminal load test")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--mode', choices=['per_call', 'batched'], default='per_call')
+    parser.add_argument('--terminals', type=int, default=DEFAULT_TERMINALS)
+    parser.add_argument('--sweep', type=int, nargs='+', metavar='N',
+                        help="repeat for each terminal count (capacity curve)")
+    parser.add_argument('--students', type=int, default=DEFAULT_STUDENTS)
+    parser.add_argument('--meals', type=int, default=1, help="mess openings to replay")
+    parser.add_argument('--rush-seconds', type=float, default=DEFAULT_RUSH_SECONDS,
+                        help="length of the opening rush (shorter = heavier load)")
+    parser.add_argument('--duplicate-rate', type=float, default=DEFAULT_DUPLICATE_RATE)
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help="max scans per group commit")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("       SCANNER TERMINAL LOAD TEST")
+    print("="*60)
+
+    if args.backend == 'mysql':
+        backend = MySQLBackend()
+    else:
+        backend = SqliteBackend(args.students)
+    try:
+        for run, terminals in enumerate(args.sweep or [args.terminals]):
+            report = run_load(backend, terminals, args.students, args.mode, args.rush_seconds,
+                              args.duplicate_rate, args.batch, args.meals, day_offset=run * 10)
+            if report is None:
+                print("No students available; configure core/config.py and load data first")
+                sys.exit(1)
+            print_report(report)
+    finally:
+        backend.close()
@@ -0,0 +1,186 @@
+import pandas as pd
+from mysql.connector import Error
+from core.db_connection import create_connection, close_connection
+from core.profiling import instrument_module
+
+
+def save_meal_predictions(predictions, model_name='LinearRegression'):
+    """
+    Bulk upsert forecasts into daily_meal_summary in one transaction
+    predictions: iterable of dicts with date, meal_type, predicted,
+    confidence_score and optional decision_quantity (kg)
+    Existing rows keep their actual total_present
+    """
+    rows = [
+        (
+            str(p['date'])[:10],
+            p['meal_type'],
+            int(p['predicted']),
+            model_name,
+            float(p['confidence_score']),
+            None if pd.isna(p.get('decision_quantity')) else round(float(p['decision_quantity']), 2)
+        )
+        for p in predictions
+    ]
+    if not rows:
+        return 0
+
+    connection = create_connection()
+    if not connection:
+        return 0
+
+    try:
+        cursor = connection.cursor()
+        # total_present is NOT NULL; future dates start at 0 until attendance arrives
+        query = """
+        INSERT INTO daily_meal_summary
+            (date, meal_type, total_present, predicted_students,
+             prediction_model, confidence_score, decision_quantity)
+        VALUES (%s, %s, 0, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            predicted_students = VALUES(predicted_students),
+            prediction_model = VALUES(prediction_model),
+            confidence_score = VALUES(confidence_score),
+            decision_quantity = VALUES(decision_quantity)
+        """
+        cursor.executemany(query, rows)
+        connection.commit()
+
+        print(f"Saved {len(rows)} predictions to daily_meal_summary")
+        return len(rows)
+
+    except Error as e:
+        connection.rollback()
+        print(f"Error saving predictions: {e}")
+        return 0
+    finally:
+        cursor.close()
+        close_connection(connection)
+
+
+def refresh_meal_actuals(day, meal_type=None):
+    """
+    Recompute daily_meal_summary.total_present for one day (optionally one
+    meal) from daily_attendance; predictions on existing rows are kept
+    Returns number of meal rows for the day, None on failure
+    """
+    connection = create_connection()
+    if not connection:
+        return None
+
+    try:
+        cursor = connection.cursor()
+        # Reads only the day's rows through the (date, attendance_id) index
+        query = """
+        INSERT INTO daily_meal_summary (date, meal_type, total_present)
+        SELECT date, meal_type, SUM(is_present = 1)
+        FROM daily_attendance
+        WHERE date = %s AND (%s IS NULL OR meal_type = %s)
+        GROUP BY date, meal_type
+        ON DUPLICATE KEY UPDATE total_present = VALUES(total_present)
+        """
+        cursor.execute(query, (str(day)[:10], meal_type, meal_type))
+        connection.commit()
+        # ON DUPLICATE KEY counts 2 per updated row; report meals instead
+        cursor.execute(
+            "SELECT COUNT(*) FROM daily_meal_summary WHERE date = %s AND (%s IS NULL OR meal_type = %s)",
+            (str(day)[:10], meal_type, meal_type))
+        return int(cursor.fetchone()[0])
+
+    except Error as e:
+        connection.rollback()
+        print(f"Error refreshing meal summary: {e}")
+        return None
+    finally:
+        cursor.close()
+        close_connection(connection)
+
+
+def fetch_day_summary(day):
+    """
+    daily_meal_summary rows for one day (actuals, prediction, food kg)
+    Returns list of dicts in meal order, None on failure
+    """
+    connection = create_connection(read_only=True)
+    if not connection:
+        return None
+
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = """
+        SELECT date, meal_type, total_present, predicted_students, prediction_model,
+               confidence_score, decision_quantity, food_prepared_kg, food_consumed_kg, wastage_kg
+        FROM daily_meal_summary
+        WHERE date = %s
+        ORDER BY FIELD(meal_type, 'Breakfast', 'Lunch', 'Dinner')
+        """
+        cursor.execute(query, (str(day)[:10],))
+        rows = cursor.fetchall()
+        # DECIMAL columns come back as Decimal
+        return [{key: float(value) if hasattr(value, 'as_tuple') else value for key, value in row.items()}
+                for row in rows]
+
+    except Error as e:
+        print(f"Error fetching meal summary: {e}")
+        return None
+    finally:
+        cursor.close()
+        close_connection(connection)
+
+
+FORECAST_BATCH_ROWS = 5000
+
+
+def save_forecast_rows(forecasts):
+    """
+    Bulk upsert a forecast job's output (ml/forecast_job.py) into meal_forecasts
+    forecasts: DataFrame with hall, meal_type, scenario, lead_days, date,
+    predicted, lower, upper, confidence_score, plan_headcount
+    Rows are sent in batches of FORECAST_BATCH_ROWS, one transaction in total
+    """
+    if forecasts is None or len(forecasts) == 0:
+        return 0
+
+    columns = ['hall', 'meal_type', 'scenario', 'lead_days', 'date', 'predicted',
+               'lower', 'upper', 'confidence_score', 'plan_headcount']
+    frame = forecasts[columns].copy()
+    frame['date'] = pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d')
+    rows = [tuple(row) for row in frame.astype(object).itertuples(index=False)]
+
+    connection = create_connection()
+    if not connection:
+        return 0
+
+    try:
+        cursor = connection.cursor()
+        query = """
+        INSERT INTO meal_forecasts
+            (hall, meal_type, scenario, lead_days, forecast_date, predicted_students,
+             lower_bound, upper_bound, confidence_score, plan_headcount)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            lead_days = VALUES(lead_days),
+            predicted_students = VALUES(predicted_students),
+            lower_bound = VALUES(lower_bound),
+            upper_bound = VALUES(upper_bound),
+            confidence_score = VALUES(confidence_score),
+            plan_headcount = VALUES(plan_headcount),
+            generated_at = CURRENT_TIMESTAMP
+        """
+        for start in range(0, len(rows), FORECAST_BATCH_ROWS):
+            cursor.executemany(query, rows[start:start + FORECAST_BATCH_ROWS])
+        connection.commit()
+
+        print(f"Saved {len(rows)} forecasts to meal_forecasts")
+        return len(rows)
+
+    except Error as e:
+        connection.rollback()
+        print(f"Error saving forecasts: {e}")
+        return 0
+    finally:
+        cursor.close()
+        close_connection(connection)
+
+
+instrument_module(__name__)
@@ -0,0 +1,236 @@
+"""
+Typed data contracts for the frames passed between pipeline stages.
+Each artifact (attendance summary, per-hall summary, student-level
+records, ...) declares its columns once: dtype, range, nullability,
+allowed categories and key. Schema.conform() checks everything in one
+vectorized pass per column, reports every problem at once, and returns
+the frame downcast to compact dtypes (int16 counts, categorical meals).
+ML artifacts (features, train/test) are declared in ml/features.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+# daily_attendance.meal_type ENUM, in encoding order
+MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner']
+
+INTEGER_DTYPES = ('int8', 'int16', 'int32', 'int64')
+FLOAT_DTYPES = ('float32', 'float64')
+
+
+class SchemaError(ValueError):
+    """
+    A frame does not match its declared schema; .errors lists every problem
+    """
+
+    def __init__(self, schema_name, errors):
+        self.schema_name = schema_name
+        self.errors = list(errors)
+        super().__init__(f"{schema_name}: " + "; ".join(self.errors))
+
+
+class Column:
+    """
+    One declared column
+    dtype: int8/16/32/64, float32/64, category, datetime or string
+    """
+
+    def __init__(self, name, dtype, nullable=False, min_value=None, max_value=None, categories=None):
+        if dtype == 'category' and not categories:
+            raise ValueError(f"Column {name}: category columns need categories (or use 'string')")
+        self.name = name
+        self.dtype = dtype
+        self.nullable = nullable
+        self.min_value = min_value
+        self.max_value = max_value
+        self.categories = list(categories) if categories else None
+
+    def _coerce(self, series):
+        """
+        (values in the target kind, mask of values that could not be converted)
+        """
+        nulls = series.isna()
+        if self.dtype in INTEGER_DTYPES or self.dtype in FLOAT_DTYPES:
+            values = pd.to_numeric(series, errors='coerce')
+        elif self.dtype == 'datetime':
+            values = pd.to_datetime(series, errors='coerce')
+        elif self.dtype == 'category':
+            values = series.astype(object).where(~nulls, None)
+            return values, ~nulls & ~values.isin(self.categories)
+        else:
+            return series, pd.Series(False, index=series.index)
+        return values, values.isna() & ~nulls
+
+    def _cast(self, values):
+        if self.dtype in INTEGER_DTYPES:
+            if self.nullable and values.isna().any():
+                return values.astype(self.dtype.capitalize())
+            return values.to_numpy().astype(self.dtype)
+        if self.dtype in FLOAT_DTYPES:
+            return values.to_numpy(dtype=self.dtype)
+        if self.dtype == 'category':
+            return pd.Categorical(values, categories=self.categories)
+        return values
+
+    def check(self, series):
+        """
+        Returns (converted values or None, list of problems)
+        """
+        errors = []
+        values, bad = self._coerce(series)
+        if bad.any():
+            examples = series[bad].unique()[:3].tolist()
+            expected = f"one of {self.categories}" if self.dtype == 'category' else self.dtype
+            errors.append(f"{self.name}: {int(bad.sum())} value(s) not {expected}, e.g. {examples}")
+        if not self.nullable:
+            missing = int(series.isna().sum())
+            if missing:
+                errors.append(f"{self.name}: {missing} null value(s)")
+        if self.dtype in INTEGER_DTYPES:
+            fractional = values.notna() & (values % 1 != 0)
+            if fractional.any():
+                errors.append(f"{self.name}: {int(fractional.sum())} non-integer value(s)")
+            info = np.iinfo(self.dtype)
+            low = info.min if self.min_value is None else max(info.min, self.min_value)
+            high = info.max if self.max_value is None else min(info.max, self.max_value)
+        else:
+            low, high = self.min_value, self.max_value
+        if low is not None or high is not None:
+            outside = pd.Series(False, index=values.index)
+            if low is not None:
+                outside |= values < low
+            if high is not None:
+                outside |= values > high
+            if outside.any():
+                errors.append(f"{self.name}: {int(outside.sum())} value(s) outside [{low}, {high}], "
+                              f"e.g. {values[outside].iloc[:3].tolist()}")
+        return (None if errors else values), errors
+
+
+class Schema:
+    """
+    Declared columns of one artifact, its key and row-level checks
+    checks: list of (description, function(df) -> boolean Series that must hold)
+    """
+
+    def __init__(self, name, columns, key=None, checks=None):
+        self.name = name
+        self.columns = list(columns)
+        self.key = list(key or [])
+        self.checks = list(checks or [])
+
+    @property
+    def names(self):
+        return [column.name for column in self.columns]
+
+    def conform(self, df, extra='keep'):
+        """
+        Validate df and return it with declared dtypes (declared columns
+        first; other columns kept, or dropped with extra='drop')
+        Raises SchemaError listing every problem found
+        """
+        errors = []
+        missing = [name for name in self.names if name not in df.columns]
+        if missing:
+            errors.append(f"missing column(s) {missing}")
+
+        converted = {}
+        for column in self.columns:
+            if column.name in df.columns:
+                values, column_errors = column.check(df[column.name])
+                errors.extend(column_errors)
+                if values is not None:
+                    converted[column.name] = column._cast(values)
+
+        if not errors and self.key:
+            duplicates = int(df.duplicated(self.key).sum())
+            if duplicates:
+                errors.append(f"{duplicates} duplicate row(s) for key {self.key}")
+        if not errors:
+            for description, check in self.checks:
+                failed = int((~check(df)).sum())
+                if failed:
+                    errors.append(f"{failed} row(s) violate {description}")
+        if errors:
+            raise SchemaError(self.name, errors)
+
+        result = pd.DataFrame(converted, index=df.index)
+        if extra == 'keep':
+            others = [name for name in df.columns if name not in converted]
+            result = pd.concat([result, df[others]], axis=1) if others else result
+        return result
+
+    def validate(self, df):
+        """
+        Raise SchemaError if df does not match; returns df unchanged
+        """
+        self.conform(df, extra='drop')
+        return df
+
+    def read_csv(self, path, extra='keep', **kwargs):
+        """
+        Read a CSV artifact and conform it
+        """
+        return self.conform(pd.read_csv(path, **kwargs), extra=extra)
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+# Daily headcounts per meal (data_to_pandas, data_loader, attendance_summary.csv)
+# students_present: attendance rows recorded; actual_attended: rows with is_present = 1
+ATTENDANCE_SUMMARY = Schema(
+    'attendance_summary',
+    [
+        Column('date', 'datetime'),
+        Column('meal_type', 'category', categories=MEAL_TYPES),
+        Column('students_present', 'int16', min_value=0),
+        Column('actual_attended', 'int16', min_value=0),
+    ],
+    key=['date', 'meal_type'],
+    checks=[('actual_attended <= students_present',
+             lambda df: df['actual_attended'] <= df['students_present'])],
+)
+
+# Same counts per hall (data_loader.fetch_hall_attendance_data, hall_attendance_summary.csv)
+HALL_ATTENDANCE_SUMMARY = Schema(
+    'hall_attendance_summary',
+    [Column('hall', 'string')] + ATTENDANCE_SUMMARY.columns,
+    key=['hall', 'date', 'meal_type'],
+    checks=ATTENDANCE_SUMMARY.checks,
+)
+
+# Student-level rows (data_loader.fetch_attendance_records)
+ATTENDANCE_RECORDS = Schema(
+    'attendance_records',
+    [
+        Column('date', 'datetime'),
+        Column('meal_type', 'category', categories=MEAL_TYPES),
+        Column('student_id', 'int32', min_value=1),
+        Column('is_present', 'int8', min_value=0, max_value=1),
+    ],
+    key=['student_id', 'date', 'meal_type'],
+)
+
+
+# Check the summary CSV and show the memory saved by the compact dtypes
+if __name__ == "__main__":
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'data', 'attendance_summary.csv')
+    raw = pd.read_csv(path)
+    df = ATTENDANCE_SUMMARY.conform(raw)
+    print(f"{ATTENDANCE_SUMMARY.name}: {len(df)} rows OK")
+    print(df.dtypes.to_string())
+    print(f"Memory: {memory_mb(raw):.3f} MB -> {memory_mb(df):.3f} MB")
+
+    broken = raw.head(6).copy()
+    broken.loc[0, 'meal_type'] = 'Brunch'
+    broken.loc[1, 'actual_attended'] = -3
+    broken.loc[2, 'students_present'] = None
+    try:
+        ATTENDANCE_SUMMARY.conform(broken)
+    except SchemaError as e:
+        print(f"\nRejected as expected:\n   " + "\n   ".join(e.errors))
@@ -0,0 +1,413 @@
+"""
+Multi-hall sharded deployment: every hall's students (and their attendance,
+rollup rows, ...) live in one of several databases listed in
+config.SHARDS. Writes are routed by room (new students) or by student /
+attendance ID; the advanced_queries aggregates run on all shards in
+parallel and the partial results are merged here.
+
+Without SHARDS in config.py there is one shard (DB_CONFIG) and every
+function behaves like its unsharded counterpart.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from mysql.connector import Error
+from core.db_connection import create_connection, close_connection, use_shard, current_shard
+from core.halls import hall_from_room
+from core import crud_operations as crud
+from core import advanced_queries as aq
+from core.profiling import instrument_module
+
+# Shard i hands out Student_ID / Attendance_ID values in
+# [i * SHARD_ID_SPAN + 1, (i + 1) * SHARD_ID_SPAN], so an ID alone names its shard
+DEFAULT_SHARD_ID_SPAN = 10_000_000
+# Hall wildcard: a shard listing it takes every hall not listed elsewhere
+ANY_HALL = '*'
+
+
+class ShardMap:
+    """
+    Hall (room_no prefix) -> shard name, and ID range -> shard name
+    shards: list of {'name': ..., 'halls': [...]} (config.SHARDS order)
+    """
+
+    def __init__(self, shards=None, id_span=DEFAULT_SHARD_ID_SPAN):
+        shards = shards or []
+        self.names = [entry['name'] for entry in shards] or [None]
+        self.id_span = id_span
+        self.by_hall = {}
+        self.fallback = None
+        for entry in shards:
+            for hall in entry.get('halls', []):
+                hall = str(hall).upper()
+                if hall == ANY_HALL:
+                    self.fallback = entry['name']
+                elif hall in self.by_hall:
+                    raise ValueError(f"Hall {hall} is mapped to shards {self.by_hall[hall]} and {entry['name']}")
+                else:
+                    self.by_hall[hall] = entry['name']
+
+    @classmethod
+    def from_config(cls):
+        """
+        Shard map from config.SHARDS / SHARD_ID_SPAN (single shard if unset)
+        """
+        try:
+            import core.config as settings
+        except ImportError:
+            return cls()
+        return cls(getattr(settings, 'SHARDS', None),
+                   getattr(settings, 'SHARD_ID_SPAN', DEFAULT_SHARD_ID_SPAN))
+
+    @property
+    def sharded(self):
+        return self.names != [None]
+
+    def for_hall(self, hall):
+        if not self.sharded:
+            return None
+        shard = self.by_hall.get(str(hall).upper(), self.fallback)
+        if shard is None:
+            raise KeyError(f"No shard serves hall {hall}")
+        return shard
+
+    def for_room(self, room_no):
+        return self.for_hall(hall_from_room(room_no))
+
+    def for_id(self, row_id):
+        """
+        Shard that issued a Student_ID or Attendance_ID
+        """
+        if not self.sharded:
+            return None
+        index = (int(row_id) - 1) // self.id_span
+        if not 0 <= index < len(self.names):
+            raise KeyError(f"ID {row_id} is outside every shard's range")
+        return self.names[index]
+
+    for_student = for_id
+
+    def id_range(self, shard):
+        """
+        (first, last) ID issued by a shard
+        """
+        index = self.names.index(shard)
+        return index * self.id_span + 1, (index + 1) * self.id_span
+
+
+_shard_map = None
+
+
+def get_shard_map():
+    global _shard_map
+    if _shard_map is None:
+        _shard_map = ShardMap.from_config()
+    return _shard_map
+
+
+def map_shards(fn, *args, shards=None, **kwargs):
+    """
+    Run fn(*args, **kwargs) once per shard, in parallel threads, each under
+    use_shard() so every create_connection() inside goes to that shard
+    Returns {shard: result}
+    """
+    shards = shards if shards is not None else get_shard_map().names
+
+    def run(shard):
+        with use_shard(shard):
+            return fn(*args, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        return dict(zip(shards, pool.map(run, shards)))
+
+
+def _fetch_rows(query, params):
+    connection = create_connection(read_only=True)
+    if not connection:
+        return None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    except Error as e:
+        print(f"Error: {e}")
+        return None
+    finally:
+        cursor.close()
+        close_connection(connection)
+
+
+def scatter_gather(query, params=(), shards=None):
+    """
+    Run a read query on every shard in parallel
+    Returns {shard: rows}, or None if any shard failed (a partial
+    aggregate would be silently wrong)
+    """
+    results = map_shards(_fetch_rows, query, params, shards=shards)
+    failed = [shard for shard, rows in results.items() if rows is None]
+    if failed:
+        print(f"Scatter-gather failed on shard(s): {', '.join(map(str, failed))}")
+        return None
+    return results
+
+
+def _concat(results):
+    return [row for rows in results.values() for row in rows]
+
+
+def _nulls_first(value):
+    # MySQL sorts NULL before any value in ascending order
+    return (value is not None, value if value is not None else 0)
+
+
+# ==================== ROUTED CRUD ====================
+
+def insert_student(Name, Room_NO, Department, Join_Date):
+    """
+    INSERT on the shard serving the student's hall
+    """
+    with use_shard(get_shard_map().for_room(Room_NO)):
+        return crud.insert_student(Name, Room_NO, Department, Join_Date)
+
+
+def insert_attendance(Student_ID, Date, Meal_Type, Is_Present=1):
+    with use_shard(get_shard_map().for_student(Student_ID)):
+        return crud.insert_attendance(Student_ID, Date, Meal_Type, Is_Present)
+
+
+def get_student_by_id(Student_ID, raw=False):
+    with use_shard(get_shard_map().for_student(Student_ID)):
+        return crud.get_student_by_id(Student_ID, raw)
+
+
+def update_student(Student_ID, Name=None, Room_NO=None, Department=None):
+    """
+    UPDATE on the student's shard
+    Moving to a room in a hall served by another shard is rejected:
+    that is a migration (copy student and attendance, then delete)
+    """
+    shard_map = get_shard_map()
+    shard = shard_map.for_student(Student_ID)
+    if Room_NO and shard_map.for_room(Room_NO) != shard:
+        print(f"Room {Room_NO} belongs to shard {shard_map.for_room(Room_NO)}, "
+              f"student {Student_ID} lives on {shard}; migrate instead")
+        return False
+    with use_shard(shard):
+        return crud.update_student(Student_ID, Name, Room_NO, Department)
+
+
+def update_attendance(Attendance_ID, Is_Present):
+    with use_shard(get_shard_map().for_id(Attendance_ID)):
+        return crud.update_attendance(Attendance_ID, Is_Present)
+
+
+def delete_student(Student_ID):
+    with use_shard(get_shard_map().for_student(Student_ID)):
+        return crud.delete_student(Student_ID)
+
+
+def delete_attendance(Attendance_ID):
+    with use_shard(get_shard_map().for_id(Attendance_ID)):
+        return crud.delete_attendance(Attendance_ID)
+
+
+def get_all_students():
+    """
+    Students of every shard, ordered by Student_ID
+    """
+    results = map_shards(crud.get_all_students)
+    if any(rows is None for rows in results.values()):
+        return None
+    return sorted(_concat(results), key=lambda row: row['Student_ID'])
+
+
+def get_attendance_by_date(date):
+    results = map_shards(crud.get_attendance_by_date, date)
+    if any(rows is None for rows in results.values()):
+        return None
+    return sorted(_concat(results), key=lambda row: (row['Meal_Type'], row['Name']))
+
+
+def init_shard_id_ranges():
+    """
+    Start each shard's AUTO_INCREMENT counters at the bottom of its ID range
+    (run once after creating the schema on every shard database)
+    """
+    shard_map = get_shard_map()
+    if not shard_map.sharded:
+        print("No SHARDS configured; nothing to do")
+        return
+
+    def start_counters(shard):
+        first, _ = shard_map.id_range(shard)
+        connection = create_connection(pooled=False)
+        if not connection:
+            return False
+        try:
+            cursor = connection.cursor()
+            for table in ('students', 'daily_attendance'):
+                # MySQL keeps the counter above existing rows if they are higher
+                cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = {int(first)}")
+            print(f"Shard {shard}: IDs start at {first}")
+            return True
+        except Error as e:
+            print(f"Error initialising shard {shard}: {e}")
+            return False
+        finally:
+            cursor.close()
+            close_connection(connection)
+
+    return map_shards(lambda: start_counters(current_shard()))
+
+
+# ==================== SCATTER-GATHER ANALYTICS ====================
+
+# Query 3 in two phases: shards report their per-student totals, the
+# global average is computed here, then each shard filters against it
+QUERY_3_STATS_SQL = """
+SELECT COUNT(*) as students, COALESCE(SUM(attendance_count), 0) as total_present
+FROM (
+    SELECT COUNT(*) as attendance_count
+    FROM daily_attendance
+    WHERE is_present = 1
+    GROUP BY student_id
+) as per_student
+"""
+
+QUERY_3_ABOVE_SQL = """
+SELECT
+    s.student_id,
+    s.name,
+    s.department,
+    COUNT(da.attendance_id) as total_attendance
+FROM students s
+INNER JOIN daily_attendance da ON s.student_id = da.student_id
+WHERE da.is_present = 1
+GROUP BY s.student_id, s.name, s.department
+HAVING COUNT(da.attendance_id) > %s
+ORDER BY total_attendance DESC
+"""
+
+
+def sharded_query_1(use_rollup=False):
+    """
+    Query 1 on every shard; students are disjoint, so rows concatenate
+    """
+    results = scatter_gather(aq.QUERY_1_ROLLUP_SQL if use_rollup else aq.QUERY_1_SQL)
+    if results is None:
+        return None
+    return sorted(_concat(results), key=lambda row: row['total_meals_attended'], reverse=True)
+
+
+def sharded_query_2():
+    """
+    Query 2 on every shard, merged per meal
+    Counts add up exactly (a student's rows all live on one shard, so
+    unique students never overlap); the percentage is recomputed
+    """
+    results = scatter_gather(aq.QUERY_2_SQL)
+    if results is None:
+        return None
+    merged = {}
+    for row in _concat(results):
+        meal = merged.setdefault(row['meal_type'], {'meal_type': row['meal_type'], 'unique_students': 0,
+                                                    'total_records': 0, 'total_present': 0})
+        meal['unique_students'] += row['unique_students']
+        meal['total_records'] += row['total_records']
+        meal['total_present'] += row['total_present'] or 0
+    for meal in merged.values():
+        meal['attendance_percentage'] = (Decimal(100) * meal['total_present'] / meal['total_records']
+                                         if meal['total_records'] else None)
+    return sorted(merged.values(), key=lambda row: row['total_present'], reverse=True)
+
+
+def sharded_query_3():
+    """
+    Query 3 against the average over all shards (not each shard's own)
+    """
+    stats = scatter_gather(QUERY_3_STATS_SQL)
+    if stats is None:
+        return None
+    students = sum(rows[0]['students'] for rows in stats.values())
+    if not students:
+        return []
+    average = sum(rows[0]['total_present'] for rows in stats.values()) / students
+    results = scatter_gather(QUERY_3_ABOVE_SQL, (average,))
+    if results is None:
+        return None
+    return sorted(_concat(results), key=lambda row: row['total_attendance'], reverse=True)
+
+
+def sharded_query_4(use_rollup=False):
+    results = scatter_gather(aq.QUERY_4_ROLLUP_SQL if use_rollup else aq.QUERY_4_SQL)
+    if results is None:
+        return None
+    return sorted(_concat(results), key=lambda row: (row['department'], -row['total_attendance']))
+
+
+def sharded_query_5(limit=20):
+    """
+    Each shard returns its own top rows; the global top is among them
+    """
+    results = scatter_gather(aq.QUERY_5_SQL)
+    if results is None:
+        return None
+    rows = sorted(_concat(results), key=lambda row: (row['meal_type'], row['student_name']))
+    return sorted(rows, key=lambda row: row['date'], reverse=True)[:limit]
+
+
+def sharded_query_6(use_rollup=False):
+    results = scatter_gather(aq.QUERY_6_ROLLUP_SQL if use_rollup else aq.QUERY_6_SQL)
+    if results is None:
+        return None
+    return sorted(_concat(results), key=lambda row: _nulls_first(row['attendance_rate']))
+
+
+instrument_module(__name__)
+
+
+# Try with several local databases, e.g. in config.py:
+#   SHARDS = [{'name': 'north', 'halls': ['1', '2'], 'database': 'hostel_north'},
+#             {'name': 'south', 'halls': ['3', '*'], 'database': 'hostel_south'}]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sharded deployment tools")
+    parser.add_argument('--init', action='store_true', help="set per-shard AUTO_INCREMENT ranges")
+    args = parser.parse_args()
+
+    shard_map = get_shard_map()
+    print("\n" + "="*60)
+    print("SHARD MAP")
+    print("="*60)
+    if not shard_map.sharded:
+        print("Single database (no SHARDS in config.py)")
+    for shard in shard_map.names if shard_map.sharded else []:
+        halls = [hall for hall, name in shard_map.by_hall.items() if name == shard]
+        if shard_map.fallback == shard:
+            halls.append(ANY_HALL)
+        first, last = shard_map.id_range(shard)
+        print(f"   {shard}: halls {', '.join(halls)} | IDs {first}-{last}")
+
+    if args.init:
+        init_shard_id_ranges()
+
+    print("\n🔍 Scatter-gather queries")
+    print("-" * 80)
+    for label, query in [("Q1 attendance summary", sharded_query_1), ("Q2 meal-wise", sharded_query_2),
+                         ("Q3 above average", sharded_query_3), ("Q4 department ranking", sharded_query_4),
+                         ("Q5 attendance report", sharded_query_5), ("Q6 low attendance", sharded_query_6)]:
+        rows = query()
+        print(f"   {label}: {'failed' if rows is None else f'{len(rows)} rows'}")
+    for row in sharded_query_2() or []:
+        print(f"   Meal: {row['meal_type']}, Students: {row['unique_students']}, "
+              f"Total Present: {row['total_present']}, "
+              f"Attendance %: {row['attendance_percentage'] or 0:.2f}%")
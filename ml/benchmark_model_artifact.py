@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import pickle
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from ml.features import FEATURE_COLUMNS
+from ml.model_artifact import LinearModelArtifact, save_linear_model
+
+LOAD_REPEATS = 200
+SINGLE_PREDICT_REPEATS = 2000
+BATCH_ROWS = 100_000
+
+
+def _best_of(fn, repeats):
+    """
+    Run fn repeatedly and return the fastest time in microseconds
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def import_cost_ms(module):
+    """
+    Cold import time of a module in a fresh interpreter (milliseconds)
+    """
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        return time.perf_counter() - start
+
+    baseline = min(run('pass') for _ in range(3))
+    return max(0.0, min(run(f'import {module}') for _ in range(3)) - baseline) * 1000
+
+
+def run_benchmark():
+    """
+    Compare the pickled sklearn model with the JSON artifact for
+    file size, load time and predict latency
+    Returns DataFrame with one row per format
+    """
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.integers(0, 31, size=(1000, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    y = X.to_numpy() @ rng.normal(size=len(FEATURE_COLUMNS)) + 50
+    model = LinearRegression().fit(X, y)
+
+    workdir = tempfile.mkdtemp()
+    pickle_path = os.path.join(workdir, 'model.pkl')
+    json_path = os.path.join(workdir, 'model.json')
+    with open(pickle_path, 'wb') as file:
+        pickle.dump(model, file)
+    save_linear_model(model, json_path, FEATURE_COLUMNS)
+
+    def load_pickle():
+        with open(pickle_path, 'rb') as file:
+            return pickle.load(file)
+
+    pickled = load_pickle()
+    artifact = LinearModelArtifact.load(json_path)
+
+    single_df = X.iloc[[0]]
+    single_array = single_df.to_numpy(dtype=np.float64)
+    batch = pd.DataFrame(rng.integers(0, 31, size=(BATCH_ROWS, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+
+    # Both formats must give the same answers
+    assert np.allclose(pickled.predict(batch), artifact.predict(batch))
+
+    results = [
+        {
+            'format': 'pickle (sklearn)',
+            'size_bytes': os.path.getsize(pickle_path),
+            'load_us': _best_of(load_pickle, LOAD_REPEATS),
+            'predict_1_row_df_us': _best_of(lambda: pickled.predict(single_df), SINGLE_PREDICT_REPEATS),
+            'predict_1_row_array_us': None,
+            f'predict_{BATCH_ROWS}_rows_ms': _best_of(lambda: pickled.predict(batch), 10) / 1000,
+        },
+        {
+            'format': 'json artifact (numpy)',
+            'size_bytes': os.path.getsize(json_path),
+            'load_us': _best_of(lambda: LinearModelArtifact.load(json_path), LOAD_REPEATS),
+            'predict_1_row_df_us': _best_of(lambda: artifact.predict(single_df), SINGLE_PREDICT_REPEATS),
+            'predict_1_row_array_us': _best_of(lambda: artifact.predict(single_array), SINGLE_PREDICT_REPEATS),
+            f'predict_{BATCH_ROWS}_rows_ms': _best_of(lambda: artifact.predict(batch), 10) / 1000,
+        },
+    ]
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("   MODEL ARTIFACT BENCHMARK - PICKLE vs JSON (NUMPY)")
+    print("="*60)
+    print("\nCold import cost at serve time:")
+    print(f"   • pickle path (sklearn.linear_model): {import_cost_ms('sklearn.linear_model'):.0f} ms")
+    print(f"   • JSON path (numpy):                  {import_cost_ms('numpy'):.0f} ms\n")
+
+    report = run_benchmark()
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("\n" + "="*60)
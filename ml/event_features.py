@@ -0,0 +1,109 @@
+import os
+import numpy as np
+import pandas as pd
+from core.profiling import instrument_module
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+events_path = os.path.join(project_root, 'data', 'special_events.csv')
+
+EVENT_FEATURE_COLUMNS = [
+    'event_impact',
+    'has_event'
+]
+
+
+def _to_day_numbers(dates):
+    """
+    Convert dates to integer day numbers (days since 1970-01-01)
+    """
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+class EventIndex:
+    """
+    Precomputed date -> event impact lookup built from special_events.
+    Events span [event_date, end_date]; overlapping events multiply their
+    impact factors. The timeline is flattened once into sorted breakpoints,
+    so looking up any number of dates is a single searchsorted call.
+    """
+
+    def __init__(self, breakpoints=None, impacts=None, counts=None):
+        self.breakpoints = np.asarray(breakpoints if breakpoints is not None else [], dtype=np.int64)
+        self.impacts = np.asarray(impacts if impacts is not None else [], dtype=np.float64)
+        self.counts = np.asarray(counts if counts is not None else [], dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, events):
+        """
+        Build the index from a special_events DataFrame
+        (event_date, optional end_date, impact_factor)
+        """
+        if events is None or len(events) == 0:
+            return cls()
+
+        starts = _to_day_numbers(events['event_date'])
+        if 'end_date' in events.columns:
+            end_dates = events['end_date'].where(events['end_date'].notna(), events['event_date'])
+            ends = _to_day_numbers(end_dates)
+        else:
+            ends = starts.copy()
+        if np.any(ends < starts):
+            raise ValueError("special_events has end_date before event_date")
+
+        impact = events['impact_factor'].fillna(1.0).to_numpy(dtype=np.float64)
+        if np.any(impact <= 0):
+            raise ValueError("special_events.impact_factor must be positive")
+
+        # Each event opens at its start day and closes the day after it ends;
+        # summing log-impacts lets overlapping events combine multiplicatively
+        days = np.concatenate([starts, ends + 1])
+        log_delta = np.concatenate([np.log(impact), -np.log(impact)])
+        count_delta = np.concatenate([np.ones(len(starts)), -np.ones(len(starts))]).astype(np.int64)
+
+        breakpoints, inverse = np.unique(days, return_inverse=True)
+        log_impact = np.cumsum(np.bincount(inverse, weights=log_delta, minlength=len(breakpoints)))
+        counts = np.cumsum(np.bincount(inverse, weights=count_delta, minlength=len(breakpoints))).astype(np.int64)
+
+        impacts = np.where(counts > 0, np.exp(log_impact), 1.0)
+        return cls(breakpoints, impacts, counts)
+
+    def lookup(self, dates):
+        """
+        Impact factor and number of active events for every date
+        Returns (impact array, count array)
+        """
+        days = _to_day_numbers(dates)
+        if len(self.breakpoints) == 0:
+            return np.ones(len(days)), np.zeros(len(days), dtype=np.int64)
+
+        segment = np.searchsorted(self.breakpoints, days, side='right') - 1
+        before_first = segment < 0
+        segment = np.maximum(segment, 0)
+        impact = np.where(before_first, 1.0, self.impacts[segment])
+        count = np.where(before_first, 0, self.counts[segment])
+        return impact, count
+
+    def event_features(self, dates):
+        """
+        Event feature columns for a sequence of dates
+        """
+        impact, count = self.lookup(dates)
+        return pd.DataFrame({
+            'event_impact': impact.round(4),
+            'has_event': (count > 0).astype(np.int64)
+        })
+
+
+def load_event_index(path=events_path):
+    """
+    Build the event index from the exported special_events CSV
+    Returns an empty index (no events) when the file does not exist
+    """
+    if not os.path.exists(path):
+        return EventIndex()
+    return EventIndex.from_frame(pd.read_csv(path))
+
+
+instrument_module(__name__)
@@ -1,40 +1,36 @@
 import os
-import pandas as pd
+import sys
 
 # Path setup
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 data_path = os.path.join(project_root, 'data', 'attendance_summary.csv')
+sys.path.insert(0, project_root)
+
+from core.schemas import ATTENDANCE_SUMMARY, SchemaError
+from ml.event_features import EVENT_FEATURE_COLUMNS, events_path, load_event_index
+from ml.features import build_attendance_features
 
 print("="*60)
 print("FEATURE ENGINEERING")
 print("="*60)
 
-# Load data
+# Load data (checked against the attendance_summary contract)
 print(f"\n📂 Loading data from: {data_path}")
-df = pd.read_csv(data_path)
+try:
+    df = ATTENDANCE_SUMMARY.read_csv(data_path)
+except SchemaError as e:
+    print(f"❌ {data_path} does not match its schema:\n   " + "\n   ".join(e.errors))
+    sys.exit(1)
 print(f"✅ Loaded {len(df)} records")
 
-# Convert date column to datetime
-df['date'] = pd.to_datetime(df['date'])
-
 print("\n🔧 Creating new features...")
 
-# Time-based features
-df['day_of_week_num'] = df['date'].dt.dayofweek   # 0=Monday, 6=Sunday
-df['is_weekend'] = df['day_of_week_num'].apply(lambda x: 1 if x >= 5 else 0)
-df['month'] = df['date'].dt.month                  # 1-12
-df['day_of_month'] = df['date'].dt.day             # 1-31
-df['is_month_start'] = df['day_of_month'].apply(lambda x: 1 if x <= 5 else 0)
-df['is_month_end'] = df['day_of_month'].apply(lambda x: 1 if x >= 25 else 0)
-
-# Meal type encoding (convert text to numbers)
-meal_mapping = {
-    'Breakfast': 0,
-    'Lunch': 1,
-    'Dinner': 2
-}
-df['meal_type_encoded'] = df['meal_type'].map(meal_mapping)
+# Calendar, meal encoding and special event features in one column-wise pass
+# (same definitions the predictors use, see ml/features.py)
+event_index = load_event_index()
+print(f"   Events index: {len(event_index.breakpoints)} breakpoints from {events_path}")
+df = build_attendance_features(df, event_index)
 
 # Display created features
 print("\n✅ Features created:")
@@ -46,7 +42,7 @@ new_features = [
     'is_month_start',
     'is_month_end',
     'meal_type_encoded'
-]
+] + EVENT_FEATURE_COLUMNS
 for feature in new_features:
     print(f"   • {feature}")
 
@@ -56,7 +52,7 @@ print(df[['date', 'meal_type', 'actual_attended'] + new_features].head(10))
 
 # Save feature-ready dataset
 output_path = os.path.join(project_root, 'data', 'attendance_features.csv')
-df.to_csv(output_path, index=False)
+df.to_csv(output_path, index=False, date_format='%Y-%m-%d')
 
 print(f"\n💾 Saved to: {output_path}")
 print(f"✅ Total columns: {len(df.columns)}")
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from core.schemas import ATTENDANCE_SUMMARY, MEAL_TYPES, Column, Schema
+from ml.event_features import EVENT_FEATURE_COLUMNS, EventIndex
+from core.profiling import instrument_module
+
+# Features used by every model in the pipeline (same order as train_model.py)
+CALENDAR_FEATURE_COLUMNS = [
+    'day_of_week_num',
+    'is_weekend',
+    'month',
+    'day_of_month',
+    'meal_type_encoded'
+]
+FEATURE_COLUMNS = CALENDAR_FEATURE_COLUMNS + EVENT_FEATURE_COLUMNS
+
+TARGET_COLUMN = 'actual_attended'
+
+# Meal type encoding (convert text to numbers), in daily_attendance ENUM order
+MEAL_MAPPING = {meal: code for code, meal in enumerate(MEAL_TYPES)}
+
+# Declared types of the model inputs (see core/schemas.py)
+FEATURE_SCHEMA_COLUMNS = [
+    Column('day_of_week_num', 'int8', min_value=0, max_value=6),
+    Column('is_weekend', 'int8', min_value=0, max_value=1),
+    Column('month', 'int8', min_value=1, max_value=12),
+    Column('day_of_month', 'int8', min_value=1, max_value=31),
+    Column('meal_type_encoded', 'int8', min_value=0, max_value=len(MEAL_TYPES) - 1),
+    # float64: LinearRegression fits in its input dtype
+    Column('event_impact', 'float64', min_value=0.0),
+    Column('has_event', 'int8', min_value=0, max_value=1),
+]
+TARGET_SCHEMA_COLUMN = Column(TARGET_COLUMN, 'int16', min_value=0)
+
+# attendance_features.csv (feature_engineering.py -> prepare_data.py, intervals)
+ATTENDANCE_FEATURES = Schema(
+    'attendance_features',
+    ATTENDANCE_SUMMARY.columns + FEATURE_SCHEMA_COLUMNS[:4] + [
+        Column('is_month_start', 'int8', min_value=0, max_value=1),
+        Column('is_month_end', 'int8', min_value=0, max_value=1),
+    ] + FEATURE_SCHEMA_COLUMNS[4:],
+    key=ATTENDANCE_SUMMARY.key,
+    checks=ATTENDANCE_SUMMARY.checks + [
+        ('meal_type_encoded matches meal_type',
+         lambda df: df['meal_type_encoded'] == df['meal_type'].map(MEAL_MAPPING).astype(int)),
+    ],
+)
+
+# train_data.csv / test_data.csv (prepare_data.py -> train_model.py)
+TRAINING_DATA = Schema('training_data', FEATURE_SCHEMA_COLUMNS + [TARGET_SCHEMA_COLUMN])
+
+
+def build_feature_frame(dates, meal_types, event_index=None):
+    """
+    Create the model feature matrix for many (date, meal_type) pairs at once
+    Same features as predict.create_features(), computed column-wise;
+    event features come from the precomputed EventIndex (none if omitted)
+    Returns DataFrame with FEATURE_COLUMNS
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    meal_types = pd.Series(np.asarray(meal_types), dtype=object)
+
+    day_of_week_num = dates.dayofweek.to_numpy()
+    features = pd.DataFrame({
+        'day_of_week_num': day_of_week_num,
+        'is_weekend': (day_of_week_num >= 5).astype(np.int64),
+        'month': dates.month.to_numpy(),
+        'day_of_month': dates.day.to_numpy(),
+        # Unknown meal types default to Lunch, as in predict.py
+        'meal_type_encoded': meal_types.map(MEAL_MAPPING).fillna(1).astype(np.int64).to_numpy()
+    })
+    if event_index is None:
+        event_index = EventIndex()
+    events = event_index.event_features(dates)
+    for column in EVENT_FEATURE_COLUMNS:
+        features[column] = events[column].to_numpy()
+    return features[FEATURE_COLUMNS]
+
+
+def build_attendance_features(summary, event_index=None):
+    """
+    Feature rows for an attendance summary (ATTENDANCE_SUMMARY frame)
+    Returns DataFrame matching ATTENDANCE_FEATURES
+    """
+    df = summary.copy()
+    features = build_feature_frame(df['date'], df['meal_type'].astype(object), event_index)
+    for column in features.columns:
+        df[column] = features[column].to_numpy()
+    df['is_month_start'] = (df['day_of_month'] <= 5).astype('int8')
+    df['is_month_end'] = (df['day_of_month'] >= 25).astype('int8')
+    return ATTENDANCE_FEATURES.conform(df)
+
+
+def build_forecast_grid(start_date, days, meal_types=None):
+    """
+    Build every (date, meal_type) pair for the next `days` days
+    Returns DataFrame with date and meal_type columns
+    """
+    meal_types = meal_types or MEAL_TYPES
+    dates = pd.date_range(start=start_date, periods=days, freq='D')
+    grid = pd.DataFrame({
+        'date': np.repeat(dates.to_numpy(), len(meal_types)),
+        'meal_type': np.tile(np.asarray(meal_types, dtype=object), len(dates))
+    })
+    return grid
+
+
+instrument_module(__name__)
@@ -0,0 +1,220 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+portions_path = os.path.join(project_root, 'data', 'dish_portions.csv')
+model_path = os.path.join(project_root, 'ml', 'trained_model.json')
+calibration_path = os.path.join(project_root, 'ml', 'interval_calibration.json')
+sys.path.insert(0, project_root)
+
+from ml.features import build_feature_frame, build_forecast_grid
+from ml.intervals import ResidualCalibrator, predict_interval_grid, DEFAULT_SHORTAGE_PROBABILITY
+from ml.model_artifact import LinearModelArtifact
+from ml.event_features import load_event_index
+from core.profiling import instrument_module
+
+PORTION_COLUMNS = ['meal_type', 'dish', 'kg_per_student', 'waste_cost_per_kg', 'shortage_cost_per_kg']
+
+
+def load_portions(path=portions_path):
+    """
+    Load the per-dish portion and cost table
+    """
+    portions = pd.read_csv(path)
+    missing = [col for col in PORTION_COLUMNS if col not in portions.columns]
+    if missing:
+        raise ValueError(f"Portion table is missing columns: {missing}")
+    return portions[PORTION_COLUMNS]
+
+
+def calibrate_portions(portions, history):
+    """
+    Rescale dish portions so each meal's total kg per student matches what
+    students actually consumed (daily_meal_summary food_consumed_kg / total_present)
+    Meals without history keep the table values
+    """
+    history = history.dropna(subset=['food_consumed_kg'])
+    history = history[history['total_present'] > 0]
+    if history.empty:
+        return portions.copy()
+
+    totals = history.groupby('meal_type')[['food_consumed_kg', 'total_present']].sum()
+    observed = totals['food_consumed_kg'].astype(float) / totals['total_present'].astype(float)
+    planned = portions.groupby('meal_type')['kg_per_student'].sum()
+    scale = (observed / planned).reindex(portions['meal_type']).fillna(1.0).to_numpy()
+
+    calibrated = portions.copy()
+    calibrated['kg_per_student'] = (calibrated['kg_per_student'] * scale).round(4)
+    return calibrated
+
+
+def plan_quantities(forecast, portions, calibrator):
+    """
+    Solve the food quantity for every (date, meal_type, dish) cell in one pass
+    forecast: DataFrame with date, meal_type, predicted (mean headcount)
+    Demand for a cell is predicted + walk-forward residual, so the cost-optimal
+    quantity is the newsvendor quantile at shortage_cost / (shortage + waste cost).
+    Expected wastage and shortage come from prefix sums over sorted residuals.
+    Returns DataFrame with quantity_kg, expected_waste_kg, expected_shortage_kg, expected_cost
+    """
+    cells = forecast[['date', 'meal_type', 'predicted']].merge(portions, on='meal_type', how='inner')
+    n_cells = len(cells)
+
+    headcount = np.zeros(n_cells)
+    waste_students = np.zeros(n_cells)
+    shortage_students = np.zeros(n_cells)
+
+    mean = cells['predicted'].to_numpy(dtype=np.float64)
+    waste_cost = cells['waste_cost_per_kg'].to_numpy(dtype=np.float64)
+    shortage_cost = cells['shortage_cost_per_kg'].to_numpy(dtype=np.float64)
+    critical_ratio = shortage_cost / (shortage_cost + waste_cost)
+
+    meal_codes, meals = pd.factorize(cells['meal_type'])
+    for code, meal in enumerate(meals):
+        rows = meal_codes == code
+        residuals = np.sort(calibrator.residuals_for(meal))
+        n = len(residuals)
+        prefix = np.concatenate([[0.0], np.cumsum(residuals)])
+
+        # Newsvendor optimum: the critical-ratio quantile of the demand samples
+        k_opt = np.clip(np.ceil(critical_ratio[rows] * n).astype(np.int64) - 1, 0, n - 1)
+        h = np.maximum(mean[rows] + residuals[k_opt], 0.0)
+
+        # k = number of demand samples (mean + r_i) below the prepared headcount
+        k = np.searchsorted(residuals, h - mean[rows], side='left')
+        below = k * mean[rows] + prefix[k]
+        above = (n - k) * mean[rows] + (prefix[n] - prefix[k])
+        headcount[rows] = h
+        waste_students[rows] = (k * h - below) / n
+        shortage_students[rows] = (above - (n - k) * h) / n
+
+    portion = cells['kg_per_student'].to_numpy(dtype=np.float64)
+    plan = cells[['date', 'meal_type', 'dish']].copy()
+    plan['plan_headcount'] = np.ceil(headcount).astype(int)
+    plan['quantity_kg'] = (headcount * portion).round(2)
+    plan['expected_waste_kg'] = (waste_students * portion).round(3)
+    plan['expected_shortage_kg'] = (shortage_students * portion).round(3)
+    plan['expected_cost'] = (
+        waste_cost * waste_students * portion + shortage_cost * shortage_students * portion
+    ).round(2)
+    return plan
+
+
+def summarise_plan(plan):
+    """
+    Total kg per (date, meal_type), i.e. daily_meal_summary.decision_quantity
+    """
+    return plan.groupby(['date', 'meal_type'], sort=False, as_index=False).agg(
+        decision_quantity=('quantity_kg', 'sum'),
+        expected_waste_kg=('expected_waste_kg', 'sum'),
+        expected_shortage_kg=('expected_shortage_kg', 'sum'),
+        expected_cost=('expected_cost', 'sum')
+    )
+
+
+def forecast_grid_means(model, grid, event_index=None):
+    """
+    Mean headcount forecast for every row of a (date, meal_type) grid
+    """
+    forecast = grid[['date', 'meal_type']].copy()
+    X = build_feature_frame(grid['date'], grid['meal_type'].to_numpy(), event_index)
+    forecast['predicted'] = np.maximum(model.predict(X), 0.0)
+    return forecast
+
+
+def build_day_plan(day, model, calibrator, portions, event_index=None,
+                   shortage_probability=DEFAULT_SHORTAGE_PROBABILITY):
+    """
+    Kitchen plan for one day: per meal forecast (interval, plan headcount)
+    with decision_quantity (kg), plus the per-dish quantities
+    Returns (forecast DataFrame, plan DataFrame)
+    """
+    grid = build_forecast_grid(day, 1)
+    forecast = predict_interval_grid(model, grid, calibrator, shortage_probability=shortage_probability,
+                                     event_index=event_index)
+    plan = plan_quantities(forecast, portions, calibrator)
+    totals = summarise_plan(plan)[['date', 'meal_type', 'decision_quantity', 'expected_waste_kg',
+                                   'expected_shortage_kg']]
+    forecast = forecast.merge(totals, on=['date', 'meal_type'], how='left')
+    return forecast, plan
+
+
+def day_plan_report(forecast, plan):
+    """
+    JSON-ready planning report from build_day_plan() output
+    """
+    dishes = {meal: rows[['dish', 'quantity_kg']].to_dict('records')
+              for meal, rows in plan.groupby('meal_type', sort=False)}
+    meals = []
+    for row in forecast.itertuples(index=False):
+        meals.append({
+            'meal_type': row.meal_type,
+            'predicted': int(row.predicted),
+            'lower': int(row.lower),
+            'upper': int(row.upper),
+            'confidence_score': float(row.confidence_score),
+            'plan_headcount': int(row.plan_headcount),
+            'food_kg': None if pd.isna(row.decision_quantity) else round(float(row.decision_quantity), 2),
+            'expected_waste_kg': None if pd.isna(row.expected_waste_kg) else round(float(row.expected_waste_kg), 3),
+            'expected_shortage_kg': None if pd.isna(row.expected_shortage_kg)
+            else round(float(row.expected_shortage_kg), 3),
+            'dishes': [{'dish': d['dish'], 'quantity_kg': float(d['quantity_kg'])} for d in dishes.get(row.meal_type, [])],
+        })
+    return {'date': pd.Timestamp(forecast['date'].iloc[0]).strftime('%Y-%m-%d'), 'meals': meals}
+
+
+def benchmark_semester_plan(model, calibrator, portions, days=120, repeats=5, event_index=None):
+    """
+    Time a full-semester plan (days × 3 meals × dishes) end to end
+    Returns (plan, best_seconds)
+    """
+    best = float('inf')
+    plan = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        grid = build_forecast_grid(pd.Timestamp.today().normalize(), days)
+        plan = plan_quantities(forecast_grid_means(model, grid, event_index), portions, calibrator)
+        best = min(best, time.perf_counter() - start)
+    return plan, best
+
+
+instrument_module(__name__)
+
+
+# Build and benchmark a full-semester plan
+if __name__ == "__main__":
+    print("="*60)
+    print("      FOOD QUANTITY PLANNER - FULL SEMESTER")
+    print("="*60)
+
+    model = LinearModelArtifact.load(model_path)
+    calibrator = ResidualCalibrator.load(calibration_path)
+    portions = load_portions()
+
+    if '--calibrate' in sys.argv:
+        from core.data_loader import fetch_meal_summary_history
+        history = fetch_meal_summary_history()
+        if history is not None:
+            portions = calibrate_portions(portions, history)
+            print("\nPortions calibrated on daily_meal_summary history")
+
+    print("\nPortion table:")
+    print(portions.to_string(index=False))
+
+    plan, seconds = benchmark_semester_plan(model, calibrator, portions, event_index=load_event_index())
+    print(f"\nPlanned {len(plan)} (date, meal, dish) cells in {seconds * 1000:.1f} ms "
+          f"({len(plan) / seconds:,.0f} cells/sec)")
+
+    print("\nFirst day of the plan:")
+    print(plan.head(len(portions)).to_string(index=False))
+
+    summary = summarise_plan(plan)
+    print(f"\nSemester totals: {summary['decision_quantity'].sum():,.1f} kg prepared, "
+          f"{summary['expected_waste_kg'].sum():,.1f} kg expected wastage, "
+          f"{summary['expected_shortage_kg'].sum():,.1f} kg expected shortage")
+    print("="*60)
@@ -0,0 +1,247 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+calibration_path = os.path.join(project_root, 'ml', 'interval_calibration.json')
+forecast_dir = os.path.join(project_root, 'data', 'forecasts')
+sys.path.insert(0, project_root)
+
+from ml.features import MEAL_TYPES
+from ml.model_registry import ANY, ShardedModelRegistry, registry_path
+from ml.intervals import ResidualCalibrator, DEFAULT_COVERAGE, DEFAULT_SHORTAGE_PROBABILITY
+from ml.event_features import EventIndex, load_event_index, events_path
+from core.profiling import instrument_module
+
+HORIZONS = [1, 7, 30, 120]
+# Scenario -> whether the special_events calendar is applied
+SCENARIOS = {
+    'with_events': True,
+    'no_events': False,
+}
+# Max work units (hall, meal, scenario) per worker call; each call has
+# ~20 ms of fixed DataFrame overhead, so chunks should not be tiny
+DEFAULT_CHUNK_UNITS = 64
+
+# One row per (hall, meal_type, scenario, date); lead_days = days from the
+# start date (1 = start date). A horizon H is the rows with lead_days <= H
+FORECAST_COLUMNS = ['hall', 'meal_type', 'scenario', 'lead_days', 'date', 'predicted',
+                    'lower', 'upper', 'confidence_score', 'plan_headcount']
+
+# Loaded once per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(model_file, calibration_file, events_file):
+    """
+    Pool initializer: load the model artifacts once per worker
+    """
+    _worker['registry'] = ShardedModelRegistry.load(model_file)
+    _worker['calibrator'] = ResidualCalibrator.load(calibration_file)
+    _worker['event_indexes'] = {
+        scenario: load_event_index(events_file) if with_events else EventIndex()
+        for scenario, with_events in SCENARIOS.items()
+    }
+
+
+def _forecast_chunk(units, start_date, horizons):
+    """
+    Forecast a chunk of (hall, meal_type, scenario) units (runs in a worker)
+    Each unit is scored once over the longest horizon; shorter horizons
+    are its leading days (see horizon_rows), so each date is stored once
+    Returns DataFrame with FORECAST_COLUMNS
+    """
+    registry = _worker['registry']
+    calibrator = _worker['calibrator']
+    dates = pd.date_range(start=start_date, periods=max(horizons), freq='D').to_numpy()
+    days = len(dates)
+
+    frames = []
+    for scenario in dict.fromkeys(unit[2] for unit in units):
+        scenario_units = [unit for unit in units if unit[2] == scenario]
+        # One scoring pass for every unit of this scenario
+        frame = pd.DataFrame({
+            'hall': np.repeat([unit[0] for unit in scenario_units], days),
+            'date': np.tile(dates, len(scenario_units)),
+            'meal_type': np.repeat([unit[1] for unit in scenario_units], days),
+        })
+        predicted = np.maximum(registry.predict_frame(frame, _worker['event_indexes'][scenario]), 0.0)
+        meals = frame['meal_type'].to_numpy()
+        lower, upper = calibrator.interval(predicted, meals, DEFAULT_COVERAGE)
+        frame['scenario'] = scenario
+        frame['predicted'] = predicted.round().astype(int)
+        frame['lower'] = np.floor(lower).astype(int)
+        frame['upper'] = np.ceil(upper).astype(int)
+        frame['confidence_score'] = calibrator.confidence_score(predicted, meals).round(4)
+        frame['plan_headcount'] = np.ceil(
+            calibrator.demand_quantile(predicted, meals, DEFAULT_SHORTAGE_PROBABILITY)).astype(int)
+        frame['lead_days'] = np.tile(np.arange(1, days + 1), len(scenario_units))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)[FORECAST_COLUMNS]
+
+
+def horizon_rows(forecasts, horizon):
+    """
+    The forecasts of one horizon (the first `horizon` days of each unit)
+    """
+    return forecasts[forecasts['lead_days'] <= horizon]
+
+
+def make_units(halls, meal_types=None, scenarios=None):
+    """
+    Every (hall, meal_type, scenario) combination to forecast
+    """
+    meal_types = meal_types or MEAL_TYPES
+    scenarios = scenarios or list(SCENARIOS)
+    return [(hall, meal, scenario) for scenario in scenarios for hall in halls for meal in meal_types]
+
+
+def registry_halls(model_file=registry_path):
+    """
+    Halls with their own shard in the model registry
+    """
+    registry = ShardedModelRegistry.load(model_file)
+    return sorted({hall for hall, _ in registry.shards() if hall != ANY})
+
+
+class ForecastWriter:
+    """
+    Buffers result chunks and appends them to a CSV in bulk
+    (and optionally to meal_forecasts in the database: the whole run
+    is kept and upserted in one transaction by close())
+    """
+
+    def __init__(self, path=None, save_to_db=False, flush_rows=50000):
+        self.path = path
+        self.save_to_db = save_to_db
+        self.flush_rows = flush_rows
+        self.buffer = []
+        self.buffered = 0
+        self.rows = 0
+        self.db_frames = []
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pd.DataFrame(columns=FORECAST_COLUMNS).to_csv(path, index=False)
+
+    def write(self, frame):
+        self.buffer.append(frame)
+        self.buffered += len(frame)
+        if self.buffered >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        frame = pd.concat(self.buffer, ignore_index=True)
+        if self.path:
+            frame.to_csv(self.path, mode='a', header=False, index=False, date_format='%Y-%m-%d')
+        if self.save_to_db:
+            self.db_frames.append(frame)
+        self.rows += len(frame)
+        self.buffer = []
+        self.buffered = 0
+
+    def close(self):
+        """
+        Final flush; with save_to_db, upsert every row in one transaction
+        """
+        self.flush()
+        if self.db_frames:
+            from core.meal_summary import save_forecast_rows
+            save_forecast_rows(pd.concat(self.db_frames, ignore_index=True))
+            self.db_frames = []
+
+
+def run_forecast_job(start_date, halls, horizons=None, meal_types=None, scenarios=None,
+                     n_jobs=None, chunk_units=None, writer=None, model_file=registry_path,
+                     calibration_file=calibration_path, events_file=events_path):
+    """
+    Forecast every hall x meal x scenario over the longest horizon, fanned
+    out over a process pool (model loaded once per worker). Chunks are
+    written as they complete. Returns dict with rows (unique forecasts,
+    one per unit and date), seconds, forecasts_per_sec
+    """
+    horizons = sorted(horizons or HORIZONS)
+    units = make_units(halls, meal_types, scenarios)
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(units)))
+    # Several chunks per worker so a slow chunk does not leave cores idle
+    chunk_units = chunk_units or max(1, min(DEFAULT_CHUNK_UNITS, -(-len(units) // (4 * n_jobs))))
+    chunks = [units[i:i + chunk_units] for i in range(0, len(units), chunk_units)]
+    writer = writer or ForecastWriter()
+    init_args = (model_file, calibration_file, events_file)
+
+    start = time.perf_counter()
+    rows = 0
+    if n_jobs == 1:
+        _init_worker(*init_args)
+        for chunk in chunks:
+            frame = _forecast_chunk(chunk, start_date, horizons)
+            writer.write(frame)
+            rows += len(frame)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=init_args) as executor:
+            futures = [executor.submit(_forecast_chunk, chunk, start_date, horizons) for chunk in chunks]
+            for future in as_completed(futures):
+                frame = future.result()
+                writer.write(frame)
+                rows += len(frame)
+    writer.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'units': len(units),
+        'chunks': len(chunks),
+        'workers': n_jobs,
+        'rows': rows,
+        'seconds': elapsed,
+        'forecasts_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def print_report(stats):
+    print(f"{stats['rows']:,} unique forecasts ({stats['units']} hall/meal/scenario units, "
+          f"{stats['chunks']} chunks) on {stats['workers']} worker(s) in {stats['seconds']:.2f}s "
+          f"= {stats['forecasts_per_sec']:,.0f} forecasts/sec")
+
+
+instrument_module(__name__)
+
+
+# Nightly planning run: python ml/forecast_job.py [--start YYYY-MM-DD] [--save]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel multi-horizon forecast job")
+    parser.add_argument('--start', default=(pd.Timestamp.today().normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    parser.add_argument('--halls', nargs='*', help="halls to forecast (default: halls in the registry)")
+    parser.add_argument('--horizons', nargs='*', type=int, default=HORIZONS)
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--save', action='store_true', help="also upsert into meal_forecasts")
+    parser.add_argument('--scaling', type=int, default=0, metavar='HALLS',
+                        help="benchmark 1..N workers on this many synthetic halls")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("       MULTI-HORIZON FORECAST JOB")
+    print("="*60)
+
+    if args.scaling:
+        halls = [f'H{i:03d}' for i in range(args.scaling)]
+        for jobs in sorted({1, 2, 4, os.cpu_count() or 1}):
+            stats = run_forecast_job(args.start, halls, args.horizons, n_jobs=jobs)
+            print_report(stats)
+        sys.exit(0)
+
+    halls = args.halls or registry_halls() or [ANY]
+    path = os.path.join(forecast_dir, f"forecast_{args.start}.csv")
+    print(f"Start {args.start} | halls {', '.join(halls)} | horizons {args.horizons} | "
+          f"scenarios {', '.join(SCENARIOS)}")
+    stats = run_forecast_job(args.start, halls, args.horizons, n_jobs=args.jobs,
+                             writer=ForecastWriter(path, save_to_db=args.save))
+    print_report(stats)
+    print(f"Forecasts written to: {path}")
@@ -0,0 +1,161 @@
+import json
+import numpy as np
+import pandas as pd
+
+from ml.features import build_feature_frame
+from ml.backtest import walk_forward
+from core.profiling import instrument_module
+
+# Default interval coverage and shortage target for food planning
+DEFAULT_COVERAGE = 0.80
+DEFAULT_SHORTAGE_PROBABILITY = 0.05
+
+# confidence_score = P(actual within ±CONFIDENCE_TOLERANCE of the prediction),
+# with at least CONFIDENCE_MIN_STUDENTS of slack for small meals
+CONFIDENCE_TOLERANCE = 0.10
+CONFIDENCE_MIN_STUDENTS = 2
+
+# Meals with fewer residuals than this use the pooled residuals
+MIN_GROUP_RESIDUALS = 10
+
+
+def walk_forward_residuals(df, min_train_days=1, event_index=None):
+    """
+    Replay history day by day: fit on all days before d, predict day d
+    (incremental fits, see ml/backtest.py)
+    Returns DataFrame with date, meal_type, actual, predicted, residual
+    """
+    result = walk_forward(df, min_train_days=min_train_days, event_index=event_index)
+    return result[['date', 'meal_type', 'actual', 'predicted', 'residual']]
+
+
+class ResidualCalibrator:
+    """
+    Residual-quantile (split conformal) calibration from walk-forward residuals.
+    Residuals are kept sorted per meal type so intervals, confidence scores and
+    shortage quantiles for a whole forecast grid are a few vectorized lookups.
+    """
+
+    def __init__(self, residuals_by_meal, pooled_residuals):
+        self.residuals_by_meal = {
+            meal: np.sort(np.asarray(values, dtype=np.float64))
+            for meal, values in residuals_by_meal.items()
+        }
+        self.pooled = np.sort(np.asarray(pooled_residuals, dtype=np.float64))
+        if len(self.pooled) == 0:
+            raise ValueError("Need at least one walk-forward residual to calibrate intervals")
+
+    @classmethod
+    def from_residuals(cls, residual_df, min_group=MIN_GROUP_RESIDUALS):
+        """
+        Build a calibrator from walk_forward_residuals() output
+        """
+        by_meal = {
+            meal: group['residual'].to_numpy()
+            for meal, group in residual_df.groupby('meal_type')
+            if len(group) >= min_group
+        }
+        return cls(by_meal, residual_df['residual'].to_numpy())
+
+    def residuals_for(self, meal_type):
+        """
+        Sorted walk-forward residuals used for one meal type
+        """
+        return self.residuals_by_meal.get(meal_type, self.pooled)
+
+    def _residual_quantiles(self, meal_types, probability):
+        """
+        Conformal residual quantile at `probability` for every row
+        """
+        meal_types = np.asarray(meal_types, dtype=object)
+        out = np.empty(len(meal_types))
+        for meal in pd.unique(meal_types):
+            residuals = self.residuals_for(meal)
+            n = len(residuals)
+            # Finite-sample correction keeps coverage >= nominal
+            if probability > 0.5:
+                level = min(1.0, np.ceil((n + 1) * probability) / n)
+            else:
+                level = max(0.0, np.floor((n + 1) * probability) / n)
+            out[meal_types == meal] = np.quantile(residuals, level)
+        return out
+
+    def interval(self, predicted, meal_types, coverage=DEFAULT_COVERAGE):
+        """
+        Two-sided prediction interval around point forecasts
+        Returns (lower, upper) arrays, floored at zero students
+        """
+        predicted = np.asarray(predicted, dtype=np.float64)
+        alpha = 1.0 - coverage
+        lower = predicted + self._residual_quantiles(meal_types, alpha / 2)
+        upper = predicted + self._residual_quantiles(meal_types, 1 - alpha / 2)
+        return np.maximum(lower, 0.0), np.maximum(upper, 0.0)
+
+    def demand_quantile(self, predicted, meal_types, shortage_probability=DEFAULT_SHORTAGE_PROBABILITY):
+        """
+        Headcount to prepare for so that P(actual > headcount) ≈ shortage_probability
+        """
+        predicted = np.asarray(predicted, dtype=np.float64)
+        quantile = predicted + self._residual_quantiles(meal_types, 1 - shortage_probability)
+        return np.maximum(quantile, 0.0)
+
+    def confidence_score(self, predicted, meal_types):
+        """
+        Empirical probability that the actual headcount lands within the
+        tolerance band around the prediction (0..1, for confidence_score)
+        """
+        predicted = np.asarray(predicted, dtype=np.float64)
+        meal_types = np.asarray(meal_types, dtype=object)
+        tolerance = np.maximum(CONFIDENCE_TOLERANCE * np.abs(predicted), CONFIDENCE_MIN_STUDENTS)
+        score = np.empty(len(predicted))
+        for meal in pd.unique(meal_types):
+            abs_residuals = np.sort(np.abs(self.residuals_for(meal)))
+            mask = meal_types == meal
+            score[mask] = np.searchsorted(abs_residuals, tolerance[mask], side='right') / len(abs_residuals)
+        return score
+
+    def save(self, path):
+        """
+        Save residuals as JSON next to the model artifact
+        """
+        payload = {
+            'pooled': self.pooled.tolist(),
+            'by_meal': {meal: values.tolist() for meal, values in self.residuals_by_meal.items()}
+        }
+        with open(path, 'w') as file:
+            json.dump(payload, file)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load residuals saved with save()
+        """
+        with open(path, 'r') as file:
+            payload = json.load(file)
+        return cls(payload['by_meal'], payload['pooled'])
+
+
+def predict_interval_grid(model, grid, calibrator, coverage=DEFAULT_COVERAGE,
+                          shortage_probability=DEFAULT_SHORTAGE_PROBABILITY, event_index=None):
+    """
+    Forecast a whole (date, meal_type) grid at once with intervals
+    Returns DataFrame with predicted, lower, upper, confidence_score
+    and plan_headcount (the headcount to cook for at the shortage target)
+    """
+    meals = grid['meal_type'].to_numpy()
+    X = build_feature_frame(grid['date'], meals, event_index)
+    predicted = np.maximum(model.predict(X), 0.0)
+
+    lower, upper = calibrator.interval(predicted, meals, coverage)
+    result = grid[['date', 'meal_type']].copy()
+    result['predicted'] = predicted.round().astype(int)
+    result['lower'] = np.floor(lower).astype(int)
+    result['upper'] = np.ceil(upper).astype(int)
+    result['confidence_score'] = calibrator.confidence_score(predicted, meals).round(4)
+    result['plan_headcount'] = np.ceil(
+        calibrator.demand_quantile(predicted, meals, shortage_probability)
+    ).astype(int)
+    return result
+
+
+instrument_module(__name__)
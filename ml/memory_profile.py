@@ -0,0 +1,312 @@
+"""
+Memory-footprint profiling for the ML pipeline stages.
+Runs the stage scripts (feature_engineering, prepare_data, train_model,
+predict) in one process, exactly as `python ml/<stage>.py` would, and
+reports per stage:
+  - peak and end RSS (sampled every few ms by a background thread)
+  - peak traced allocation (tracemalloc covers Python objects and NumPy
+    buffers) and the call sites still holding the most memory at stage end,
+    attributed to the pipeline line that caused them (NumPy/pandas/sklearn
+    are imported before tracing starts)
+  - every DataFrame the stage leaves behind: deep memory_usage per column,
+    with object/str columns flagged (usually the first thing to shrink)
+The report is printed and saved as JSON in data/profiles/.
+"""
+
+import os
+import sys
+import json
+import time
+import runpy
+import importlib
+import resource
+import threading
+import tracemalloc
+
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+profile_dir = os.path.join(project_root, 'data', 'profiles')
+sys.path.insert(0, project_root)
+
+STAGES = ['feature_engineering', 'prepare_data', 'train_model', 'predict']
+RSS_SAMPLE_SECONDS = 0.005
+TOP_SITES = 10
+# Imported before tracing starts: their module code is fixed overhead, not
+# pipeline data, and tracing imports with deep tracebacks is very slow
+PRELOAD_MODULES = ['numpy', 'pandas', 'sklearn.linear_model', 'sklearn.metrics',
+                   'sklearn.model_selection']
+# Frames kept per allocation, enough to reach the pipeline line through pandas
+TRACE_FRAMES = 16
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes (None if unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def max_rss():
+    """
+    Process-lifetime peak RSS in bytes (ru_maxrss is KB on Linux, bytes on macOS)
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler:
+    """
+    Background thread that keeps the highest RSS seen since reset()
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def reset(self):
+        self.peak = current_rss() or 0
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss and rss > self.peak:
+                self.peak = rss
+
+    def __enter__(self):
+        self.reset()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _is_text(dtype):
+    """
+    object/str columns: one Python object (or string) per row
+    """
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+
+def frame_report(name, df):
+    """
+    Deep memory usage of one DataFrame, per column
+    """
+    usage = df.memory_usage(deep=True, index=True)
+    columns = [
+        {'column': str(column), 'dtype': str(df[column].dtype), 'bytes': int(usage[column]),
+         'text': _is_text(df[column].dtype)}
+        for column in df.columns
+    ]
+    columns.sort(key=lambda c: c['bytes'], reverse=True)
+    return {
+        'name': name,
+        'rows': int(len(df)),
+        'bytes': int(usage.sum()),
+        'index_bytes': int(usage['Index']),
+        'columns': columns,
+    }
+
+
+def namespace_frames(namespace):
+    """
+    DataFrames (and Series, as one-column frames) left in a stage's globals
+    """
+    frames = []
+    for name, value in namespace.items():
+        if name.startswith('__'):
+            continue
+        if isinstance(value, pd.DataFrame):
+            frames.append(frame_report(name, value))
+        elif isinstance(value, pd.Series):
+            frames.append(frame_report(name, value.to_frame(name=value.name or name)))
+    frames.sort(key=lambda f: f['bytes'], reverse=True)
+    return frames
+
+
+def _site(traceback):
+    """
+    Innermost project frame of an allocation traceback (library frame if none)
+    """
+    for frame in reversed(traceback):
+        if frame.filename.startswith(project_root) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, project_root)}:{frame.lineno}"
+    frame = traceback[-1]
+    return f"(lib) {os.path.basename(frame.filename)}:{frame.lineno}"
+
+
+def _site_totals(snapshot):
+    """
+    Traced bytes and blocks per call site; each distinct traceback is resolved once
+    """
+    totals = {}
+    sites = {}
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    for trace in snapshot.traces:
+        site = sites.get(trace.traceback)
+        if site is None:
+            site = sites[trace.traceback] = _site(trace.traceback)
+        entry = totals.setdefault(site, [0, 0])
+        entry[0] += trace.size
+        entry[1] += 1
+    return totals
+
+
+def top_sites(before, after, limit=TOP_SITES):
+    """
+    Call sites whose traced memory grew most during the stage, attributed
+    to the pipeline line that triggered the allocation
+    """
+    before, after = _site_totals(before), _site_totals(after)
+    growth = []
+    for site, (size, blocks) in after.items():
+        old_size, old_blocks = before.get(site, (0, 0))
+        if size > old_size:
+            growth.append({'site': site, 'bytes': int(size - old_size), 'blocks': int(blocks - old_blocks)})
+    growth.sort(key=lambda entry: entry['bytes'], reverse=True)
+    return growth[:limit]
+
+
+def profile_stage(stage, trace=True, top=TOP_SITES):
+    """
+    Run ml/<stage>.py as __main__ and measure its memory
+    Returns the stage report dict (ok=False if the script exited with an error)
+    """
+    path = os.path.join(current_dir, f'{stage}.py')
+    argv = sys.argv
+    sys.argv = [path]
+    if trace:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    rss_start = current_rss()
+
+    namespace, ok, error = {}, True, None
+    started = time.perf_counter()
+    with RssSampler() as sampler:
+        try:
+            namespace = runpy.run_path(path, run_name='__main__')
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+            error = None if ok else f"exited with {e.code}"
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        finally:
+            sys.argv = argv
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'stage': stage,
+        'ok': ok,
+        'error': error,
+        'seconds': round(elapsed, 3),
+        'rss_start': rss_start,
+        'rss_end': current_rss(),
+        'rss_peak': max(sampler.peak, current_rss() or 0),
+    }
+    if trace:
+        # Snapshot before building the report so its own allocations are not counted
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        report['traced_peak'] = int(peak)
+        report['top_sites'] = top_sites(before, after, top)
+    report['frames'] = namespace_frames(namespace)
+    return report
+
+
+def run_profile(stages=None, trace=True, top=TOP_SITES):
+    """
+    Profile the pipeline stages in order, stopping at the first failure
+    Returns dict with per-stage reports and the process peak RSS
+    """
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    if trace:
+        tracemalloc.start(TRACE_FRAMES)
+    reports = []
+    try:
+        for stage in stages or STAGES:
+            report = profile_stage(stage, trace, top)
+            reports.append(report)
+            if not report['ok']:
+                break
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return {
+        'profiled_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'tracemalloc': trace,
+        'process_max_rss': max_rss(),
+        'stages': reports,
+    }
+
+
+def _mb(n):
+    if n is None:
+        return "     n/a"
+    return f"{n / 1e6:8.1f} MB" if abs(n) >= 1e6 else f"{n / 1e3:8.1f} KB"
+
+
+def print_report(profile, frame_limit=5, column_limit=6):
+    print("\n" + "="*60)
+    print("             PIPELINE MEMORY REPORT")
+    print("="*60)
+    for report in profile['stages']:
+        status = "ok" if report['ok'] else f"FAILED ({report['error']})"
+        print(f"\n▶ {report['stage']} [{status}] {report['seconds']:.2f}s")
+        print(f"   RSS start {_mb(report['rss_start'])} | peak {_mb(report['rss_peak'])} | "
+              f"end {_mb(report['rss_end'])}")
+        if 'traced_peak' in report:
+            print(f"   Traced allocation peak {_mb(report['traced_peak'])}")
+            for site in report['top_sites']:
+                print(f"      {_mb(site['bytes'])}  {site['blocks']:>8} blocks  {site['site']}")
+        for frame in report['frames'][:frame_limit]:
+            print(f"   DataFrame {frame['name']}: {frame['rows']:,} rows, {_mb(frame['bytes']).strip()}")
+            for column in frame['columns'][:column_limit]:
+                flag = "  <- text column (category?)" if column['text'] else ""
+                print(f"      {column['column']:<20} {column['dtype']:<16} {_mb(column['bytes'])}{flag}")
+    print(f"\nProcess peak RSS: {_mb(profile['process_max_rss']).strip()}")
+
+
+def save_report(profile, directory=profile_dir):
+    os.makedirs(directory, exist_ok=True)
+    stamp = profile['profiled_at'].replace(':', '').replace('-', '')
+    path = os.path.join(directory, f'memory_{stamp}.json')
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2, default=str)
+    return path
+
+
+# Profile the pipeline: python ml/memory_profile.py [stage ...] [--no-trace]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-stage memory profile of the ML pipeline")
+    parser.add_argument('stages', nargs='*', help=f"stages to run (default: {' '.join(STAGES)})")
+    parser.add_argument('--no-trace', action='store_true',
+                        help="skip tracemalloc (RSS and DataFrame sizes only, no slowdown)")
+    parser.add_argument('--top', type=int, default=TOP_SITES, help="allocation sites per stage")
+    args = parser.parse_args()
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s) {unknown}; choose from {STAGES}")
+
+    profile = run_profile(args.stages or STAGES, trace=not args.no_trace, top=args.top)
+    print_report(profile)
+    print(f"Report saved to: {save_report(profile)}")
+    sys.exit(0 if all(report['ok'] for report in profile['stages']) else 1)
@@ -0,0 +1,108 @@
+import json
+import hashlib
+import numpy as np
+from core.profiling import instrument_module
+
+# Versioned, pickle-free artifact for linear models.
+# A fitted Linear Regression is just a coefficient vector plus an intercept,
+# so it is stored as JSON and scored with NumPy only (no sklearn at serve time).
+ARTIFACT_FORMAT = 'smart-hostel-linear-model'
+ARTIFACT_VERSION = 1
+
+
+def schema_hash(feature_columns):
+    """
+    Hash of the ordered feature names the model was trained on
+    Used to refuse scoring with a mismatched feature layout
+    """
+    payload = json.dumps(list(feature_columns), separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def save_linear_model(model, path, feature_columns, metadata=None):
+    """
+    Save a fitted linear model (anything with coef_ and intercept_)
+    as a versioned JSON artifact
+    """
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    if len(coef) != len(feature_columns):
+        raise ValueError(
+            f"Model has {len(coef)} coefficients but {len(feature_columns)} feature columns"
+        )
+
+    artifact = {
+        'format': ARTIFACT_FORMAT,
+        'version': ARTIFACT_VERSION,
+        'model_type': type(model).__name__,
+        'feature_columns': list(feature_columns),
+        'schema_hash': schema_hash(feature_columns),
+        'coefficients': coef.tolist(),
+        'intercept': float(np.asarray(model.intercept_).ravel()[0]),
+        'metadata': dict(metadata or {})
+    }
+    with open(path, 'w') as file:
+        json.dump(artifact, file, indent=2)
+    return artifact
+
+
+class LinearModelArtifact:
+    """
+    Serving-side linear model loaded from a JSON artifact
+    """
+
+    def __init__(self, feature_columns, coefficients, intercept, model_type='LinearRegression', metadata=None):
+        self.feature_columns = list(feature_columns)
+        self.coef_ = np.asarray(coefficients, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.model_type = model_type
+        self.metadata = dict(metadata or {})
+        self.schema_hash = schema_hash(self.feature_columns)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load and validate an artifact written by save_linear_model()
+        """
+        with open(path, 'r') as file:
+            artifact = json.load(file)
+
+        if artifact.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} artifact")
+        if artifact.get('version') != ARTIFACT_VERSION:
+            raise ValueError(
+                f"Unsupported artifact version {artifact.get('version')} "
+                f"(expected {ARTIFACT_VERSION}); retrain with ml/train_model.py"
+            )
+
+        model = cls(
+            artifact['feature_columns'],
+            artifact['coefficients'],
+            artifact['intercept'],
+            model_type=artifact.get('model_type', 'LinearRegression'),
+            metadata=artifact.get('metadata')
+        )
+        if model.schema_hash != artifact.get('schema_hash'):
+            raise ValueError(f"Schema hash mismatch in {path}; artifact is corrupted")
+        return model
+
+    def predict(self, X):
+        """
+        Score a DataFrame (columns matched by name) or a 2-D array
+        laid out in feature_columns order
+        Returns numpy array of predictions
+        """
+        if hasattr(X, 'columns'):
+            missing = [col for col in self.feature_columns if col not in X.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+            X = X[self.feature_columns].to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+        if X.shape[1] != len(self.coef_):
+            raise ValueError(f"Expected {len(self.coef_)} features, got {X.shape[1]}")
+        return X @ self.coef_ + self.intercept_
+
+
+instrument_module(__name__)
@@ -0,0 +1,177 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from ml.features import FEATURE_COLUMNS, build_feature_frame
+from ml.model_artifact import schema_hash
+from ml.event_features import load_event_index
+from core.profiling import instrument_module
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+registry_path = os.path.join(project_root, 'ml', 'shard_models.npz')
+
+REGISTRY_VERSION = 1
+
+# Wildcard used for fallback shards (all halls / all meals)
+ANY = '*'
+KEY_SEPARATOR = '|'
+
+
+def shard_key(hall, meal_type):
+    """
+    Build the registry key for a (hall, meal_type) shard
+    """
+    return f"{hall}{KEY_SEPARATOR}{meal_type}"
+
+
+class ShardedModelRegistry:
+    """
+    Stores one linear model per (hall, meal_type) shard in a single artifact.
+    Every shard is a coefficient row plus an intercept, so all shards are kept
+    as one coefficient matrix and scored together.
+    """
+
+    def __init__(self, feature_columns=None, metadata=None):
+        self.feature_columns = list(feature_columns or FEATURE_COLUMNS)
+        self.metadata = dict(metadata or {})
+        self.keys = []
+        self.coefficients = np.zeros((0, len(self.feature_columns)))
+        self.intercepts = np.zeros(0)
+        self.n_rows = np.zeros(0, dtype=np.int64)
+        self._index = {}
+
+    def add_shard(self, hall, meal_type, coef, intercept, n_rows):
+        """
+        Add or replace the model for one shard
+        """
+        key = shard_key(hall, meal_type)
+        coef = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+        if key in self._index:
+            i = self._index[key]
+            self.coefficients[i] = coef[0]
+            self.intercepts[i] = intercept
+            self.n_rows[i] = n_rows
+            return
+        self._index[key] = len(self.keys)
+        self.keys.append(key)
+        self.coefficients = np.vstack([self.coefficients, coef])
+        self.intercepts = np.append(self.intercepts, float(intercept))
+        self.n_rows = np.append(self.n_rows, int(n_rows))
+
+    def shards(self):
+        """
+        List the (hall, meal_type) pairs held by the registry
+        """
+        return [tuple(key.split(KEY_SEPARATOR, 1)) for key in self.keys]
+
+    def resolve(self, hall, meal_type):
+        """
+        Route a request to its shard, falling back from the exact
+        (hall, meal) shard to the hall, meal and global shards
+        Returns the row index of the shard, or None
+        """
+        for candidate in (
+            shard_key(hall, meal_type),
+            shard_key(hall, ANY),
+            shard_key(ANY, meal_type),
+            shard_key(ANY, ANY),
+        ):
+            if candidate in self._index:
+                return self._index[candidate]
+        return None
+
+    def predict_frame(self, df, event_index=None):
+        """
+        Predict attendance for a DataFrame with hall, date and meal_type columns
+        Each row is routed to its own shard; rows are scored in one pass
+        Returns numpy array of predictions
+        """
+        halls = df['hall'].astype(str).to_numpy() if 'hall' in df.columns \
+            else np.full(len(df), ANY, dtype=object)
+        meals = df['meal_type'].astype(str).to_numpy()
+
+        # Resolve each distinct (hall, meal) once, then broadcast to rows
+        pairs = pd.MultiIndex.from_arrays([halls, meals])
+        codes, uniques = pd.factorize(pairs)
+        shard_rows = np.array([self.resolve(h, m) for h, m in uniques], dtype=object)
+        if any(row is None for row in shard_rows):
+            missing = [uniques[i] for i, row in enumerate(shard_rows) if row is None]
+            raise KeyError(f"No shard available for: {missing}")
+        row_index = shard_rows.astype(np.int64)[codes]
+
+        X = build_feature_frame(df['date'], meals, event_index)[self.feature_columns].to_numpy(dtype=np.float64)
+        coef = self.coefficients[row_index]
+        return np.einsum('ij,ij->i', X, coef) + self.intercepts[row_index]
+
+    def predict(self, hall, date_str, meal_type, event_index=None):
+        """
+        Predict attendance for a single hall, date and meal type
+        """
+        frame = pd.DataFrame({'hall': [hall], 'date': [date_str], 'meal_type': [meal_type]})
+        return round(float(self.predict_frame(frame, event_index)[0]))
+
+    def save(self, path=registry_path):
+        """
+        Save all shards into one compressed .npz artifact (no pickle)
+        """
+        np.savez_compressed(
+            path,
+            keys=np.array(self.keys, dtype=str),
+            coefficients=self.coefficients,
+            intercepts=self.intercepts,
+            n_rows=self.n_rows,
+            feature_columns=np.array(self.feature_columns, dtype=str),
+            schema_hash=np.array(schema_hash(self.feature_columns)),
+            version=np.array(REGISTRY_VERSION),
+            metadata=np.array(json.dumps(self.metadata))
+        )
+        print(f"Saved {len(self.keys)} shard models to: {path}")
+
+    @classmethod
+    def load(cls, path=registry_path):
+        """
+        Load a registry saved with save()
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != REGISTRY_VERSION:
+                raise ValueError(
+                    f"Unsupported registry version {int(data['version'])} "
+                    f"(expected {REGISTRY_VERSION}); retrain with ml/shard_training.py"
+                )
+            registry = cls(
+                feature_columns=[str(c) for c in data['feature_columns']],
+                metadata=json.loads(str(data['metadata']))
+            )
+            registry.keys = [str(k) for k in data['keys']]
+            registry.coefficients = data['coefficients'].astype(np.float64)
+            registry.intercepts = data['intercepts'].astype(np.float64)
+            registry.n_rows = data['n_rows'].astype(np.int64)
+            if schema_hash(registry.feature_columns) != str(data['schema_hash']):
+                raise ValueError(f"Schema hash mismatch in {path}; artifact is corrupted")
+        registry._index = {key: i for i, key in enumerate(registry.keys)}
+        return registry
+
+
+instrument_module(__name__)
+
+
+# Route a few example requests through the registry
+if __name__ == "__main__":
+    print("="*60)
+    print("      SHARDED PREDICTION - ROUTING REQUESTS TO SHARDS")
+    print("="*60)
+
+    registry = ShardedModelRegistry.load()
+    event_index = load_event_index()
+    print(f"\nLoaded {len(registry.keys)} shards from: {registry_path}")
+
+    requests = pd.DataFrame({
+        'hall': ['1', '1', '2', 'Z'],
+        'date': ['2026-01-25', '2026-01-25', '2026-01-26', '2026-01-26'],
+        'meal_type': ['Breakfast', 'Lunch', 'Dinner', 'Lunch']
+    })
+    requests['predicted'] = registry.predict_frame(requests, event_index).round().astype(int)
+    print("\n", requests.to_string(index=False))
@@ -1,12 +1,23 @@
 import os
+import sys
 import pandas as pd
-import pickle
 from datetime import datetime
 
 # Path setup
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
-model_path = os.path.join(project_root, 'ml', 'trained_model.pkl')
+model_path = os.path.join(project_root, 'ml', 'trained_model.json')
+calibration_path = os.path.join(project_root, 'ml', 'interval_calibration.json')
+sys.path.insert(0, project_root)
+
+from ml.model_artifact import LinearModelArtifact
+from ml.features import build_forecast_grid
+from ml.intervals import ResidualCalibrator, predict_interval_grid
+from ml.food_planner import load_portions, plan_quantities, summarise_plan
+from ml.event_features import load_event_index
+
+# Planning target for the headcount shown with each forecast
+shortage_probability = 0.05    # accept a 5% chance of running short
 
 print("="*60)
 print("    AI PREDICTION SYSTEM - HOSTEL ATTENDANCE FORECASTING")
@@ -14,9 +25,10 @@ print("="*60)
 
 # Load trained model
 print(f"\nLoading trained model from: {model_path}")
-with open(model_path, 'rb') as file:
-    model = pickle.load(file)
-print("Model loaded successfully!")
+model = LinearModelArtifact.load(model_path)
+print(f"Model loaded successfully! (schema {model.schema_hash})")
+calibrator = ResidualCalibrator.load(calibration_path)
+event_index = load_event_index()
 
 # Function to create features from date and meal type
 def create_features(date_str, meal_type):
@@ -40,13 +52,18 @@ def create_features(date_str, meal_type):
     }
     meal_type_encoded = meal_mapping.get(meal_type, 1)  # Default to Lunch
     
+    # Special events active on this date (precomputed index lookup)
+    events = event_index.event_features([date_obj]).iloc[0]
+    
     # Create feature dictionary
     features = {
         'day_of_week_num': day_of_week_num,
         'is_weekend': is_weekend,
         'month': month,
         'day_of_month': day_of_month,
-        'meal_type_encoded': meal_type_encoded
+        'meal_type_encoded': meal_type_encoded,
+        'event_impact': float(events['event_impact']),
+        'has_event': int(events['has_event'])
     }
     
     return features, date_obj
@@ -102,45 +119,50 @@ print(f"   Day of Week: {date_obj2.strftime('%A')}")
 print(f"   Weekend: {'Yes' if feat2['is_weekend'] else 'No'}")
 print(f"\n                 PREDICTED ATTENDANCE: {pred2} students")
 
-# Batch prediction for next 7 days
+# Batch prediction for next 7 days (whole grid scored at once, with intervals)
 print("\n" + "="*60)
 print("             NEXT 7 DAYS FORECAST (Lunch)")
 print("="*60)
 
-from datetime import timedelta
-
-start_date = datetime(2026, 1, 25)
-predictions_list = []
-
-for i in range(7):
-    current_date = start_date + timedelta(days=i)
-    date_str = current_date.strftime('%Y-%m-%d')
-    
-    pred, feat, date_obj = predict_attendance(date_str, 'Lunch')
-    
-    predictions_list.append({
-        'Date': date_str,
-        'Day': date_obj.strftime('%A'),
-        'Weekend': 'Yes' if feat['is_weekend'] else 'No',
-        'Predicted_Attendance': pred
-    })
-
-forecast_df = pd.DataFrame(predictions_list)
+grid = build_forecast_grid('2026-01-25', 7, meal_types=['Lunch'])
+forecast = predict_interval_grid(model, grid, calibrator,
+                                 shortage_probability=shortage_probability,
+                                 event_index=event_index)
+
+forecast_df = pd.DataFrame({
+    'Date': forecast['date'].dt.strftime('%Y-%m-%d'),
+    'Day': forecast['date'].dt.day_name(),
+    'Weekend': forecast['date'].dt.dayofweek.map(lambda d: 'Yes' if d >= 5 else 'No'),
+    'Predicted_Attendance': forecast['predicted'],
+    '80%_Interval': forecast['lower'].astype(str) + '-' + forecast['upper'].astype(str),
+    'Confidence': forecast['confidence_score'],
+    'Plan_For': forecast['plan_headcount']
+})
 print("\n", forecast_df.to_string(index=False))
 
-# Calculate recommended food quantity (assuming 0.25 kg per student)
+# Per-dish quantities minimising expected wastage + shortage cost
 print("\n" + "="*60)
 print("         RESOURCE PLANNING RECOMMENDATION")
 print("="*60)
 
-avg_prediction = forecast_df['Predicted_Attendance'].mean()
-food_per_student = 0.25  # kg per student
-recommended_food = avg_prediction * food_per_student
+plan = plan_quantities(forecast, load_portions(), calibrator)
+# Merged on the key: a meal without portions rows has no plan row (NaN kg)
+meal_plan = summarise_plan(plan)[['date', 'meal_type', 'decision_quantity']]
+forecast = forecast.merge(meal_plan, on=['date', 'meal_type'], how='left')
+
+dish_totals = plan.groupby('dish', sort=False)[['quantity_kg', 'expected_waste_kg', 'expected_shortage_kg']].sum()
 
-print(f"\nAverage predicted attendance (next 7 days): {avg_prediction:.0f} students")
-print(f"Recommended food preparation: {recommended_food:.2f} kg per meal")
-print(f"Weekly food requirement (Lunch only): {recommended_food * 7:.2f} kg")
+print(f"\nAverage predicted attendance (next 7 days): {forecast['predicted'].mean():.0f} students")
+print(f"Recommended food preparation: {forecast['decision_quantity'].mean():.2f} kg per meal")
+print(f"Weekly food requirement (Lunch only): {forecast['decision_quantity'].sum():.2f} kg")
+print("\nWeekly quantity per dish (kg):")
+print(dish_totals.round(2).to_string())
 
 print("\n" + "="*60)
 print("                 PREDICTION COMPLETE!")
-print("="*60)
\ No newline at end of file
+print("="*60)
+
+# Store forecasts with confidence scores: python ml/predict.py --save
+if '--save' in sys.argv:
+    from core.meal_summary import save_meal_predictions
+    save_meal_predictions(forecast.to_dict('records'), model_name=model.model_type)
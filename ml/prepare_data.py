@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
@@ -6,6 +7,10 @@ from sklearn.model_selection import train_test_split
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 data_path = os.path.join(project_root, 'data', 'attendance_features.csv')
+sys.path.insert(0, project_root)
+
+from core.schemas import SchemaError
+from ml.features import FEATURE_COLUMNS, TARGET_COLUMN, ATTENDANCE_FEATURES, TRAINING_DATA
 
 print("="*60)
 print("ML DATA PREPARATION - TRAIN-TEST SPLIT")
@@ -13,7 +18,13 @@ print("="*60)
 
 # Load feature-engineered data
 print(f"\nLoading data from: {data_path}")
-df = pd.read_csv(data_path)
+try:
+    df = ATTENDANCE_FEATURES.read_csv(data_path)
+except SchemaError as e:
+    # Missing or mistyped columns are all reported at once
+    print(f"{data_path} does not match its schema:\n   " + "\n   ".join(e.errors))
+    print("Please run feature_engineering.py first!")
+    sys.exit(1)
 
 print(f"Loaded {len(df)} records")
 print(f"\nColumns available: {list(df.columns)}")
@@ -23,28 +34,11 @@ print("\n" + "="*60)
 print("FEATURE SELECTION")
 print("="*60)
 
-# Features to use for ML model
-feature_columns = [
-    'day_of_week_num',
-    'is_weekend',
-    'month',
-    'day_of_month',
-    'meal_type_encoded'
-]
-
-# Check if all features exist
-missing_features = [col for col in feature_columns if col not in df.columns]
-if missing_features:
-    print(f"Missing features: {missing_features}")
-    print("Please run feature_engineering.py first!")
-    exit()
+# Features to use for ML model (calendar + special event features)
+feature_columns = FEATURE_COLUMNS
 
 # Target variable (what we want to predict)
-target_column = 'actual_attended'
-
-if target_column not in df.columns:
-    print(f"Target column '{target_column}' not found!")
-    exit()
+target_column = TARGET_COLUMN
 
 # Separate Features and Target
 X = df[feature_columns]
@@ -71,8 +65,8 @@ print(f"\nTraining set: {len(X_train)} records ({len(X_train)/len(X)*100:.1f}%)"
 print(f"Testing set:  {len(X_test)} records ({len(X_test)/len(X)*100:.1f}%)")
 
 # Create train and test dataframes
-train_df = pd.concat([X_train, y_train], axis=1)
-test_df = pd.concat([X_test, y_test], axis=1)
+train_df = TRAINING_DATA.validate(pd.concat([X_train, y_train], axis=1))
+test_df = TRAINING_DATA.validate(pd.concat([X_test, y_test], axis=1))
 
 # Save to CSV
 train_path = os.path.join(project_root, 'data', 'train_data.csv')
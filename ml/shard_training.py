@@ -0,0 +1,138 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.linear_model import LinearRegression
+
+from core.halls import DEFAULT_HALL
+from core.schemas import ATTENDANCE_SUMMARY, HALL_ATTENDANCE_SUMMARY
+from ml.features import FEATURE_COLUMNS, TARGET_COLUMN, build_feature_frame
+from ml.model_registry import ANY, ShardedModelRegistry, registry_path
+from ml.event_features import load_event_index
+from core.profiling import instrument_module
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+hall_data_path = os.path.join(project_root, 'data', 'hall_attendance_summary.csv')
+data_path = os.path.join(project_root, 'data', 'attendance_summary.csv')
+
+# Shards with fewer rows than this are served by a fallback shard instead
+MIN_SHARD_ROWS = 3
+
+
+def _fit_shard(task):
+    """
+    Fit one shard's Linear Regression (runs inside a worker process)
+    Returns (hall, meal_type, coef, intercept, n_rows)
+    """
+    hall, meal_type, X, y = task
+    model = LinearRegression()
+    model.fit(X, y)
+    return hall, meal_type, model.coef_, model.intercept_, len(y)
+
+
+def make_shard_tasks(df, min_rows=MIN_SHARD_ROWS, event_index=None):
+    """
+    Split attendance rows into (hall, meal_type) training tasks, plus
+    per-hall, per-meal and global fallback shards
+    Returns list of (hall, meal_type, X, y) tuples
+    """
+    df = df.copy()
+    if 'hall' not in df.columns:
+        df['hall'] = DEFAULT_HALL
+    df['hall'] = df['hall'].astype(str)
+
+    # Features are built once for the whole table, then sliced per shard
+    X_all = build_feature_frame(df['date'], df['meal_type'], event_index)[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y_all = df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+
+    groupings = [
+        (['hall', 'meal_type'], lambda key: key),
+        (['hall'], lambda key: (key[0], ANY)),
+        (['meal_type'], lambda key: (ANY, key[0])),
+    ]
+
+    tasks = []
+    for columns, to_shard in groupings:
+        for key, positions in df.groupby(columns, sort=True).indices.items():
+            key = key if isinstance(key, tuple) else (key,)
+            if len(positions) < min_rows:
+                continue
+            hall, meal_type = to_shard(key)
+            tasks.append((hall, meal_type, X_all[positions], y_all[positions]))
+
+    # The global shard is always trained so every request can be routed
+    tasks.append((ANY, ANY, X_all, y_all))
+    return tasks
+
+
+def train_sharded_models(df, n_jobs=None, min_rows=MIN_SHARD_ROWS, event_index=None):
+    """
+    Train one model per (hall, meal_type) shard in parallel across cores
+    Returns a ShardedModelRegistry holding every shard
+    """
+    tasks = make_shard_tasks(df, min_rows=min_rows, event_index=event_index)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if n_jobs == 1:
+        results = [_fit_shard(task) for task in tasks]
+    else:
+        # Largest shards first so no worker is left with a long tail
+        tasks.sort(key=lambda task: len(task[3]), reverse=True)
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_fit_shard, tasks, chunksize=max(1, len(tasks) // (4 * n_jobs))))
+    elapsed = time.perf_counter() - start
+
+    registry = ShardedModelRegistry(
+        feature_columns=FEATURE_COLUMNS,
+        metadata={
+            'model': 'LinearRegression',
+            'trained_rows': int(len(df)),
+            'min_shard_rows': int(min_rows),
+            'trained_at': pd.Timestamp.now().isoformat(timespec='seconds')
+        }
+    )
+    for hall, meal_type, coef, intercept, n_rows in sorted(results, key=lambda r: (r[0], r[1])):
+        registry.add_shard(hall, meal_type, coef, intercept, n_rows)
+
+    print(f"Trained {len(results)} shards on {n_jobs} worker(s) in {elapsed:.2f}s")
+    return registry
+
+
+def load_training_data():
+    """
+    Load per-hall attendance if exported, otherwise the single-hall summary
+    """
+    if os.path.exists(hall_data_path):
+        print(f"\nLoading per-hall data from: {hall_data_path}")
+        return HALL_ATTENDANCE_SUMMARY.read_csv(hall_data_path)
+    print(f"\nLoading data from: {data_path}")
+    return ATTENDANCE_SUMMARY.read_csv(data_path)
+
+
+instrument_module(__name__)
+
+
+# Train the sharded models and save the registry
+if __name__ == "__main__":
+    print("="*60)
+    print("      SHARDED MODEL TRAINING - ONE MODEL PER HALL/MEAL")
+    print("="*60)
+
+    df = load_training_data()
+    print(f"Loaded {len(df)} records")
+
+    registry = train_sharded_models(df, event_index=load_event_index())
+
+    print("\nShards trained:")
+    for (hall, meal_type), n_rows in zip(registry.shards(), registry.n_rows):
+        print(f"   • hall={hall:<4} meal={meal_type:<10} rows={n_rows}")
+
+    registry.save(registry_path)
+
+    print("\n" + "="*60)
+    print("SHARDED TRAINING COMPLETE!")
+    print("="*60)
@@ -1,6 +1,6 @@
 import os
+import sys
 import pandas as pd
-import pickle
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import numpy as np
@@ -8,6 +8,13 @@ import numpy as np
 # Path setup
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from ml.model_artifact import save_linear_model
+from ml.features import FEATURE_COLUMNS, TARGET_COLUMN, ATTENDANCE_FEATURES, TRAINING_DATA
+from ml.event_features import load_event_index
+from ml.intervals import ResidualCalibrator, walk_forward_residuals
+from ml.backtest import compare_windows
 train_path = os.path.join(project_root, 'data', 'train_data.csv')
 test_path = os.path.join(project_root, 'data', 'test_data.csv')
 
@@ -17,23 +24,17 @@ print("="*60)
 
 # Load training data
 print(f"\nLoading training data from: {train_path}")
-train_df = pd.read_csv(train_path)
+train_df = TRAINING_DATA.read_csv(train_path)
 print(f"Loaded {len(train_df)} training records")
 
 # Load testing data
 print(f"\nLoading testing data from: {test_path}")
-test_df = pd.read_csv(test_path)
+test_df = TRAINING_DATA.read_csv(test_path)
 print(f"Loaded {len(test_df)} testing records")
 
 # Define features and target
-feature_columns = [
-    'day_of_week_num',
-    'is_weekend',
-    'month',
-    'day_of_month',
-    'meal_type_encoded'
-]
-target_column = 'actual_attended'
+feature_columns = FEATURE_COLUMNS
+target_column = TARGET_COLUMN
 
 # Prepare training data
 X_train = train_df[feature_columns]
@@ -106,13 +107,43 @@ comparison_df = pd.DataFrame({
 })
 print(comparison_df)
 
-# Save the trained model
-model_path = os.path.join(project_root, 'ml', 'trained_model.pkl')
-with open(model_path, 'wb') as file:
-    pickle.dump(model, file)
+# Save the trained model (versioned JSON artifact, no pickle)
+model_path = os.path.join(project_root, 'ml', 'trained_model.json')
+save_linear_model(model, model_path, feature_columns, metadata={
+    'target_column': target_column,
+    'trained_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+    'training_rows': int(len(train_df)),
+    'test_mae': float(test_mae),
+    'test_rmse': float(test_rmse)
+})
 
 print(f"\nModel saved to: {model_path}")
 
+# Calibrate prediction intervals on walk-forward residuals over full history
+print("\n" + "="*60)
+print("INTERVAL CALIBRATION (WALK-FORWARD RESIDUALS)")
+print("="*60)
+
+features_path = os.path.join(project_root, 'data', 'attendance_features.csv')
+residual_df = walk_forward_residuals(ATTENDANCE_FEATURES.read_csv(features_path), event_index=load_event_index())
+calibrator = ResidualCalibrator.from_residuals(residual_df)
+calibration_path = os.path.join(project_root, 'ml', 'interval_calibration.json')
+calibrator.save(calibration_path)
+
+print(f"\nWalk-forward residuals: {len(residual_df)}")
+print(f"Residual MAE: {residual_df['residual'].abs().mean():.2f} students")
+print(f"Calibration saved to: {calibration_path}")
+
+# Walk-forward backtest: error per meal / weekday / event bucket
+print("\n" + "="*60)
+print("WALK-FORWARD BACKTEST (python ml/backtest.py for details)")
+print("="*60)
+
+backtest_report = compare_windows(ATTENDANCE_FEATURES.read_csv(features_path), event_index=load_event_index())
+for window, metrics in backtest_report.groupby('window', sort=False):
+    print(f"\n{window}:")
+    print(metrics[metrics['bucket'].isin(['overall', 'meal_type'])].drop(columns='window').to_string(index=False))
+
 print("\n" + "="*60)
 print("MODEL TRAINING COMPLETE!")
 print("="*60)
@@ -0,0 +1,367 @@
+"""
+Read-only HTTP API for the kitchen's planning reports.
+
+GET  /plan/next-day     tomorrow's plan (per meal: predicted headcount,
+                        interval, plan headcount, food kg per dish)
+GET  /plan/YYYY-MM-DD   plan for a given day
+GET  /summary/YYYY-MM-DD  daily_meal_summary rows (actuals + stored prediction)
+POST /refresh           rebuild tomorrow's plan with the current model
+GET  /health            cache state
+
+Plans are the JSON files services/refresh_daemon.py precomputes in
+data/cache/plans/. Each one is held in memory as ready-to-send bytes (plain
+and gzip) with its ETag and reloaded only when the file changes, so a
+request is a stat() and a socket write; no model is loaded on the request
+path. Clients revalidate with If-None-Match and get 304 when nothing changed.
+Only a missing next-day plan is built on request (once, then cached).
+Add ?profile=1 to profile a request when running with HOSTEL_PROFILE=request.
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from core.profiling import profile_request
+from services.refresh_daemon import plan_dir, refresh_plan
+
+DEFAULT_PORT = 8080
+# Below this size gzip costs more than it saves
+GZIP_MIN_BYTES = 512
+# daily_meal_summary changes at most once per meal close
+SUMMARY_TTL_SECONDS = 60
+
+
+class CachedResponse:
+    """
+    One response body, pre-encoded: plain and gzip bytes, each with its own
+    strong ETag (a strong validator must differ per content-coding)
+    """
+
+    def __init__(self, payload, stamp=None):
+        self.body = json.dumps(payload, default=str, separators=(',', ':')).encode()
+        self.gzip_body = gzip.compress(self.body, 6) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+        self.gzip_etag = self.etag[:-1] + '-gz"' if self.gzip_body is not None else None
+        self.stamp = stamp
+        self.loaded_at = time.time()
+
+
+class PlanCache:
+    """
+    In-memory plan reports keyed by date, kept in step with the plan files
+    (file mtime/size checked on every get)
+    """
+
+    def __init__(self, directory=plan_dir):
+        self.directory = directory
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def path(self, day):
+        return os.path.join(self.directory, f"{day}.json")
+
+    def _load(self, day, stamp):
+        with open(self.path(day)) as f:
+            report = json.load(f)
+        entry = CachedResponse(report, stamp)
+        self.entries[day] = entry
+        return entry
+
+    def get(self, day):
+        """
+        Cached response for day, None if there is no plan file
+        """
+        try:
+            stat = os.stat(self.path(day))
+        except FileNotFoundError:
+            self.entries.pop(day, None)
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(day)
+        if entry is not None and entry.stamp == stamp:
+            self.hits += 1
+            return entry
+        with self._lock:
+            entry = self.entries.get(day)
+            if entry is None or entry.stamp != stamp:
+                self.misses += 1
+                entry = self._load(day, stamp)
+        return entry
+
+    def build(self, day, rebuild=False):
+        """
+        Run the model for day's plan now (writes the plan file) and cache it
+        Requests that queued behind a build get its result instead of rebuilding
+        """
+        with self._build_lock:
+            entry = None if rebuild else self.get(day)
+            if entry is None:
+                refresh_plan(day, save_to_db=False)
+                entry = self.get(day)
+        return entry
+
+    def warm(self):
+        """
+        Load every plan file already on disk; returns number loaded
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        days = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+        for day in days:
+            self.get(day)
+        return len(days)
+
+    def stats(self):
+        return {'plans': sorted(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class SummaryCache:
+    """
+    daily_meal_summary rows per day, re-read after SUMMARY_TTL_SECONDS
+    """
+
+    def __init__(self, ttl=SUMMARY_TTL_SECONDS):
+        self.ttl = ttl
+        self.entries = {}
+
+    def get(self, day):
+        entry = self.entries.get(day)
+        if entry is not None and time.time() - entry.loaded_at < self.ttl:
+            return entry
+        from core.meal_summary import fetch_day_summary
+        rows = fetch_day_summary(day)
+        if rows is None:
+            return None
+        entry = CachedResponse({'date': day, 'meals': rows})
+        self.entries[day] = entry
+        return entry
+
+
+def _parse_day(text):
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _accepts_gzip(header):
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _etag_matches(header, etags):
+    """
+    If-None-Match check (weak comparison, as RFC 9110 requires for it)
+    """
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in candidates or any(etag in candidates for etag in etags if etag)
+
+
+class PlanningHandler(BaseHTTPRequestHandler):
+    server_version = 'HostelPlanning/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, keep-alive
+    # clients wait ~40 ms for the delayed ACK before the body goes out
+    disable_nagle_algorithm = True
+    plans = None
+    summaries = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_cached(self, entry, cache_state):
+        """
+        304 if the client's ETag matches either encoding, else the body
+        (gzip if accepted)
+        """
+        use_gzip = entry.gzip_body is not None and _accepts_gzip(self.headers.get('Accept-Encoding'))
+        etag = entry.gzip_etag if use_gzip else entry.etag
+        if _etag_matches(self.headers.get('If-None-Match'), (entry.etag, entry.gzip_etag)):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = entry.gzip_body if use_gzip else entry.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        # Always revalidate: a new plan can land at any meal close
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('X-Cache', cache_state)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        with profile_request(enabled=query.get('profile', ['0'])[0] == '1'):
+            if self.command == 'POST':
+                if parts == ['refresh']:
+                    return self._refresh()
+                return self._send_json(404, {'error': 'not found'})
+            if parts == ['health']:
+                return self._send_json(200, {'status': 'ok', **self.plans.stats()})
+            if len(parts) == 2 and parts[0] == 'plan':
+                return self._plan(parts[1])
+            if len(parts) == 2 and parts[0] == 'summary':
+                return self._summary(parts[1])
+            return self._send_json(404, {'error': 'not found'})
+
+    def _plan(self, which):
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        day = tomorrow if which == 'next-day' else _parse_day(which)
+        if day is None:
+            return self._send_json(400, {'error': 'date must be YYYY-MM-DD or next-day'})
+        entry, state = self.plans.get(day), 'HIT'
+        if entry is None and day == tomorrow:
+            # Daemon has not produced it yet: build once, serve from cache after
+            entry, state = self.plans.build(day), 'MISS'
+        if entry is None:
+            return self._send_json(404, {'error': f'no plan for {day}'})
+        self._send_cached(entry, state)
+
+    def _summary(self, which):
+        day = _parse_day(which)
+        if day is None:
+            return self._send_json(400, {'error': 'date must be YYYY-MM-DD'})
+        entry = self.summaries.get(day)
+        if entry is None:
+            return self._send_json(503, {'error': 'daily_meal_summary unavailable'})
+        self._send_cached(entry, 'HIT')
+
+    def _refresh(self):
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        entry = self.plans.build(tomorrow, rebuild=True)
+        self._send_json(200, {'date': tomorrow, 'etag': entry.etag})
+
+    def _handle(self):
+        # Drain any request body so a keep-alive connection stays in step
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body cannot be skipped, so the connection cannot be reused
+            self.close_connection = True
+            return self._send_json(400, {'error': 'invalid Content-Length'})
+        if length > 0:
+            self.rfile.read(length)
+        try:
+            self._route()
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    do_GET = do_HEAD = do_POST = _handle
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, directory=plan_dir, quiet=False):
+    """
+    Threaded server with a warmed plan cache (not started)
+    """
+    handler = type('Handler', (PlanningHandler,), {
+        'plans': PlanCache(directory),
+        'summaries': SummaryCache(),
+        'quiet': quiet,
+    })
+    handler.plans.warm()
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def benchmark(server, requests=500):
+    """
+    Time cached /plan/next-day requests against a running server:
+    full gzip responses and 304 revalidations
+    """
+    import http.client
+
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('GET', '/plan/next-day', headers={'Accept-Encoding': 'gzip'})
+    first = conn.getresponse()
+    body = first.read()
+    etag = first.getheader('ETag')
+    print(f"First request: {first.status} {first.getheader('X-Cache')}, "
+          f"{len(body)} bytes ({first.getheader('Content-Encoding') or 'identity'})")
+
+    for label, headers in [('200 gzip', {'Accept-Encoding': 'gzip'}),
+                           ('304 revalidate', {'Accept-Encoding': 'gzip', 'If-None-Match': etag})]:
+        start = time.perf_counter()
+        for _ in range(requests):
+            conn.request('GET', '/plan/next-day', headers=headers)
+            conn.getresponse().read()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<15} {elapsed / requests * 1000:6.2f} ms/request")
+    conn.close()
+
+
+# Serve plans: python services/planning_api.py [--port 8080] [--benchmark]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cached planning report API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--benchmark', action='store_true', help="time cached requests and exit")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("          PLANNING REPORT API")
+    print("="*60)
+
+    server = make_server(args.host, args.port, quiet=args.benchmark)
+    print(f"Plans cached: {', '.join(server.RequestHandlerClass.plans.stats()['plans']) or 'none yet'}")
+
+    if args.benchmark:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        benchmark(server)
+        server.shutdown()
+        sys.exit(0)
+
+    print(f"Serving on http://{args.host}:{args.port}/plan/next-day (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nPlanning API stopped")
+    finally:
+        server.server_close()
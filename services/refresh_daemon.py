@@ -0,0 +1,338 @@
+"""
+Background refresh daemon: keeps summaries, features, the model and the
+next-day plan current without anyone running scripts by hand.
+
+Schedule (local time):
+  - each meal window close (analytics/anomaly_detector.MEAL_WINDOWS)
+    + MEAL_CLOSE_DELAY: refresh daily_meal_summary.total_present for that
+    meal, merge the day's rows into attendance_summary.csv and
+    attendance_features.csv, and re-plan tomorrow
+  - nightly at NIGHTLY_AT: re-check yesterday, export special events, re-run
+    feature_engineering / prepare_data / train_model, re-plan tomorrow
+The plan (per meal forecast, interval and food kg) is cached as JSON in
+data/cache/plans/ and upserted into daily_meal_summary.
+
+Runs on one asyncio loop: database calls go to threads and pipeline stages
+to low-priority child processes, so the loop never blocks and the scanning
+path only sees one small upsert per meal. Every run is jittered; a failed
+run retries with jittered exponential backoff. Job durations and failures
+are written to data/cache/refresh_metrics.json.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cache_dir = os.path.join(project_root, 'data', 'cache')
+plan_dir = os.path.join(cache_dir, 'plans')
+metrics_path = os.path.join(cache_dir, 'refresh_metrics.json')
+summary_path = os.path.join(project_root, 'data', 'attendance_summary.csv')
+features_path = os.path.join(project_root, 'data', 'attendance_features.csv')
+sys.path.insert(0, project_root)
+
+from core.schemas import ATTENDANCE_SUMMARY
+from core.data_loader import fetch_attendance_data, fetch_special_events
+from core.meal_summary import refresh_meal_actuals, save_meal_predictions
+from analytics.anomaly_detector import MEAL_WINDOWS, MEAL_ORDER
+from ml.features import ATTENDANCE_FEATURES, build_attendance_features
+from ml.event_features import events_path, load_event_index
+from ml.model_artifact import LinearModelArtifact
+from ml.intervals import ResidualCalibrator
+from ml.food_planner import (model_path, calibration_path, load_portions, build_day_plan,
+                             day_plan_report)
+
+# Give late scans a few minutes after the window closes
+MEAL_CLOSE_DELAY = timedelta(minutes=10)
+NIGHTLY_AT = (2, 30)
+NIGHTLY_STAGES = ['feature_engineering', 'prepare_data', 'train_model']
+JITTER_SECONDS = 60
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 900
+# Pipeline child processes yield the CPU to the scanning services
+CHILD_NICE = 10
+
+
+class RefreshError(Exception):
+    """A refresh step failed and should be retried"""
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _write_csv(df, path):
+    tmp_path = path + '.tmp'
+    df.to_csv(tmp_path, index=False, date_format='%Y-%m-%d')
+    os.replace(tmp_path, path)
+
+
+def merge_history(day_summary):
+    """
+    Replace the days in day_summary inside attendance_summary.csv and
+    attendance_features.csv (features are built for the new rows only)
+    Returns number of rows merged
+    """
+    day_summary = ATTENDANCE_SUMMARY.conform(day_summary)
+    days = day_summary['date'].unique()
+    day_features = build_attendance_features(day_summary, load_event_index())
+
+    for path, schema, rows in [(summary_path, ATTENDANCE_SUMMARY, day_summary),
+                               (features_path, ATTENDANCE_FEATURES, day_features)]:
+        if os.path.exists(path):
+            history = schema.read_csv(path)
+            history = pd.concat([history[~history['date'].isin(days)], rows], ignore_index=True)
+        else:
+            history = rows
+        history = schema.conform(history.sort_values(['date', 'meal_type'], ignore_index=True))
+        _write_csv(history, path)
+    return len(day_summary)
+
+
+def refresh_plan(day, save_to_db=True):
+    """
+    Build the kitchen plan for `day` with the current model and cache it
+    Returns the report dict
+    """
+    model = LinearModelArtifact.load(model_path)
+    calibrator = ResidualCalibrator.load(calibration_path)
+    forecast, plan = build_day_plan(day, model, calibrator, load_portions(), load_event_index())
+    report = day_plan_report(forecast, plan)
+    report['generated_at'] = datetime.now().isoformat(timespec='seconds')
+    report['model_schema_hash'] = model.schema_hash
+    _write_json(os.path.join(plan_dir, f"{report['date']}.json"), report)
+    if save_to_db and not save_meal_predictions(forecast.to_dict('records'), model_name=model.model_type):
+        raise RefreshError("could not save predictions to daily_meal_summary")
+    return report
+
+
+class Job:
+    """
+    A named async action with a schedule, retries and duration metrics
+    next_slot(now) -> datetime of the next scheduled run after now
+    """
+
+    def __init__(self, name, next_slot, action, jitter=JITTER_SECONDS, max_retries=MAX_RETRIES):
+        self.name = name
+        self.next_slot = next_slot
+        self.action = action
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.metrics = {
+            'runs': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+            'last_started': None,
+            'last_duration_s': None,
+            'max_duration_s': 0.0,
+            'total_duration_s': 0.0,
+            'last_success': None,
+            'last_error': None,
+            'next_run': None,
+        }
+
+    def record(self, started_at, seconds, error=None):
+        m = self.metrics
+        m['runs'] += 1
+        m['last_started'] = started_at.isoformat(timespec='seconds')
+        m['last_duration_s'] = round(seconds, 3)
+        m['max_duration_s'] = round(max(m['max_duration_s'], seconds), 3)
+        m['total_duration_s'] = round(m['total_duration_s'] + seconds, 3)
+        if error is None:
+            m['consecutive_failures'] = 0
+            m['last_success'] = m['last_started']
+        else:
+            m['failures'] += 1
+            m['consecutive_failures'] += 1
+            m['last_error'] = f"{type(error).__name__}: {error}"
+
+
+def meal_close_slot(meal):
+    def next_slot(now):
+        close = datetime.combine(now.date(), MEAL_WINDOWS[meal][1]) + MEAL_CLOSE_DELAY
+        return close if close > now else close + timedelta(days=1)
+    return next_slot
+
+
+def nightly_slot(now):
+    slot = now.replace(hour=NIGHTLY_AT[0], minute=NIGHTLY_AT[1], second=0, microsecond=0)
+    return slot if slot > now else slot + timedelta(days=1)
+
+
+class RefreshDaemon:
+    """
+    Runs every job on its own schedule; steps that rewrite the pipeline
+    files (CSV history, model) hold one lock so they never interleave
+    """
+
+    def __init__(self, save_to_db=True):
+        self.save_to_db = save_to_db
+        self.pipeline_lock = asyncio.Lock()
+        self.stopping = asyncio.Event()
+        self.jobs = [Job(f'meal_close:{meal}', meal_close_slot(meal), self._meal_closed_action(meal))
+                     for meal in MEAL_ORDER]
+        self.jobs.append(Job('nightly', nightly_slot, self.nightly))
+        self.jobs.append(Job('plan', lambda now: now, self.plan, jitter=0))
+
+    # ---------- steps ----------
+
+    async def _refresh_day(self, day, meal_type=None):
+        if self.save_to_db and await asyncio.to_thread(refresh_meal_actuals, day, meal_type) is None:
+            raise RefreshError(f"daily_meal_summary refresh failed for {day} {meal_type or ''}")
+        day_summary = await asyncio.to_thread(fetch_attendance_data, day, day)
+        if day_summary is None:
+            raise RefreshError(f"could not fetch attendance for {day}")
+        async with self.pipeline_lock:
+            merged = await asyncio.to_thread(merge_history, day_summary)
+        print(f"   {day}: {merged} summary rows merged")
+
+    async def _run_stage(self, stage):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(project_root, 'ml', f'{stage}.py'),
+            cwd=project_root, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        # Reniced after the spawn: preexec_fn is not safe while to_thread workers run
+        if hasattr(os, 'setpriority'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, process.pid,
+                               os.getpriority(os.PRIO_PROCESS, 0) + CHILD_NICE)
+            except OSError:
+                pass  # already exited
+        output, _ = await process.communicate()
+        if process.returncode != 0:
+            tail = output.decode(errors='replace').strip().splitlines()[-3:]
+            raise RefreshError(f"{stage} exited with {process.returncode}: {' | '.join(tail)}")
+
+    async def plan(self, slot=None):
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        report = await asyncio.to_thread(refresh_plan, tomorrow, self.save_to_db)
+        kg = sum(meal['food_kg'] or 0 for meal in report['meals'])
+        print(f"   plan for {tomorrow} cached ({kg:.1f} kg across {len(report['meals'])} meals)")
+
+    def _meal_closed_action(self, meal):
+        async def action(slot):
+            await self._refresh_day(slot.date(), meal)
+            await self.plan(slot)
+        return action
+
+    async def nightly(self, slot):
+        yesterday = slot.date() - timedelta(days=1)
+        await self._refresh_day(yesterday)
+        if await asyncio.to_thread(fetch_special_events, events_path) is None:
+            raise RefreshError("could not export special_events")
+        async with self.pipeline_lock:
+            for stage in NIGHTLY_STAGES:
+                await self._run_stage(stage)
+        await self.plan(slot)
+
+    # ---------- scheduling ----------
+
+    def save_metrics(self):
+        _write_json(metrics_path, {
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'jobs': {job.name: job.metrics for job in self.jobs},
+        })
+
+    async def _sleep(self, seconds):
+        """
+        Sleep unless stopped first; returns False when stopping
+        """
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout=max(seconds, 0))
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    async def run_once(self, job, slot):
+        """
+        Run a job now, retrying failures with jittered exponential backoff
+        Returns True on success
+        """
+        for attempt in range(job.max_retries + 1):
+            started_at, started = datetime.now(), time.perf_counter()
+            print(f"[{started_at:%H:%M:%S}] {job.name} started")
+            try:
+                await job.action(slot)
+                job.record(started_at, time.perf_counter() - started)
+                print(f"[{datetime.now():%H:%M:%S}] {job.name} done in {job.metrics['last_duration_s']:.1f}s")
+                return True
+            except Exception as e:
+                job.record(started_at, time.perf_counter() - started, e)
+                if attempt == job.max_retries:
+                    print(f"[{datetime.now():%H:%M:%S}] {job.name} failed: {e}; giving up until next slot")
+                    return False
+                backoff = min(BACKOFF_BASE_SECONDS * 2 ** attempt, BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1.5)
+                print(f"[{datetime.now():%H:%M:%S}] {job.name} failed: {e}; retry in {backoff:.0f}s")
+                if not await self._sleep(backoff):
+                    return False
+            finally:
+                self.save_metrics()
+
+    async def _job_loop(self, job):
+        while not self.stopping.is_set():
+            slot = job.next_slot(datetime.now())
+            job.metrics['next_run'] = slot.isoformat(timespec='seconds')
+            delay = (slot - datetime.now()).total_seconds() + random.uniform(0, job.jitter)
+            if not await self._sleep(delay):
+                return
+            await self.run_once(job, slot)
+            if job.name == 'plan':
+                return  # warm-up only; later plans follow the refresh jobs
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        for job in self.jobs:
+            job.metrics['next_run'] = job.next_slot(datetime.now()).isoformat(timespec='seconds')
+        self.save_metrics()
+        await asyncio.gather(*(self._job_loop(job) for job in self.jobs))
+        self.save_metrics()
+
+
+# Run the daemon: python services/refresh_daemon.py [--once JOB] [--no-db]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scheduled refresh of summaries, features, model and plans")
+    parser.add_argument('--once', metavar='JOB',
+                        help="run one job now and exit: plan, nightly or meal_close:<Meal>")
+    parser.add_argument('--no-db', action='store_true',
+                        help="skip daily_meal_summary writes (plan cache only)")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("          BACKGROUND REFRESH DAEMON")
+    print("="*60)
+
+    daemon = RefreshDaemon(save_to_db=not args.no_db)
+    if args.once:
+        job = next((job for job in daemon.jobs if job.name == args.once), None)
+        if job is None:
+            parser.error(f"unknown job {args.once}; choose from {[job.name for job in daemon.jobs]}")
+        job.max_retries = 0
+        ok = asyncio.run(daemon.run_once(job, datetime.now()))
+        print(f"Metrics: {metrics_path}")
+        sys.exit(0 if ok else 1)
+
+    for job in daemon.jobs:
+        print(f"   {job.name:<20} next at {job.next_slot(datetime.now()):%Y-%m-%d %H:%M}")
+    print("Ctrl+C to stop")
+    asyncio.run(daemon.run())
+    print("\nRefresh daemon stopped")